@@ -2,8 +2,10 @@
 V1 Adapter - Handles request/response formatting and business logic orchestration for V1 API.
 Uses V1Transformer for data transformation.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Sequence
+from urllib.parse import urlencode
 from transformers.v1_transformer import V1Transformer
+from core.metrics import timed_phase
 
 
 class V1Adapter:
@@ -12,6 +14,7 @@ class V1Adapter:
     def __init__(self):
         self.transformer = V1Transformer()
     
+    @timed_phase('transform')
     def transform_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Transform V1 request using V1Transformer.
@@ -19,6 +22,12 @@ class V1Adapter:
         """
         return self.transformer.transform_request(request_data)
     
+    @timed_phase('transform')
+    def transform_request_list(self, request_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transform many V1 requests (batch ingestion)."""
+        return self.transformer.transform_request_list(request_items)
+    
+    @timed_phase('transform')
     def transform_response(self, payment_record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """
         Transform single payment record to V1 format.
@@ -28,10 +37,24 @@ class V1Adapter:
             return None
         return self.transformer.transform_response(payment_record)
     
+    @timed_phase('transform')
     def transform_response_list(self, payment_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform list of payment records to V1 format."""
         return self.transformer.transform_response_list(payment_records)
     
+    @timed_phase('transform')
+    def transform_summary(self, rows: List[Dict[str, Any]], granularity: str) -> Dict[str, Any]:
+        """Shape payment summary rows to V1 format."""
+        return self.transformer.transform_summary(rows, granularity)
+    
+    def transform_response_stream(self, payment_records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazily transform a stream of payment records to V1 format."""
+        return self.transformer.transform_response_stream(payment_records)
+    
+    def transform_rows(self, rows: Iterable[tuple], columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Lazily transform tuple rows ordered like `columns` to V1 format."""
+        return self.transformer.transform_rows(rows, columns)
+    
     @staticmethod
     def format_success_response(data: Any, message: str, status_code: int = 200) -> Dict[str, Any]:
         """
@@ -52,6 +75,27 @@ class V1Adapter:
             'links': V1Adapter.generate_links()
         }
     
+    @staticmethod
+    def format_list_response(data: List[Dict[str, Any]], message: str, next_cursor: Optional[str],
+                             query: Dict[str, str], status_code: int = 200) -> Dict[str, Any]:
+        """
+        Format V1 paginated list response.
+        
+        V1 pages are navigated by following links only:
+        {
+            "status_code": 200,
+            "message": "Success message",
+            "data": [...],
+            "links": {"self": "...", "collection": "...", "next": "..." (if more pages)}
+        }
+        """
+        return {
+            'status_code': status_code,
+            'message': message,
+            'data': data,
+            'links': V1Adapter.generate_list_links(query, next_cursor)
+        }
+    
     @staticmethod
     def format_error_response(message: str, status_code: int = 400) -> Dict[str, Any]:
         """
@@ -91,3 +135,18 @@ class V1Adapter:
         if payment_id is not None:
             links['delete'] = f"{base_url}/{payment_id}"
         return links
+    
+    @staticmethod
+    def generate_list_links(query: Dict[str, str], next_cursor: Optional[str]) -> Dict[str, str]:
+        """
+        Generate HATEOAS links for a V1 list page.
+        The next link keeps the current filters and only swaps the cursor.
+        """
+        base_url = '/api/v1/payments'
+        links = {
+            'self': f"{base_url}?{urlencode(query)}" if query else base_url,
+            'collection': base_url
+        }
+        if next_cursor:
+            links['next'] = f"{base_url}?{urlencode({**query, 'cursor': next_cursor})}"
+        return links
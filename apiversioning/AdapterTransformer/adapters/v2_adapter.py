@@ -2,8 +2,10 @@
 V2 Adapter - Handles request/response formatting and business logic orchestration for V2 API.
 Uses V2Transformer for data transformation.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Sequence
+from urllib.parse import urlencode
 from transformers.v2_transformer import V2Transformer
+from core.metrics import timed_phase
 
 
 class V2Adapter:
@@ -12,22 +14,32 @@ class V2Adapter:
     def __init__(self):
         self.transformer = V2Transformer()
     
+    @timed_phase('transform')
     def transform_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Transform V2 request using V2Transformer.
         Handles backward compatibility for card_number.
         """
         transformed = self.transformer.transform_request(request_data)
-        
-        # Add deprecation warning if card_number is used
-        transformed['_deprecation_warning'] = None
-        if 'card_number' in request_data and not request_data.get('payment_token'):
-            transformed['_deprecation_warning'] = (
-                "Using 'card_number' is deprecated. Please use 'payment_token' instead."
-            )
-        
+        transformed['_deprecation_warning'] = self._deprecation_warning(request_data)
+        return transformed
+    
+    @timed_phase('transform')
+    def transform_request_list(self, request_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transform many V2 requests (batch ingestion); card numbers are tokenized in bulk."""
+        transformed = self.transformer.transform_request_list(request_items)
+        for request_data, item in zip(request_items, transformed):
+            item['_deprecation_warning'] = self._deprecation_warning(request_data)
         return transformed
     
+    @staticmethod
+    def _deprecation_warning(request_data: Dict[str, Any]) -> Optional[str]:
+        """Deprecation warning if card_number is used instead of payment_token."""
+        if 'card_number' in request_data and not request_data.get('payment_token'):
+            return "Using 'card_number' is deprecated. Please use 'payment_token' instead."
+        return None
+    
+    @timed_phase('transform')
     def transform_response(self, payment_record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """
         Transform single payment record to V2 format.
@@ -37,10 +49,24 @@ class V2Adapter:
             return None
         return self.transformer.transform_response(payment_record)
     
+    @timed_phase('transform')
     def transform_response_list(self, payment_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform list of payment records to V2 format."""
         return self.transformer.transform_response_list(payment_records)
     
+    @timed_phase('transform')
+    def transform_summary(self, rows: List[Dict[str, Any]], granularity: str) -> Dict[str, Any]:
+        """Shape payment summary rows to V2 format."""
+        return self.transformer.transform_summary(rows, granularity)
+    
+    def transform_response_stream(self, payment_records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazily transform a stream of payment records to V2 format."""
+        return self.transformer.transform_response_stream(payment_records)
+    
+    def transform_rows(self, rows: Iterable[tuple], columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Lazily transform tuple rows ordered like `columns` to V2 format."""
+        return self.transformer.transform_rows(rows, columns)
+    
     @staticmethod
     def format_success_response(data: Any, message: str, code: int = 200, 
                                deprecation_warning: Optional[str] = None) -> Dict[str, Any]:
@@ -68,6 +94,37 @@ class V2Adapter:
         
         return response
     
+    @staticmethod
+    def format_list_response(data: List[Dict[str, Any]], message: str, next_cursor: Optional[str],
+                             limit: int, query: Dict[str, str], code: int = 200) -> Dict[str, Any]:
+        """
+        Format V2 paginated list response.
+        
+        V2 exposes the cursor explicitly next to the hypermedia links:
+        {
+            "code": 200,
+            "message": "Success message",
+            "data": [...],
+            "pagination": {"limit": 20, "has_more": true, "next_cursor": "..."},
+            "links": {
+                "self": {"href": "...", "method": "GET"},
+                "next": {"href": "...", "method": "GET"} (if more pages),
+                ...
+            }
+        }
+        """
+        return {
+            'code': code,
+            'message': message,
+            'data': data,
+            'pagination': {
+                'limit': limit,
+                'has_more': next_cursor is not None,
+                'next_cursor': next_cursor
+            },
+            'links': V2Adapter.generate_list_links(query, next_cursor)
+        }
+    
     @staticmethod
     def format_error_response(message: str, code: int = 400) -> Dict[str, Any]:
         """
@@ -107,3 +164,20 @@ class V2Adapter:
         if transaction_id is not None:
             links['delete'] = f"{base_url}/{transaction_id}"
         return links
+    
+    @staticmethod
+    def generate_list_links(query: Dict[str, str], next_cursor: Optional[str]) -> Dict[str, Dict[str, str]]:
+        """
+        Generate HATEOAS links for a V2 list page.
+        V2 list links are objects carrying the HTTP method, so clients can
+        follow them without hard-coding verbs.
+        """
+        base_url = '/api/v2/transactions'
+        links = {
+            'self': {'href': f"{base_url}?{urlencode(query)}" if query else base_url, 'method': 'GET'},
+            'collection': {'href': base_url, 'method': 'GET'},
+            'create': {'href': base_url, 'method': 'POST'}
+        }
+        if next_cursor:
+            links['next'] = {'href': f"{base_url}?{urlencode({**query, 'cursor': next_cursor})}", 'method': 'GET'}
+        return links
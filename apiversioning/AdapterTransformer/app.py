@@ -5,11 +5,22 @@ A standalone Flask application demonstrating the Adapter/Transformer pattern for
 from flask import Flask, jsonify
 from routes.payment_routes import unified_bp
 from core.database import init_db, seed_sample_data
+from core.tokenization import tokenizer
+from core.response_cache import response_cache
+from core.record_cache import record_cache
+from core.metrics import install_metrics, VARIANT
+from core.settlement import FakeProcessor, SettlementProcessor, SettlementWorkerPool, queue_stats
+from typing import Optional
 import os
 
 
-def create_app():
-    """Application factory function."""
+def create_app(settlement_processor: Optional[SettlementProcessor] = None):
+    """
+    Application factory function.
+    
+    Settlement workers run in the app when SETTLEMENT_WORKERS > 0, with
+    settlement_processor (default: the local FakeProcessor).
+    """
     app = Flask(__name__)
     
     # Configuration
@@ -20,9 +31,19 @@ def create_app():
     init_db()
     seed_sample_data()
     
+    # Per-version request metrics at /metrics
+    install_metrics(app, VARIANT)
+    
     # Register blueprints
     app.register_blueprint(unified_bp)
     
+    # Background settlement of PENDING payments
+    workers = int(os.environ.get('SETTLEMENT_WORKERS', 0))
+    if workers:
+        pool = SettlementWorkerPool(settlement_processor or FakeProcessor(), workers)
+        pool.start()
+        app.extensions['settlement'] = pool
+    
     # Root endpoint
     @app.route('/')
     def index():
@@ -108,7 +129,12 @@ def create_app():
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
-            'api_versions': ['v1', 'v2']
+            'api_versions': ['v1', 'v2'],
+            'tokenization': tokenizer.stats(),
+            'response_cache': response_cache.stats(),
+            'record_cache': record_cache.stats(),
+            'settlement': app.extensions['settlement'].stats() if 'settlement' in app.extensions
+                          else {'workers': 0, 'queue': queue_stats()}
         }), 200
     
     return app
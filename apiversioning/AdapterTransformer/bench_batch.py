@@ -0,0 +1,72 @@
+"""
+Throughput benchmark: per-item POST vs batch ingestion.
+
+Runs against a temporary database through the Flask test client:
+  - single:  POST /api/v2/transactions once per record (INSERT + commit +
+             re-SELECT each); measured on a sample and reported as records/s
+  - batch:   POST /api/v2/transactions/batch with every record at once
+  - replay:  the same batch again with the same Idempotency-Key (no inserts)
+
+Usage:
+    python bench_batch.py [batch_size] [single_sample]    (default: 10000 1000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import core.database as database
+
+BATCH_SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+SINGLE_SAMPLE = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+
+
+def make_items(count: int):
+    return [
+        {'amount': round(i * 0.37 % 1000, 2), 'payment_token': f'TOK-{i:012X}',
+         'status': 'PENDING' if i % 10 == 0 else 'SUCCESS'}
+        for i in range(count)
+    ]
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        from app import create_app
+
+        client = create_app().test_client()
+        items = make_items(BATCH_SIZE)
+
+        def single():
+            for item in items[:SINGLE_SAMPLE]:
+                assert client.post('/api/v2/transactions', json=item).status_code == 201
+
+        def batch():
+            return client.post('/api/v2/transactions/batch', json={'transactions': items},
+                               headers={'Idempotency-Key': 'bench-batch'})
+
+        _, single_seconds = timed(single)
+        response, batch_seconds = timed(batch)
+        assert response.status_code == 201, response.get_json()
+        assert response.get_json()['data']['summary']['created'] == BATCH_SIZE
+        replay, replay_seconds = timed(batch)
+        assert replay.status_code == 200
+        assert replay.get_json()['data']['summary']['duplicate'] == BATCH_SIZE
+
+        single_rate = SINGLE_SAMPLE / single_seconds
+        print(f"{'path':<10}{'records':>9}{'seconds':>10}{'records/s':>12}")
+        print(f"{'single':<10}{SINGLE_SAMPLE:>9}{single_seconds:>10.2f}{single_rate:>12,.0f}")
+        print(f"{'batch':<10}{BATCH_SIZE:>9}{batch_seconds:>10.2f}{BATCH_SIZE / batch_seconds:>12,.0f}")
+        print(f"{'replay':<10}{BATCH_SIZE:>9}{replay_seconds:>10.2f}{BATCH_SIZE / replay_seconds:>12,.0f}")
+        print(f"\n{BATCH_SIZE} records one by one: ~{BATCH_SIZE / single_rate:.1f} s "
+              f"(extrapolated) vs {batch_seconds:.2f} s batched")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Memory benchmark: full-list response vs streaming export.
+
+Seeds a temporary database, then measures peak Python memory (tracemalloc)
+for each row count:
+  - list:   get_all_payments() + transform_response_list() + jsonify()
+  - stream: GET /api/v2/transactions/export consumed chunk by chunk
+
+Usage:
+    python bench_export.py [row_count ...]     (default: 10000 100000)
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import core.database as database
+
+ROW_COUNTS = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+SEED_BATCH = 50_000
+
+
+def seed(rows: int):
+    conn = database.get_db_connection()
+    conn.execute('DELETE FROM payments')
+    for start in range(0, rows, SEED_BATCH):
+        conn.executemany(
+            'INSERT INTO payments (transaction_id, amount, card_number, payment_token, status, status_code, code, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (f'TXN-{i:012d}', round(i * 0.37 % 1000, 2), '4111-1111-1111-1111', f'TOK-{i:012X}',
+                 'SUCCESS', 200, 200, f'2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00')
+                for i in range(start, min(start + SEED_BATCH, rows))
+            ]
+        )
+    conn.commit()
+    conn.close()
+
+
+def measure(func):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, size, elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        from app import create_app
+        from adapters.v2_adapter import V2Adapter
+        from core.service import PaymentService
+        from flask import jsonify
+
+        app = create_app()
+        client = app.test_client()
+
+        def full_list():
+            with app.app_context():
+                adapter = V2Adapter()
+                data = adapter.transform_response_list(PaymentService.get_all_payments())
+                return len(jsonify(adapter.format_success_response(data=data, message='ok')).get_data())
+
+        def streamed():
+            response = client.get('/api/v2/transactions/export', buffered=False)
+            size = sum(len(chunk) for chunk in response.response)
+            response.close()
+            return size
+
+        print(f"{'rows':>10} {'path':<8} {'peak MiB':>10} {'body MB':>9} {'seconds':>8}")
+        for rows in ROW_COUNTS:
+            seed(rows)
+            for name, func in (('list', full_list), ('stream', streamed)):
+                peak, size, elapsed = measure(func)
+                print(f"{rows:>10} {name:<8} {peak / 2**20:>10.1f} {size / 1e6:>9.1f} {elapsed:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Lookup benchmark: transaction_id / payment_token lookups at 1M rows.
+
+Seeds a temporary database, then times, through PaymentService:
+  - scan:    lookup by transaction_id with the lookup indexes dropped
+             (what reconciliation costs without them)
+  - indexed: the same lookup through the unique index
+  - token:   payments of one payment_token (secondary index)
+  - 1k x 1:  1000 single transaction_id lookups
+  - batch:   the same 1000 keys in one lookup_payments() IN query
+
+Usage:
+    python bench_lookup.py [row_count] [scan_samples]    (default: 1000000 5)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import core.database as database
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+SCAN_SAMPLES = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+SEED_BATCH = 50_000
+LOOKUP_KEYS = 1000
+
+
+def seed(rows: int):
+    conn = database.get_db_connection()
+    for start in range(0, rows, SEED_BATCH):
+        conn.executemany(
+            'INSERT INTO payments (transaction_id, amount, card_number, payment_token, status, status_code, code, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                # ~10 payments per token, like returning customers
+                (f'TXN-{i:012d}', round(i * 0.37 % 1000, 2), None, f'TOK-{i % (rows // 10 or 1):012X}',
+                 'SUCCESS', 200, 200, f'2024-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00')
+                for i in range(start, min(start + SEED_BATCH, rows))
+            ]
+        )
+    conn.commit()
+    conn.close()
+
+
+def per_call_us(func, calls: int) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        database.init_db()
+        from core.service import PaymentService
+
+        started = time.perf_counter()
+        seed(ROWS)
+        print(f"Seeded {ROWS:,} rows in {time.perf_counter() - started:.1f}s")
+
+        keys = [f'TXN-{random.randrange(ROWS):012d}' for _ in range(LOOKUP_KEYS)]
+        token = f'TOK-{random.randrange(ROWS // 10 or 1):012X}'
+
+        conn = database.get_db_connection()
+        conn.execute('DROP INDEX idx_payments_transaction_id')
+        conn.commit()
+        conn.close()
+        scan = per_call_us(lambda: [PaymentService.get_payment_by_transaction_id(key)
+                                    for key in keys[:SCAN_SAMPLES]], SCAN_SAMPLES)
+        conn = database.get_db_connection()
+        for statement in database.LOOKUP_INDEXES:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+
+        results = [
+            ('scan (no index)', scan),
+            ('indexed', per_call_us(lambda: [PaymentService.get_payment_by_transaction_id(key)
+                                             for key in keys], LOOKUP_KEYS)),
+            ('token', per_call_us(lambda: PaymentService.lookup_payments('payment_token', [token]), 1)),
+            ('1k x 1 (total)', per_call_us(lambda: [PaymentService.get_payment_by_transaction_id(key)
+                                                    for key in keys], 1)),
+            ('batch 1k (total)', per_call_us(lambda: PaymentService.lookup_payments('transaction_id', keys), 1)),
+        ]
+        assert len(PaymentService.lookup_payments('transaction_id', keys)) == len(set(keys))
+
+        print(f"{'lookup':<20}{'ms':>12}")
+        for name, us in results:
+            print(f"{name:<20}{us / 1000:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
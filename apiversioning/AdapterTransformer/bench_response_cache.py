@@ -0,0 +1,83 @@
+"""
+Read benchmark: single-payment GETs with and without the response cache.
+
+Seeds a temporary database, then replays Zipf-distributed reads (a few
+payments are read far more often than the rest), half v1 and half v2,
+through the Flask test client for each response cache capacity, with the
+record cache on and off. Reports the hit rates (responses, records, v2
+projections), throughput and p50 / p99 latency.
+
+Usage:
+    python bench_response_cache.py [reads] [payments] [zipf_s]    (default: 50000 10000 1.1)
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import core.database as database
+
+READS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+PAYMENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+ZIPF_S = float(sys.argv[3]) if len(sys.argv) > 3 else 1.1
+CAPACITIES = [0, 1_000, 10_000]
+
+
+def seed(rows: int):
+    conn = database.get_db_connection()
+    conn.executemany(
+        'INSERT INTO payments (transaction_id, amount, card_number, payment_token, status, status_code, code) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(f'TXN-{i:012d}', round(i * 0.37 % 1000, 2), '4111-1111-1111-1111', f'TOK-{i:012X}',
+          'SUCCESS', 200, 200) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        database.init_db()
+        seed(PAYMENTS)
+        from app import create_app
+        from core.response_cache import response_cache
+        from core.record_cache import record_cache, CACHE_BYTES
+
+        client = create_app().test_client()
+        ids = range(1, PAYMENTS + 1)
+        weights = [1 / rank ** ZIPF_S for rank in ids]
+        urls = [
+            f"/api/v1/payments/{payment_id}" if n % 2 else f"/api/v2/transactions/{payment_id}"
+            for n, payment_id in enumerate(random.choices(ids, weights=weights, k=READS))
+        ]
+
+        print(f"{READS} reads over {PAYMENTS} payments, Zipf s={ZIPF_S}, v1/v2 alternating")
+        print(f"{'capacity':>10}{'records':>9}{'hit rate':>10}{'record':>8}{'v2 proj':>9}"
+              f"{'req/s':>10}{'p50 µs':>10}{'p99 µs':>10}")
+        for capacity, record_bytes in [(c, b) for c in CAPACITIES for b in (0, CACHE_BYTES)]:
+            response_cache.capacity = capacity
+            response_cache.clear()
+            record_cache.max_bytes = record_bytes
+            record_cache.clear()
+            latencies = []
+            started = time.perf_counter()
+            for url in urls:
+                t0 = time.perf_counter()
+                assert client.get(url).status_code == 200
+                latencies.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)]
+            records = record_cache.stats()
+            v2_projection = records['projections'].get('v2', {}).get('hit_rate', 0.0)
+            print(f"{capacity:>10}{'on' if record_bytes else 'off':>9}{response_cache.stats()['hit_rate']:>10.1%}"
+                  f"{records['hit_rate']:>8.1%}{v2_projection:>9.1%}{READS / elapsed:>10.0f}"
+                  f"{statistics.median(latencies) * 1e6:>10.0f}{p99 * 1e6:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Settlement benchmark: settlements/sec of the worker pool.
+
+Queues PENDING payments in a temporary database (through
+create_payments_batch, like the API does), starts a SettlementWorkerPool
+on the FakeProcessor and times how long the pool takes to drain the queue.
+Each configuration runs on a fresh database:
+  - processor latency 0:     cost of claim + bulk transition (SQLite bound)
+  - processor latency 20 ms: a provider round trip per batch, which
+                             workers overlap
+
+Usage:
+    python bench_settlement.py [payments] [batch_size]    (default: 20000 100)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import core.database as database
+
+PAYMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+BATCH_SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+CONFIGURATIONS = [(1, 0.0), (4, 0.0), (1, 0.02), (4, 0.02)]    # (workers, processor latency)
+
+
+def queue_payments(count: int):
+    from core.service import MAX_BATCH_SIZE, PaymentService
+    for start in range(0, count, MAX_BATCH_SIZE):
+        PaymentService.create_payments_batch([
+            {'amount': 10 + i % 500, 'card_number': '4111-1111-1111-1111', 'status': 'PENDING'}
+            for i in range(start, min(start + MAX_BATCH_SIZE, count))
+        ])
+
+
+def main():
+    from core.settlement import FakeProcessor, SettlementWorkerPool, queue_stats
+
+    print(f"{PAYMENTS} PENDING payments, batches of {BATCH_SIZE}")
+    print(f"{'workers':>8}{'latency ms':>12}{'seconds':>10}{'settled/s':>12}{'batches':>9}")
+    for workers, latency in CONFIGURATIONS:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_PATH = os.path.join(tmp, 'bench.db')
+            database.run_migrations(database.DB_PATH, database.MIGRATIONS, verbose=False)
+            queue_payments(PAYMENTS)
+            assert queue_stats()['queued'] == PAYMENTS
+
+            pool = SettlementWorkerPool(FakeProcessor(failure_rate=0.1, latency=latency), workers,
+                                        BATCH_SIZE, poll_interval=0.01)
+            started = time.perf_counter()
+            pool.start()
+            drained = pool.drain(timeout=600)
+            elapsed = time.perf_counter() - started
+            pool.stop()
+            stats = pool.stats()
+            assert drained and stats['settled'] == PAYMENTS, stats
+            print(f"{workers:>8}{latency * 1000:>12.0f}{elapsed:>10.2f}{PAYMENTS / elapsed:>12.0f}{stats['batches']:>9}")
+            database.close_pool(database.DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
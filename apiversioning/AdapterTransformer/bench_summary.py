@@ -0,0 +1,91 @@
+"""
+Summary benchmark: rollup-backed summaries vs summing every payment.
+
+For each row count, seeds a temporary database with payments spread evenly
+over 2024 (all statuses), rebuilds payment_rollups with backfill_rollups(), then
+times:
+  - client sum: what dashboards did before - read every payment
+                (iter_payment_rows) and sum amount by status
+  - day / hour: PaymentService.get_summary() over the whole year
+  - 1 week:     get_summary(granularity='hour') over one week
+
+Usage:
+    python bench_summary.py [row_count ...]    (default: 10000 100000 1000000)
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import core.database as database
+
+ROW_COUNTS = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+SEED_BATCH = 50_000
+STATUSES = (('SUCCESS', 200), ('PENDING', 202), ('FAILED', 400))
+REPEAT = 20
+YEAR_START = datetime(2024, 1, 1)
+YEAR_SECONDS = 366 * 24 * 3600
+
+
+def payment_row(i: int, rows: int) -> tuple:
+    # Evenly spread over the year, so every hour holds payments once rows > 8784
+    status, code = STATUSES[i % len(STATUSES)]
+    created_at = YEAR_START + timedelta(seconds=i * YEAR_SECONDS // rows)
+    return (f'TXN-{i:012d}', round(i * 0.37 % 1000, 2), None, None, status, code, code,
+            created_at.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def seed(rows: int):
+    conn = database.get_db_connection()
+    for start in range(0, rows, SEED_BATCH):
+        conn.executemany(
+            'INSERT INTO payments (transaction_id, amount, card_number, payment_token, status, status_code, code, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [payment_row(i, rows) for i in range(start, min(start + SEED_BATCH, rows))]
+        )
+    conn.commit()
+    conn.close()
+
+
+def client_sum(service):
+    totals = defaultdict(float)
+    status = database.PAYMENT_COLUMNS.index('status')
+    amount = database.PAYMENT_COLUMNS.index('amount')
+    for row in service.iter_payment_rows():
+        totals[row[status]] += row[amount]
+    return totals
+
+
+def median_ms(func, repeat: int = REPEAT) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    from core.service import PaymentService
+
+    print(f"{'payments':>10}{'client sum ms':>15}{'day ms':>10}{'hour ms':>10}{'1 week ms':>11}{'rollup rows':>13}")
+    for rows in ROW_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_PATH = os.path.join(tmp, 'bench.db')
+            database.run_migrations(database.DB_PATH, database.MIGRATIONS, verbose=False)
+            seed(rows)
+            rollup_rows = database.backfill_rollups()
+
+            client = median_ms(lambda: client_sum(PaymentService), repeat=3)
+            day = median_ms(lambda: PaymentService.get_summary('2024-01-01 00:00:00', '2024-12-31 23:59:59', 'day'))
+            hour = median_ms(lambda: PaymentService.get_summary('2024-01-01 00:00:00', '2024-12-31 23:59:59', 'hour'))
+            week = median_ms(lambda: PaymentService.get_summary('2024-03-04 00:00:00', '2024-03-10 23:59:59', 'hour'))
+            print(f"{rows:>10}{client:>15.1f}{day:>10.2f}{hour:>10.2f}{week:>11.3f}{rollup_rows:>13}")
+            database.close_pool(database.DB_PATH)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Micro-benchmark: records/sec for V1 and V2 response transformation.
+
+Compares the compiled field-spec mappers with the previous hand-written
+per-record methods (reproduced below), on 100k records, plus the per-request
+cost of get_adapter() + transform_response() + format_success_response().
+
+The last section reads the records from SQLite, as the export does: sqlite3.Row
+-> dict -> transform (previous export path) versus plain tuple rows mapped by
+the compiled row mapper (transform_rows).
+
+Usage:
+    python bench_transformers.py [record_count]
+"""
+import sqlite3
+import sys
+import time
+
+from adapters.v1_adapter import V1Adapter
+from adapters.v2_adapter import V2Adapter
+from core.database import PAYMENT_COLUMNS
+from routes.payment_routes import get_adapter
+
+RECORDS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+ROUNDS = 5
+
+
+# Previous implementation: one method call + dict literal with .get per record
+class LegacyV1:
+    def transform_response(self, payment_record):
+        return {
+            'id': payment_record['id'],
+            'transaction_id': payment_record.get('transaction_id'),
+            'amount': payment_record['amount'],
+            'card_number': payment_record.get('card_number'),
+            'status': payment_record['status'],
+            'created_at': payment_record['created_at']
+        }
+
+    def transform_response_list(self, payment_records):
+        return [self.transform_response(record) for record in payment_records]
+
+
+class LegacyV2:
+    def transform_response(self, payment_record):
+        return {
+            'id': payment_record['id'],
+            'amount': payment_record['amount'],
+            'payment_token': payment_record.get('payment_token'),
+            'status': payment_record['status'],
+            'code': payment_record.get('code', payment_record.get('status_code', 200)),
+            'created_at': payment_record['created_at']
+        }
+
+    def transform_response_list(self, payment_records):
+        return [self.transform_response(record) for record in payment_records]
+
+
+def make_records(count):
+    return [
+        {
+            'id': i, 'transaction_id': f'TXN-{i:012d}', 'amount': i * 0.5,
+            'card_number': '4111-1111-1111-1111', 'payment_token': f'TOK-{i:012X}',
+            'status': 'SUCCESS', 'status_code': 200, 'code': 200,
+            'created_at': '2024-01-01 12:00:00'
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(func):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    records = make_records(RECORDS)
+    print(f"{RECORDS} records, best of {ROUNDS} runs")
+    print(f"{'version':<8}{'path':<10}{'records/s':>14}{'speedup':>9}")
+    for version, legacy, adapter in (('v1', LegacyV1(), V1Adapter()), ('v2', LegacyV2(), V2Adapter())):
+        assert legacy.transform_response_list(records[:100]) == adapter.transform_response_list(records[:100])
+        old = best_of(lambda: legacy.transform_response_list(records))
+        new = best_of(lambda: adapter.transform_response_list(records))
+        print(f"{version:<8}{'legacy':<10}{RECORDS / old:>14,.0f}")
+        print(f"{version:<8}{'compiled':<10}{RECORDS / new:>14,.0f}{old / new:>8.2f}x")
+
+    # Per-request overhead for a single-record response
+    record = records[0]
+    requests = 100_000
+
+    def per_request_fresh():
+        for _ in range(requests):
+            adapter = V2Adapter()   # previous get_adapter(): new adapter + transformer
+            adapter.format_success_response(data=adapter.transform_response(record), message='ok')
+
+    def per_request_shared():
+        for _ in range(requests):
+            adapter = get_adapter('v2')
+            adapter.format_success_response(data=adapter.transform_response(record), message='ok')
+
+    fresh, shared = best_of(per_request_fresh), best_of(per_request_shared)
+    print(f"\nsingle-record v2 response: {fresh / requests * 1e6:.2f} µs (new adapter) "
+          f"→ {shared / requests * 1e6:.2f} µs (singleton)")
+
+    # Records straight from SQLite, as in the export
+    conn = sqlite3.connect(':memory:')
+    conn.execute(f"CREATE TABLE payments ({', '.join(PAYMENT_COLUMNS)})")
+    conn.executemany(
+        f"INSERT INTO payments VALUES ({', '.join('?' * len(PAYMENT_COLUMNS))})",
+        [tuple(record[column] for column in PAYMENT_COLUMNS) for record in records]
+    )
+    query = f"SELECT {', '.join(PAYMENT_COLUMNS)} FROM payments"
+
+    def rows_as_dicts():
+        conn.row_factory = sqlite3.Row
+        return legacy.transform_response_list(dict(row) for row in conn.execute(query))
+
+    def rows_as_tuples():
+        conn.row_factory = None
+        return list(adapter.transform_rows(conn.execute(query), PAYMENT_COLUMNS))
+
+    print(f"\n{'version':<8}{'sqlite path':<22}{'records/s':>14}{'speedup':>9}")
+    for version, legacy, adapter in (('v1', LegacyV1(), V1Adapter()), ('v2', LegacyV2(), V2Adapter())):
+        assert rows_as_dicts() == rows_as_tuples()
+        old, new = best_of(rows_as_dicts), best_of(rows_as_tuples)
+        print(f"{version:<8}{'Row -> dict -> map':<22}{RECORDS / old:>14,.0f}")
+        print(f"{version:<8}{'tuple row mapper':<22}{RECORDS / new:>14,.0f}{old / new:>8.2f}x")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,31 +2,112 @@
 Database module for AdapterTransformer project.
 This is a standalone database, independent from the main Routes project.
 """
-import sqlite3
 import os
-from datetime import datetime
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+
+# apiversioning/ holds the shared package. core/__init__ imports database first
+# and it also runs as a script, so this is the only sys.path change.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from shared.persistence import Migration, close_pool, get_connection, run_migrations  # noqa: E402
 
 # Database path - independent from Routes project
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'payments_adapter.db')
 
+# Column order of the payments table, used by queries returning plain tuples
+PAYMENT_COLUMNS = (
+    'id', 'transaction_id', 'amount', 'card_number', 'payment_token',
+    'status', 'status_code', 'code', 'created_at'
+)
 
-def get_db_connection():
-    """Get a connection to the AdapterTransformer database."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+PAYMENT_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_payments_created_at_id ON payments (created_at, id)',
+    'CREATE INDEX IF NOT EXISTS idx_payments_status_created_at_id ON payments (status, created_at, id)',
+]
 
+# Lookups by the external keys: transaction_id is unique (v1), a payment_token
+# is shared by every payment made with the same card (v2), so its index also
+# carries (created_at, id) for keyset pagination of ?payment_token= listings
+LOOKUP_INDEXES = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_transaction_id ON payments (transaction_id)',
+    'CREATE INDEX IF NOT EXISTS idx_payments_payment_token_created_at_id ON payments (payment_token, created_at, id)',
+]
 
-def init_db():
+
+# Hourly totals per status behind GET .../summary. create_payment,
+# create_payments_batch and delete_payment keep them in step with payments
+# (service._apply_rollups), so a summary reads hours x statuses rows whatever
+# the number of payments. Amounts are summed in integer cents.
+ROLLUP_TABLE = '''
+    CREATE TABLE IF NOT EXISTS payment_rollups (
+        hour TEXT NOT NULL,
+        status TEXT NOT NULL,
+        payment_count INTEGER NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        PRIMARY KEY (hour, status)
+    ) WITHOUT ROWID
+'''
+
+
+def to_cents(amount) -> int:
     """
-    Initialize the database with the payments table.
-    This creates a new independent database for the AdapterTransformer project.
+    Amount in integer cents, half-cents rounded up (0.125 -> 13).
+
+    The one rounding rule of payment_rollups: _apply_rollups calls it for every
+    create and delete, and backfill_rollups runs it in SQL (registered as
+    to_cents), so a backfilled payment is taken out by exactly what it added.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create payments table with all fields to support both v1 and v2
-    cursor.execute('''
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def create_rollups(conn):
+    """Migration 5: create payment_rollups and fill it from the existing payments."""
+    conn.execute(ROLLUP_TABLE)
+    backfill_rollups(conn)
+
+
+def backfill_rollups(conn=None) -> int:
+    """
+    Rebuild payment_rollups from the payments table.
+
+    Args:
+        conn: Connection to run in (its transaction is left to the caller);
+              by default a pooled connection, committed here
+
+    Returns:
+        Number of rollup rows written
+    """
+    own = conn is None
+    if own:
+        conn = get_db_connection()
+    try:
+        conn.create_function('to_cents', 1, to_cents, deterministic=True)
+        conn.execute('DELETE FROM payment_rollups')
+        written = conn.execute('''
+            INSERT INTO payment_rollups (hour, status, payment_count, amount_cents)
+            SELECT strftime('%Y-%m-%d %H:00:00', created_at), status, COUNT(*), SUM(to_cents(amount))
+            FROM payments
+            GROUP BY 1, 2
+        ''').rowcount
+        if own:
+            conn.commit()
+    finally:
+        if own:
+            conn.close()
+    return written
+
+
+# Queues every PENDING payment (status_code 202) not queued yet for settlement
+QUEUE_PENDING = '''
+    INSERT OR IGNORE INTO settlement_jobs (payment_id, available_at)
+    SELECT id, CAST(strftime('%s', 'now') AS REAL) FROM payments WHERE status_code = 202
+'''
+
+
+# Schema history; the database records the last applied version in PRAGMA user_version
+MIGRATIONS = [
+    # Payments table with all fields to support both v1 and v2
+    Migration(1, 'create payments table', '''
         CREATE TABLE IF NOT EXISTS payments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             transaction_id TEXT,
@@ -38,10 +119,53 @@ def init_db():
             code INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    '''),
+    # Composite indexes for keyset pagination on (created_at, id):
+    # the first serves unfiltered listings, the second status-filtered ones
+    Migration(2, 'keyset pagination indexes', ';'.join(PAYMENT_INDEXES)),
+    # Idempotency keys of batch-created payments: a retried batch maps each
+    # key back to the payment it already created instead of inserting again
+    Migration(3, 'create idempotency_keys table', '''
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            payment_id INTEGER NOT NULL,
+            fingerprint TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    '''),
+    Migration(4, 'transaction_id and payment_token lookup indexes', ';'.join(LOOKUP_INDEXES)),
+    # Hourly per-status totals for summaries, backfilled from existing payments
+    Migration(5, 'create payment_rollups table', create_rollups),
+    # Durable queue of PENDING payments (status_code 202) awaiting settlement;
+    # a row lives until its payment is settled. Times are unix seconds.
+    Migration(6, 'create settlement_jobs table', '''
+        CREATE TABLE IF NOT EXISTS settlement_jobs (
+            payment_id INTEGER PRIMARY KEY,
+            state TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            claimed_by TEXT,
+            claimed_at REAL,
+            last_error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_settlement_jobs_state_available_at
+            ON settlement_jobs (state, available_at);
+    ''' + QUEUE_PENDING),
+]
+
+
+def get_db_connection():
+    """Get a pooled connection to the AdapterTransformer database; conn.close() returns it to the pool."""
+    # DB_PATH is read on every call so benchmarks can point it at a scratch file
+    return get_connection(DB_PATH)
+
+
+def init_db():
+    """
+    Initialize the database by applying pending migrations.
+    This creates a new independent database for the AdapterTransformer project.
+    """
+    run_migrations(DB_PATH, MIGRATIONS)
     print(f"✅ AdapterTransformer database initialized: {DB_PATH}")
 
 
@@ -102,16 +226,22 @@ def seed_sample_data():
             payment['code']
         ))
     
+    conn.execute(QUEUE_PENDING)
     conn.commit()
     conn.close()
+    backfill_rollups()
     print(f"✅ Seeded {len(sample_payments)} sample payments")
 
 
 def reset_db():
     """Reset the database by dropping and recreating tables."""
+    close_pool(DB_PATH)
     if os.path.exists(DB_PATH):
         os.remove(DB_PATH)
         print(f"🗑️  Removed old database: {DB_PATH}")
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
     
     init_db()
     seed_sample_data()
@@ -123,6 +253,9 @@ if __name__ == '__main__':
     
     if len(sys.argv) > 1 and sys.argv[1] == '--reset':
         reset_db()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--backfill-rollups':
+        init_db()
+        print(f"✅ Rebuilt {backfill_rollups()} rollup rows from payments")
     else:
         init_db()
         seed_sample_data()
@@ -0,0 +1,8 @@
+"""
+Request metrics for AdapterTransformer.
+Backed by the shared Prometheus metrics (apiversioning/shared): per-version
+request counts and latency, plus db / transform / serialize phase timers.
+"""
+from shared.metrics import install_metrics, timed_phase  # noqa: F401
+
+VARIANT = 'AdapterTransformer'
@@ -0,0 +1,185 @@
+"""
+Read-through cache of internal payment records, shared by every API version.
+
+v1 and v2 read the same payments row and differ only in the projection
+(transform_response). The record is cached once per payment id; each
+version's projection is computed on first use and memoized on the cached
+entry. A v2 read right after a v1 read of the same payment therefore costs
+only the v2 projection, with no SQLite query.
+
+It sits behind the rendered-response cache: a response-cache miss (first
+read in a version, or a body evicted from the smaller response cache) is
+answered from here. The cache is bounded by an estimate of the memory held
+by records and projections, evicting least recently used entries.
+
+Like rendered responses, PENDING records change when the settlement workers
+settle them, so they are never cached; a settled payment only changes by
+being deleted, which calls invalidate(payment_id). A read that missed and
+raced with an invalidation does not store its (possibly stale) record.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+CACHE_BYTES = 64 * 1024 * 1024      # estimated memory of records + projections
+
+
+def _sizeof(value: Any) -> int:
+    """Approximate memory held by a record or projection (dicts and lists are walked)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_sizeof(key) + _sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_sizeof(item) for item in value)
+    return size
+
+
+class _Entry:
+    __slots__ = ('record', 'projections', 'nbytes')
+
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+        self.projections: Dict[str, Dict[str, Any]] = {}
+        self.nbytes = _sizeof(record)
+
+
+class RecordCache:
+    """
+    Bounded LRU of payment_id -> internal record, with per-version projections.
+
+    Args:
+        max_bytes: Memory budget of the cached records and projections
+                   (0 disables the cache)
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[int, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.epoch = 0      # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.projection_hits: Dict[str, int] = {}
+        self.projection_misses: Dict[str, int] = {}
+
+    def get(self, payment_id: int) -> Optional[Dict[str, Any]]:
+        """Return the cached record or None; a miss is counted."""
+        with self._lock:
+            entry = self._entries.get(payment_id)
+            if entry is not None:
+                self._entries.move_to_end(payment_id)
+                self.hits += 1
+                return entry.record
+            self.misses += 1
+            return None
+
+    def put(self, record: Dict[str, Any], epoch: int) -> Dict[str, Any]:
+        """
+        Cache a record loaded from the database and return it.
+
+        Args:
+            epoch: Value of self.epoch read before the record was loaded; if an
+                   invalidation happened since, the record is returned but not cached
+        """
+        if not self.max_bytes:
+            return record
+        entry = _Entry(record)
+        with self._lock:
+            if epoch != self.epoch or entry.nbytes > self.max_bytes:
+                return record
+            previous = self._entries.pop(record['id'], None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+            self._entries[record['id']] = entry
+            self.bytes += entry.nbytes
+            self._evict()
+        return record
+
+    def project(self, record: Dict[str, Any], version: str,
+                transform: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Return transform(record), memoized per version on the cached entry.
+
+        Records that are not cached (PENDING, or evicted / invalidated since they
+        were read) are transformed every time. Projections are shared between
+        requests and must not be modified by the caller.
+        """
+        with self._lock:
+            entry = self._entries.get(record['id'])
+            if entry is not None and entry.record is not record:
+                entry = None
+            projection = entry.projections.get(version) if entry is not None else None
+            if projection is not None:
+                self.projection_hits[version] = self.projection_hits.get(version, 0) + 1
+                return projection
+            self.projection_misses[version] = self.projection_misses.get(version, 0) + 1
+
+        projection = transform(record)
+        if entry is not None:
+            nbytes = _sizeof(projection)
+            with self._lock:
+                # Still the cached entry: not evicted or invalidated meanwhile
+                if self._entries.get(record['id']) is entry and version not in entry.projections:
+                    entry.projections[version] = projection
+                    entry.nbytes += nbytes
+                    self.bytes += nbytes
+                    self._evict()
+        return projection
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits (lock held)."""
+        while self.bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.nbytes
+
+    def invalidate(self, payment_id: int):
+        """Drop the cached record of a payment, with the projections of every version."""
+        with self._lock:
+            self.epoch += 1
+            self.invalidations += 1
+            entry = self._entries.pop(payment_id, None)
+            if entry is not None:
+                self.bytes -= entry.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache metrics: record hits / misses / hit_rate, size, bytes, max_bytes,
+        invalidations, and hits / misses / hit_rate of the projections per version.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            projections = {}
+            for version in sorted(set(self.projection_hits) | set(self.projection_misses)):
+                hits, misses = self.projection_hits.get(version, 0), self.projection_misses.get(version, 0)
+                projections[version] = {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+                }
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'invalidations': self.invalidations,
+                'projections': projections
+            }
+
+    def clear(self):
+        """Drop cached records and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.epoch += 1
+            self.hits = self.misses = self.invalidations = 0
+            self.projection_hits.clear()
+            self.projection_misses.clear()
+
+
+record_cache = RecordCache(int(os.environ.get('RECORD_CACHE_BYTES', CACHE_BYTES)))
@@ -0,0 +1,102 @@
+"""
+Rendered-response cache for single-payment reads.
+
+A settled payment never changes; only DELETE removes it. The JSON body of
+GET /api/v1/payments/<id> and GET /api/v2/transactions/<id> is therefore
+cached per (version, id) once rendered, with a strong ETag computed from the
+bytes, so a repeat read costs one dict lookup: no SQLite query, no transform,
+no serialization. PENDING payments change when the settlement workers settle
+them, so their responses are never cached (see cached_payment_response).
+
+Writes that change a payment call invalidate(payment_id), which drops the
+entries of every version. A read that missed and raced with an invalidation
+does not store its (possibly stale) body: put() is ignored when an
+invalidation happened since the miss.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+CACHE_SIZE = 10_000         # rendered responses kept (all versions together)
+CACHE_CONTROL = 'public, max-age=86400'
+
+
+class ResponseCache:
+    """
+    Bounded LRU of (version, payment_id) -> (body, etag).
+
+    Args:
+        capacity: Maximum number of cached responses (0 disables the cache)
+    """
+
+    def __init__(self, capacity: int = CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: 'OrderedDict[Tuple[str, int], Tuple[bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.epoch = 0      # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, version: str, payment_id: int) -> Optional[Tuple[bytes, str]]:
+        """Return (body, etag) or None; a miss is counted."""
+        key = (version, payment_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, version: str, payment_id: int, body: bytes, epoch: int) -> Tuple[bytes, str]:
+        """
+        Cache a rendered body and return (body, etag).
+
+        Args:
+            epoch: Value of self.epoch read before the record was loaded; if an
+                   invalidation happened since, the body is returned but not cached
+        """
+        entry = (body, hashlib.sha256(body).hexdigest()[:32])
+        if not self.capacity:
+            return entry
+        with self._lock:
+            if epoch == self.epoch:
+                self._entries[(version, payment_id)] = entry
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, payment_id: int, versions: Tuple[Hashable, ...] = ('v1', 'v2')):
+        """Drop the cached responses of a payment, for every version."""
+        with self._lock:
+            self.epoch += 1
+            self.invalidations += 1
+            for version in versions:
+                self._entries.pop((version, payment_id), None)
+
+    def stats(self) -> Dict[str, float]:
+        """Cache metrics: hits, misses, hit_rate (0..1), size, capacity, invalidations."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'invalidations': self.invalidations
+            }
+
+    def clear(self):
+        """Drop cached responses and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.epoch += 1
+            self.hits = self.misses = self.invalidations = 0
+
+
+response_cache = ResponseCache(int(os.environ.get('RESPONSE_CACHE_SIZE', CACHE_SIZE)))
@@ -2,9 +2,39 @@
 Payment Service - Core business logic layer for payment operations.
 This service is version-agnostic and handles all database operations.
 """
-from typing import List, Dict, Any, Optional
-from core.database import get_db_connection
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable
+from core.database import get_db_connection, to_cents, PAYMENT_COLUMNS
+from core.tokenization import tokenizer
+from core.response_cache import response_cache
+from core.record_cache import record_cache
+import base64
 import hashlib
+import json
+import time
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+EXPORT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10_000
+BATCH_INSERT_ROWS = 500     # rows per multi-row INSERT ... RETURNING
+IN_CLAUSE_SIZE = 500        # parameters per IN (...) lookup
+MAX_LOOKUP_KEYS = 1000      # keys per batch lookup, answered by one IN (...) query
+LOOKUP_COLUMNS = ('transaction_id', 'payment_token')
+SUMMARY_GRANULARITIES = {
+    # granularity -> length of the 'YYYY-MM-DD HH:00:00' rollup hour kept as the period
+    'hour': 19,
+    'day': 10
+}
+
+PENDING_STATUS_CODE = 202   # payments with this code are queued for settlement
+
+# Adds payment_count / amount_cents deltas to an (hour, status) rollup row
+ROLLUP_UPSERT = '''
+    INSERT INTO payment_rollups (hour, status, payment_count, amount_cents) VALUES (?, ?, ?, ?)
+    ON CONFLICT (hour, status) DO UPDATE SET
+        payment_count = payment_count + excluded.payment_count,
+        amount_cents = amount_cents + excluded.amount_cents
+'''
 
 
 class PaymentService:
@@ -26,7 +56,163 @@ class PaymentService:
         
         # Convert Row objects to dictionaries
         return [dict(payment) for payment in payments]
-    
+
+    @staticmethod
+    def list_payments(limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                      status: Optional[str] = None, min_amount: Optional[float] = None,
+                      max_amount: Optional[float] = None, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None,
+                      payment_token: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieve one page of payments, newest first, using keyset pagination.
+
+        Pages are ordered by (created_at DESC, id DESC) and continue from the
+        position encoded in `cursor`, so deep pages cost the same as the first
+        one (no OFFSET scan) and rows inserted meanwhile never shift a page.
+
+        Args:
+            limit: Page size (1..MAX_PAGE_SIZE)
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            status: Only payments with this status (SUCCESS, PENDING, FAILED)
+            min_amount: Only payments with amount >= min_amount
+            max_amount: Only payments with amount <= max_amount
+            created_from: Only payments created at or after this timestamp
+            created_to: Only payments created at or before this timestamp
+            payment_token: Only payments made with this token
+
+        Returns:
+            {'items': [payment dicts], 'next_cursor': str or None}
+
+        Raises:
+            ValueError: If limit or cursor is invalid
+        """
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+        conditions, params = PaymentService._filter_conditions(
+            status, min_amount, max_amount, created_from, created_to, payment_token
+        )
+        if cursor is not None:
+            # Row-value comparison lets SQLite seek straight into the index
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend(PaymentService.decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        query = f'SELECT * FROM payments {where} ORDER BY created_at DESC, id DESC LIMIT ?'
+
+        conn = get_db_connection()
+        rows = conn.execute(query, (*params, limit + 1)).fetchall()
+        conn.close()
+
+        # One extra row tells us whether another page exists
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = PaymentService.encode_cursor(last['created_at'], last['id'])
+        return {'items': items, 'next_cursor': next_cursor}
+
+    @staticmethod
+    def iter_payments(status: Optional[str] = None, min_amount: Optional[float] = None,
+                      max_amount: Optional[float] = None, created_from: Optional[str] = None,
+                      created_to: Optional[str] = None, payment_token: Optional[str] = None,
+                      batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every matching payment as a dictionary, newest first.
+
+        Same as iter_payment_rows, with each row converted to a dict.
+        """
+        rows = PaymentService.iter_payment_rows(
+            status, min_amount, max_amount, created_from, created_to, payment_token, batch_size
+        )
+        for row in rows:
+            yield dict(zip(PAYMENT_COLUMNS, row))
+
+    @staticmethod
+    def iter_payment_rows(status: Optional[str] = None, min_amount: Optional[float] = None,
+                          max_amount: Optional[float] = None, created_from: Optional[str] = None,
+                          created_to: Optional[str] = None, payment_token: Optional[str] = None,
+                          batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+        """
+        Yield every matching payment, newest first, without loading them all.
+
+        Rows are pulled from the SQLite cursor batch_size at a time, so memory
+        stays constant however many rows match. Rows are plain tuples ordered
+        like PAYMENT_COLUMNS (no per-row dict), for bulk paths that map them
+        with a transformer's row mapper. The connection is closed when the
+        generator is exhausted or closed (e.g. the client disconnects).
+
+        Args:
+            Same filters as list_payments
+            batch_size: Rows fetched from the cursor per round trip
+
+        Yields:
+            Payment rows as tuples in PAYMENT_COLUMNS order
+        """
+        conditions, params = PaymentService._filter_conditions(
+            status, min_amount, max_amount, created_from, created_to, payment_token
+        )
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        query = (f"SELECT {', '.join(PAYMENT_COLUMNS)} FROM payments {where} "
+                 "ORDER BY created_at DESC, id DESC")
+
+        conn = get_db_connection()
+        conn.row_factory = None
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _filter_conditions(status: Optional[str], min_amount: Optional[float],
+                           max_amount: Optional[float], created_from: Optional[str],
+                           created_to: Optional[str],
+                           payment_token: Optional[str] = None) -> Tuple[List[str], List[Any]]:
+        """Build WHERE conditions and parameters for the list/export filters."""
+        conditions, params = [], []
+        if status is not None:
+            conditions.append('status = ?')
+            params.append(status.upper())
+        if min_amount is not None:
+            conditions.append('amount >= ?')
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append('amount <= ?')
+            params.append(max_amount)
+        if created_from is not None:
+            conditions.append('created_at >= ?')
+            params.append(created_from)
+        if created_to is not None:
+            conditions.append('created_at <= ?')
+            params.append(created_to)
+        if payment_token is not None:
+            conditions.append('payment_token = ?')
+            params.append(payment_token)
+        return conditions, params
+
+    @staticmethod
+    def encode_cursor(created_at: str, payment_id: int) -> str:
+        """Encode a (created_at, id) position as an opaque URL-safe cursor."""
+        raw = json.dumps([created_at, payment_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[str, int]:
+        """Decode a cursor from encode_cursor. Raises ValueError if it is malformed."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, payment_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError) as e:
+            raise ValueError('Invalid cursor') from e
+        if not isinstance(created_at, str) or not isinstance(payment_id, int):
+            raise ValueError('Invalid cursor')
+        return created_at, payment_id
+
     @staticmethod
     def get_payment_by_id(payment_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -45,6 +231,65 @@ class PaymentService:
         conn.close()
         
         return dict(payment) if payment else None
+
+    @staticmethod
+    def get_payment_by_transaction_id(transaction_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a payment by its transaction_id (unique index lookup).
+
+        Args:
+            transaction_id: Transaction ID of the payment (TXN-...)
+
+        Returns:
+            Payment record as dictionary, or None if not found
+        """
+        conn = get_db_connection()
+        payment = conn.execute('SELECT * FROM payments WHERE transaction_id = ?', (transaction_id,)).fetchone()
+        conn.close()
+
+        return dict(payment) if payment else None
+
+    @staticmethod
+    def lookup_payments(column: str, keys: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Retrieve the payments matching many transaction_ids or payment_tokens.
+
+        All keys are answered by a single indexed IN (...) query instead of
+        one request per key.
+
+        Args:
+            column: 'transaction_id' or 'payment_token'
+            keys: Up to MAX_LOOKUP_KEYS values of that column
+
+        Returns:
+            {key: [payment dicts, newest first]} for every key that matched;
+            a transaction_id matches at most one payment
+
+        Raises:
+            ValueError: If the column is not a lookup column or there are too many keys
+        """
+        if column not in LOOKUP_COLUMNS:
+            raise ValueError(f"Lookups are by one of: {', '.join(LOOKUP_COLUMNS)}")
+        keys = list(dict.fromkeys(keys))
+        if len(keys) > MAX_LOOKUP_KEYS:
+            raise ValueError(f"A lookup holds at most {MAX_LOOKUP_KEYS} keys")
+        if not keys:
+            return {}
+
+        conn = get_db_connection()
+        conn.row_factory = None
+        rows = conn.execute(
+            f"SELECT {', '.join(PAYMENT_COLUMNS)} FROM payments "
+            f"WHERE {column} IN ({', '.join('?' * len(keys))}) ORDER BY created_at DESC, id DESC",
+            keys
+        ).fetchall()
+        conn.close()
+
+        position = PAYMENT_COLUMNS.index(column)
+        found: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            found.setdefault(row[position], []).append(dict(zip(PAYMENT_COLUMNS, row)))
+        return found
     
     @staticmethod
     def create_payment(amount: float, card_number: Optional[str] = None, 
@@ -74,17 +319,153 @@ class PaymentService:
             INSERT INTO payments (transaction_id, amount, card_number, payment_token, status, status_code, code)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (transaction_id, amount, card_number, payment_token, status, status_code, status_code))
-        
-        conn.commit()
         payment_id = cursor.lastrowid
         
-        # Retrieve the created payment
+        # Retrieve the created payment and count it in the rollups, in the same transaction
         cursor.execute('SELECT * FROM payments WHERE id = ?', (payment_id,))
         payment = cursor.fetchone()
+        PaymentService._apply_rollups(conn, [payment])
+        if status_code == PENDING_STATUS_CODE:
+            PaymentService._enqueue_settlements(conn, [payment_id])
+        conn.commit()
         conn.close()
         
         return dict(payment)
     
+    @staticmethod
+    def create_payments_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create many payments in a single transaction.
+
+        New rows are inserted with multi-row INSERT ... RETURNING statements
+        (BATCH_INSERT_ROWS rows each) instead of one INSERT, commit and
+        re-SELECT per payment. Items carrying an idempotency_key that was
+        already used (by an earlier batch or earlier in this one) are not
+        inserted again: they resolve to the payment created the first time.
+        The write lock is taken up front (BEGIN IMMEDIATE), so two concurrent
+        retries of the same batch cannot both insert.
+
+        Args:
+            items: Payments in internal format (amount, card_number,
+                   payment_token, status), each with an optional
+                   idempotency_key
+
+        Returns:
+            One result per item, in order:
+            {'result': 'created' | 'duplicate' | 'conflict', 'payment': dict or None}
+            'conflict' means the key was used before for a different payload.
+
+        Raises:
+            ValueError: If the batch holds more than MAX_BATCH_SIZE items
+        """
+        if len(items) > MAX_BATCH_SIZE:
+            raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} payments")
+
+        conn = get_db_connection()
+        conn.row_factory = None
+        conn.isolation_level = None     # explicit BEGIN / COMMIT below
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            keys = [item['idempotency_key'] for item in items if item.get('idempotency_key')]
+            known = {
+                key: (payment_id, fingerprint)
+                for key, payment_id, fingerprint in PaymentService._select_in(
+                    conn, 'SELECT idempotency_key, payment_id, fingerprint FROM idempotency_keys '
+                          'WHERE idempotency_key IN ({})', keys
+                )
+            }
+
+            results, new_rows, new_keys = [], [], []
+            batch_keys = {}     # key -> (index of the new row, fingerprint)
+            for item in items:
+                key = item.get('idempotency_key')
+                status = item.get('status', 'SUCCESS')
+                status_code = PaymentService._get_status_code(status)
+                # float(): RETURNING echoes the bound value, not the REAL stored
+                values = (float(item['amount']), item.get('card_number'), item.get('payment_token'),
+                          status, status_code, status_code)
+                fingerprint = PaymentService._fingerprint(values) if key else None
+                # Each result: (result, id of an existing payment, index of a new row)
+                if key in known:
+                    payment_id, used_fingerprint = known[key]
+                    result = 'duplicate' if used_fingerprint == fingerprint else 'conflict'
+                    results.append((result, payment_id, None))
+                    continue
+                if key in batch_keys:
+                    row_index, used_fingerprint = batch_keys[key]
+                    result = 'duplicate' if used_fingerprint == fingerprint else 'conflict'
+                    results.append((result, None, row_index))
+                    continue
+                transaction_id = PaymentService._generate_transaction_id()
+                if key:
+                    batch_keys[key] = (len(new_rows), fingerprint)
+                    new_keys.append((key, transaction_id, fingerprint))
+                results.append(('created', None, len(new_rows)))
+                new_rows.append((transaction_id, *values))
+
+            # Insert new rows; RETURNING order is unspecified, so rows are
+            # matched back by their (unique) transaction_id
+            created = {}
+            for start in range(0, len(new_rows), BATCH_INSERT_ROWS):
+                chunk = new_rows[start:start + BATCH_INSERT_ROWS]
+                placeholders = ', '.join(['(?, ?, ?, ?, ?, ?, ?)'] * len(chunk))
+                returned = conn.execute(
+                    'INSERT INTO payments (transaction_id, amount, card_number, payment_token, '
+                    f'status, status_code, code) VALUES {placeholders} '
+                    f"RETURNING {', '.join(PAYMENT_COLUMNS)}",
+                    [value for row in chunk for value in row]
+                ).fetchall()
+                for row in returned:
+                    created[row[1]] = dict(zip(PAYMENT_COLUMNS, row))
+            PaymentService._apply_rollups(conn, created.values())
+            PaymentService._enqueue_settlements(conn, [
+                payment['id'] for payment in created.values() if payment['status_code'] == PENDING_STATUS_CODE
+            ])
+
+            conn.executemany(
+                'INSERT INTO idempotency_keys (idempotency_key, payment_id, fingerprint) VALUES (?, ?, ?)',
+                [(key, created[transaction_id]['id'], fingerprint)
+                 for key, transaction_id, fingerprint in new_keys]
+            )
+
+            existing_ids = [payment_id for _, payment_id, _ in results if payment_id is not None]
+            existing = {
+                row[0]: dict(zip(PAYMENT_COLUMNS, row))
+                for row in PaymentService._select_in(
+                    conn, f"SELECT {', '.join(PAYMENT_COLUMNS)} FROM payments WHERE id IN ({{}})",
+                    existing_ids
+                )
+            }
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+        output = []
+        for result, payment_id, row_index in results:
+            if row_index is not None:
+                payment = created[new_rows[row_index][0]]
+            else:
+                payment = existing.get(payment_id)     # None if deleted since
+            output.append({'result': result, 'payment': payment if result != 'conflict' else None})
+        return output
+
+    @staticmethod
+    def _select_in(conn, query: str, values: List[Any]) -> Iterator[tuple]:
+        """Run `query` (with one IN ({}) placeholder) over values, IN_CLAUSE_SIZE at a time."""
+        values = list(dict.fromkeys(values))
+        for start in range(0, len(values), IN_CLAUSE_SIZE):
+            chunk = values[start:start + IN_CLAUSE_SIZE]
+            yield from conn.execute(query.format(', '.join('?' * len(chunk))), chunk)
+
+    @staticmethod
+    def _fingerprint(values: tuple) -> str:
+        """Short hash of a payment's stored values, to detect a key reused for another payload."""
+        return hashlib.sha256(json.dumps(values).encode()).hexdigest()[:16]
+
     @staticmethod
     def delete_payment(payment_id: int) -> bool:
         """
@@ -100,22 +481,112 @@ class PaymentService:
         cursor = conn.cursor()
         
         # Check if payment exists
-        cursor.execute('SELECT id FROM payments WHERE id = ?', (payment_id,))
-        if cursor.fetchone() is None:
+        cursor.execute('SELECT created_at, status, amount FROM payments WHERE id = ?', (payment_id,))
+        payment = cursor.fetchone()
+        if payment is None:
             conn.close()
             return False
         
-        # Delete the payment
+        # Delete the payment and take it out of the rollups
         cursor.execute('DELETE FROM payments WHERE id = ?', (payment_id,))
+        PaymentService._apply_rollups(conn, [payment], sign=-1)
+        cursor.execute('DELETE FROM settlement_jobs WHERE payment_id = ?', (payment_id,))
         conn.commit()
         conn.close()
+        response_cache.invalidate(payment_id)
+        record_cache.invalidate(payment_id)
         
         return True
     
+    @staticmethod
+    def _apply_rollups(conn, payments: Iterable[Any], sign: int = 1):
+        """
+        Add (sign=1) or remove (sign=-1) payments from payment_rollups.
+
+        Runs on the caller's connection, inside the transaction that inserts
+        or deletes the payments, so rollups and payments commit together.
+        Deltas are summed per (hour, status) first: a batch costs one upsert
+        per hour and status, not one per payment.
+
+        Args:
+            conn: Connection holding the write transaction
+            payments: Rows or dicts with created_at, status and amount
+        """
+        deltas: Dict[Tuple[str, str], List[int]] = {}
+        for payment in payments:
+            # created_at is 'YYYY-MM-DD HH:MM:SS'; the rollup hour keeps 'YYYY-MM-DD HH'
+            key = (f"{payment['created_at'][:13]}:00:00", payment['status'])
+            delta = deltas.setdefault(key, [0, 0])
+            delta[0] += sign
+            delta[1] += sign * to_cents(payment['amount'])
+        conn.executemany(ROLLUP_UPSERT, [(*key, count, cents) for key, (count, cents) in deltas.items()])
+        if sign < 0:
+            conn.executemany('DELETE FROM payment_rollups WHERE hour = ? AND status = ? AND payment_count <= 0',
+                             list(deltas))
+
+    @staticmethod
+    def _enqueue_settlements(conn, payment_ids: List[int]):
+        """Queue PENDING payments for the settlement workers, in the caller's transaction."""
+        now = time.time()
+        conn.executemany(
+            'INSERT OR IGNORE INTO settlement_jobs (payment_id, available_at) VALUES (?, ?)',
+            [(payment_id, now) for payment_id in payment_ids]
+        )
+
+    @staticmethod
+    def get_summary(created_from: Optional[str] = None, created_to: Optional[str] = None,
+                    granularity: str = 'day') -> List[Dict[str, Any]]:
+        """
+        Payment count and total amount per period and status, from payment_rollups.
+
+        Reads one rollup row per hour and status in the range, so the cost
+        depends on the range, not on how many payments there are. Bounds are
+        applied to whole hours: the hours containing created_from and
+        created_to are both included.
+
+        Args:
+            created_from: Start timestamp ('YYYY-MM-DD HH:MM:SS'), inclusive
+            created_to: End timestamp ('YYYY-MM-DD HH:MM:SS'), inclusive
+            granularity: 'day' or 'hour'
+
+        Returns:
+            [{'period': str, 'status': str, 'count': int, 'amount_cents': int}],
+            ordered by period then status; periods without payments are omitted
+
+        Raises:
+            ValueError: If granularity is not supported
+        """
+        if granularity not in SUMMARY_GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(SUMMARY_GRANULARITIES)}")
+
+        conditions, params = [], []
+        if created_from is not None:
+            conditions.append('hour >= ?')
+            params.append(f"{created_from[:13]}:00:00")
+        if created_to is not None:
+            conditions.append('hour <= ?')
+            params.append(created_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        conn = get_db_connection()
+        conn.row_factory = None
+        rows = conn.execute(
+            f"SELECT substr(hour, 1, {SUMMARY_GRANULARITIES[granularity]}) AS period, status, "
+            f"SUM(payment_count), SUM(amount_cents) FROM payment_rollups {where} "
+            "GROUP BY period, status ORDER BY period, status",
+            params
+        ).fetchall()
+        conn.close()
+
+        return [
+            {'period': period, 'status': status, 'count': count, 'amount_cents': cents}
+            for period, status, count, cents in rows
+        ]
+
     @staticmethod
     def generate_payment_token(card_number: str) -> str:
         """
-        Generate a secure payment token from card number using SHA256.
+        Generate a secure payment token from card number (keyed HMAC, memoized).
         
         Args:
             card_number: Card number to tokenize
@@ -123,14 +594,7 @@ class PaymentService:
         Returns:
             Payment token string (format: TOK-XXXXXXXXXXXX)
         """
-        # Remove dashes and spaces
-        card_clean = card_number.replace('-', '').replace(' ', '')
-        
-        # Generate SHA256 hash
-        hash_obj = hashlib.sha256(card_clean.encode())
-        token = hash_obj.hexdigest()[:12].upper()
-        
-        return f"TOK-{token}"
+        return tokenizer.tokenize(card_number)
     
     @staticmethod
     def _generate_transaction_id() -> str:
@@ -0,0 +1,340 @@
+"""
+Settlement pipeline for PENDING payments.
+
+Creating a payment with status_code 202 queues it in settlement_jobs, in the
+same transaction as the insert (PaymentService._enqueue_settlements), so the
+queue survives restarts. A pool of worker threads then loops:
+
+    claim    take up to batch_size due jobs (one UPDATE ... RETURNING under
+             BEGIN IMMEDIATE, so two workers never claim the same job)
+    settle   hand the payments to the processor in one call
+    complete write every outcome in one transaction: one UPDATE per new
+             status, rollups moved from PENDING to the new status, jobs
+             deleted, unanswered jobs re-queued with backoff
+
+A claim is a lease: jobs of a worker that died are claimed again after
+LEASE_SECONDS. Transitions only apply to payments still at status_code 202,
+so settling a payment twice is harmless.
+
+Processors are pluggable (SettlementProcessor); FakeProcessor settles
+locally for development and tests.
+
+Run workers in their own process:
+    python -m core.settlement [--workers 4] [--batch-size 100] [--failure-rate 0.1]
+"""
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from core.database import PAYMENT_COLUMNS, get_db_connection
+from core.service import IN_CLAUSE_SIZE, PENDING_STATUS_CODE, PaymentService
+
+WORKERS = 4
+BATCH_SIZE = 100
+POLL_INTERVAL = 0.1         # seconds an idle worker sleeps before claiming again
+LEASE_SECONDS = 60          # claimed jobs not completed by then are claimed again
+MAX_ATTEMPTS = 5            # after that, a job is parked as 'failed' (payment stays PENDING)
+RETRY_BACKOFF = 2.0         # seconds before retry n is due: RETRY_BACKOFF * 2 ** (n - 1)
+MAX_WAIT = 30               # longest long-poll (?wait=) in seconds
+WAIT_POLL_INTERVAL = 0.5    # long-polls re-read the payment at least this often
+SETTLED_STATUSES = {'SUCCESS': 200, 'FAILED': 400}
+
+# Notified after every completed batch, to wake up long-polls in this process
+# (long-polls served by another process fall back to WAIT_POLL_INTERVAL)
+_settled = threading.Condition()
+
+
+class SettlementProcessor(ABC):
+    """Settles PENDING payments with the acquirer / payment provider."""
+
+    @abstractmethod
+    def settle(self, payments: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Settle a batch of payments.
+
+        Args:
+            payments: Payment records (PAYMENT_COLUMNS keys)
+
+        Returns:
+            {payment_id: 'SUCCESS' | 'FAILED'}; payments left out are retried
+            later, and raising retries the whole batch
+        """
+        pass
+
+
+class FakeProcessor(SettlementProcessor):
+    """
+    Local processor for development and tests.
+
+    Args:
+        failure_rate: Share of payments settled as FAILED (chosen from the id,
+                      so the outcome of a payment is the same on every run)
+        latency: Seconds each settle() call takes, like a round trip to a provider
+    """
+
+    def __init__(self, failure_rate: float = 0.0, latency: float = 0.0):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.calls = 0
+
+    def settle(self, payments: List[Dict[str, Any]]) -> Dict[int, str]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            payment['id']: 'FAILED' if (payment['id'] * 2654435761) % 10_000 < self.failure_rate * 10_000 else 'SUCCESS'
+            for payment in payments
+        }
+
+
+def claim_jobs(worker_id: str, limit: int = BATCH_SIZE, lease: float = LEASE_SECONDS) -> List[Dict[str, Any]]:
+    """
+    Claim up to `limit` due jobs for worker_id and return their payments.
+
+    Due jobs are queued ones whose backoff has passed and claimed ones whose
+    lease expired. Jobs of payments deleted meanwhile are dropped.
+    """
+    now = time.time()
+    conn = get_db_connection()
+    conn.row_factory = None
+    conn.isolation_level = None     # explicit BEGIN / COMMIT below
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        claimed = [row[0] for row in conn.execute('''
+            UPDATE settlement_jobs
+            SET state = 'claimed', claimed_by = ?, claimed_at = ?, attempts = attempts + 1
+            WHERE payment_id IN (
+                SELECT payment_id FROM settlement_jobs
+                WHERE (state = 'queued' AND available_at <= ?) OR (state = 'claimed' AND claimed_at <= ?)
+                ORDER BY available_at
+                LIMIT ?
+            )
+            RETURNING payment_id
+        ''', (worker_id, now, now, now - lease, limit)).fetchall()]
+        payments = [
+            dict(zip(PAYMENT_COLUMNS, row))
+            for row in PaymentService._select_in(
+                conn, f"SELECT {', '.join(PAYMENT_COLUMNS)} FROM payments WHERE id IN ({{}})", claimed
+            )
+        ]
+        missing = set(claimed) - {payment['id'] for payment in payments}
+        conn.executemany('DELETE FROM settlement_jobs WHERE payment_id = ?', [(i,) for i in missing])
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+    return payments
+
+
+def complete_jobs(payments: List[Dict[str, Any]], outcomes: Dict[int, str],
+                  error: Optional[str] = None) -> Dict[str, int]:
+    """
+    Record the outcome of a claimed batch in one transaction.
+
+    Payments are moved to their new status in bulk (one UPDATE per status),
+    their amounts moved between rollups, and their jobs deleted. Jobs without
+    an outcome go back to the queue with exponential backoff, or are parked
+    as 'failed' after MAX_ATTEMPTS.
+
+    Returns:
+        {'settled': n, 'retried': n, 'parked': n}
+    """
+    by_status: Dict[str, List[int]] = {}
+    for payment_id, status in outcomes.items():
+        if status not in SETTLED_STATUSES:
+            raise ValueError(f"Settlement outcome must be one of: {', '.join(SETTLED_STATUSES)}")
+        by_status.setdefault(status, []).append(payment_id)
+    unanswered = [payment['id'] for payment in payments if payment['id'] not in outcomes]
+
+    now = time.time()
+    conn = get_db_connection()
+    conn.isolation_level = None     # explicit BEGIN / COMMIT below
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        settled = []
+        for status, ids in by_status.items():
+            code = SETTLED_STATUSES[status]
+            # Only payments still PENDING move: a job settled twice changes nothing the second time
+            rows = list(PaymentService._select_in(
+                conn, 'SELECT id, created_at, status, amount FROM payments '
+                      f'WHERE status_code = {PENDING_STATUS_CODE} AND id IN ({{}})', ids
+            ))
+            if not rows:
+                continue
+            moved = [row['id'] for row in rows]
+            for start in range(0, len(moved), IN_CLAUSE_SIZE):
+                chunk = moved[start:start + IN_CLAUSE_SIZE]
+                conn.execute(
+                    f"UPDATE payments SET status = ?, status_code = ?, code = ? WHERE id IN ({', '.join('?' * len(chunk))})",
+                    (status, code, code, *chunk)
+                )
+            PaymentService._apply_rollups(conn, rows, sign=-1)
+            PaymentService._apply_rollups(conn, [{**dict(row), 'status': status} for row in rows])
+            settled.extend(moved)
+        conn.executemany('DELETE FROM settlement_jobs WHERE payment_id = ?', [(i,) for i in outcomes])
+
+        attempts = dict(PaymentService._select_in(
+            conn, 'SELECT payment_id, attempts FROM settlement_jobs WHERE payment_id IN ({})', unanswered
+        )) if unanswered else {}
+        parked = [i for i, n in attempts.items() if n >= MAX_ATTEMPTS]
+        conn.executemany(
+            "UPDATE settlement_jobs SET state = 'failed', claimed_by = NULL, last_error = ? WHERE payment_id = ?",
+            [(error or 'No outcome from the processor', i) for i in parked]
+        )
+        conn.executemany(
+            "UPDATE settlement_jobs SET state = 'queued', claimed_by = NULL, available_at = ?, last_error = ? "
+            "WHERE payment_id = ?",
+            [(now + RETRY_BACKOFF * 2 ** (n - 1), error, i) for i, n in attempts.items() if n < MAX_ATTEMPTS]
+        )
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    # Nothing to invalidate: PENDING records and their responses are never cached
+    with _settled:
+        _settled.notify_all()
+    return {'settled': len(settled), 'retried': len(attempts) - len(parked), 'parked': len(parked)}
+
+
+def queue_stats() -> Dict[str, int]:
+    """Number of jobs per state: queued, claimed, failed."""
+    conn = get_db_connection()
+    counts = dict(conn.execute('SELECT state, COUNT(*) FROM settlement_jobs GROUP BY state').fetchall())
+    conn.close()
+    return {state: counts.get(state, 0) for state in ('queued', 'claimed', 'failed')}
+
+
+def wait_for_settlement(payment_id: int, timeout: float) -> Optional[Dict[str, Any]]:
+    """
+    Long-poll: wait up to `timeout` seconds for a PENDING payment to settle.
+
+    Returns:
+        The payment once it is no longer PENDING, or as it is when the
+        timeout expires; None if it does not exist (or was deleted)
+    """
+    deadline = time.monotonic() + min(timeout, MAX_WAIT)
+    while True:
+        payment = PaymentService.get_payment_by_id(payment_id)
+        remaining = deadline - time.monotonic()
+        if payment is None or payment['status_code'] != PENDING_STATUS_CODE or remaining <= 0:
+            return payment
+        with _settled:
+            _settled.wait(min(remaining, WAIT_POLL_INTERVAL))
+
+
+class SettlementWorkerPool:
+    """
+    Worker threads settling queued payments in batches.
+
+    Args:
+        processor: SettlementProcessor used by every worker
+        workers: Number of worker threads
+        batch_size: Jobs claimed (and sent to the processor) per batch
+    """
+
+    def __init__(self, processor: SettlementProcessor, workers: int = WORKERS,
+                 batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL):
+        self.processor = processor
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.name = f"settlement-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.totals = {'batches': 0, 'settled': 0, 'retried': 0, 'parked': 0, 'errors': 0}
+
+    def run_once(self, worker_id: str) -> int:
+        """Claim, settle and complete one batch. Returns the number of jobs claimed."""
+        payments = claim_jobs(worker_id, self.batch_size)
+        if not payments:
+            return 0
+        try:
+            outcomes, error = self.processor.settle(payments), None
+        except Exception as e:
+            outcomes, error = {}, f'{type(e).__name__}: {e}'
+        claimed = {payment['id'] for payment in payments}
+        outcomes = {payment_id: status for payment_id, status in outcomes.items() if payment_id in claimed}
+        result = complete_jobs(payments, outcomes, error)
+        with self._lock:
+            self.totals['batches'] += 1
+            self.totals['errors'] += error is not None
+            for key, count in result.items():
+                self.totals[key] += count
+        return len(payments)
+
+    def _run(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once(worker_id)
+            except Exception:
+                # e.g. the database is briefly locked: back off, the lease covers claimed jobs
+                with self._lock:
+                    self.totals['errors'] += 1
+                claimed = 0
+            if not claimed:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start the worker threads (daemon threads: they do not block interpreter exit)."""
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, args=(f"{self.name}-{i}",), name=f"{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the workers after their current batch."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self, timeout: float = 60.0) -> bool:
+        """Wait until no job is queued or claimed; False if the timeout expired first."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            stats = queue_stats()
+            if not stats['queued'] and not stats['claimed']:
+                return True
+            time.sleep(self.poll_interval)
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker count, batch totals and queue depth."""
+        with self._lock:
+            totals = dict(self.totals)
+        return {'workers': len(self._threads), **totals, 'queue': queue_stats()}
+
+
+if __name__ == '__main__':
+    import argparse
+    from core.database import init_db
+
+    parser = argparse.ArgumentParser(description='Run settlement workers with the local FakeProcessor')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    init_db()
+    pool = SettlementWorkerPool(FakeProcessor(args.failure_rate), args.workers, args.batch_size)
+    pool.start()
+    print(f"⚙️  {args.workers} settlement workers running (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(pool.stats())
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,10 @@
+"""
+Payment tokenization for AdapterTransformer.
+Backed by the shared keyed, memoized tokenizer (apiversioning/shared); tokens
+keep this project's format: TOK- followed by 12 hex characters.
+"""
+from shared.tokenization import get_tokenizer
+
+TOKEN_LENGTH = 12
+
+tokenizer = get_tokenizer(TOKEN_LENGTH)
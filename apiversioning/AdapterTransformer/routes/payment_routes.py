@@ -2,20 +2,39 @@
 Unified Payment Routes - Single set of routes handling multiple API versions.
 Uses Adapter pattern to delegate version-specific logic.
 """
-from flask import Blueprint, request, jsonify
-from typing import Type
+from flask import Blueprint, Response, request, jsonify, make_response, stream_with_context
+from datetime import datetime
+from typing import Type, Dict, Any, List, Optional, Iterator, Tuple
+from collections import Counter
+import json
 from adapters.v1_adapter import V1Adapter
 from adapters.v2_adapter import V2Adapter
-from core.service import PaymentService
+from core.service import PaymentService, DEFAULT_PAGE_SIZE, MAX_BATCH_SIZE, MAX_LOOKUP_KEYS, PENDING_STATUS_CODE
+from core.settlement import MAX_WAIT, wait_for_settlement
+from core.database import PAYMENT_COLUMNS
+from core.response_cache import response_cache, CACHE_CONTROL
+from core.record_cache import record_cache
 
 
 # Create unified blueprint
 unified_bp = Blueprint('unified', __name__, url_prefix='/api')
 
 
+# Adapters are stateless, so one instance per version is built at import
+# time and shared by every request (and thread)
+ADAPTERS = {
+    'v1': V1Adapter(),
+    'v2': V2Adapter()
+}
+
+# Compile the tuple-row mappers used by exports up front
+for _adapter in ADAPTERS.values():
+    _adapter.transformer.row_mapper(PAYMENT_COLUMNS)
+
+
 def get_adapter(version: str):
     """
-    Factory function to get the appropriate adapter for the API version.
+    Return the shared adapter for the API version.
     
     Args:
         version: API version string ('v1' or 'v2')
@@ -26,16 +45,309 @@ def get_adapter(version: str):
     Raises:
         ValueError: If version is not supported
     """
-    adapters = {
-        'v1': V1Adapter,
-        'v2': V2Adapter
-    }
-    
-    adapter_class = adapters.get(version)
-    if not adapter_class:
+    adapter = ADAPTERS.get(version)
+    if not adapter:
         raise ValueError(f"Unsupported API version: {version}")
     
-    return adapter_class()
+    return adapter
+
+
+def _parse_amount(value: Optional[str], name: str) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def _parse_timestamp(value: Optional[str], name: str, end_of_day: bool = False) -> Optional[str]:
+    """Normalize an ISO date/datetime to the 'YYYY-MM-DD HH:MM:SS' format of created_at."""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO date (YYYY-MM-DD) or datetime")
+    if end_of_day and len(value) == 10:
+        # A bare date as upper bound includes the whole day
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def parse_list_params(args) -> Dict[str, Any]:
+    """
+    Parse list query parameters shared by v1 and v2.
+
+    Query parameters: limit, cursor, status, min_amount, max_amount,
+    from, to (ISO date or datetime, both inclusive), payment_token.
+
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return {
+        'limit': limit,
+        'cursor': args.get('cursor'),
+        'status': args.get('status'),
+        'min_amount': _parse_amount(args.get('min_amount'), 'min_amount'),
+        'max_amount': _parse_amount(args.get('max_amount'), 'max_amount'),
+        'created_from': _parse_timestamp(args.get('from'), 'from'),
+        'created_to': _parse_timestamp(args.get('to'), 'to', end_of_day=True),
+        'payment_token': args.get('payment_token'),
+    }
+
+
+def parse_summary_params(args) -> Dict[str, Any]:
+    """
+    Parse summary query parameters shared by v1 and v2:
+    from, to (ISO date or datetime, both inclusive), granularity (day | hour).
+
+    Raises:
+        ValueError: If a parameter is malformed
+    """
+    return {
+        'created_from': _parse_timestamp(args.get('from'), 'from'),
+        'created_to': _parse_timestamp(args.get('to'), 'to', end_of_day=True),
+        'granularity': args.get('granularity', 'day'),
+    }
+
+
+EXPORT_CHUNK_RECORDS = 500
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def parse_export_params(args) -> Dict[str, Any]:
+    """Export takes the list filters but neither limit nor cursor."""
+    params = parse_list_params(args)
+    del params['limit'], params['cursor']
+    return params
+
+
+def stream_export(adapter, args) -> Response:
+    """
+    Stream every matching payment as a JSON array or NDJSON (?format=ndjson).
+
+    Rows flow service → transformer → response one at a time; without a
+    Content-Length Werkzeug sends the body with chunked encoding.
+
+    Raises:
+        ValueError: If a filter or the format is invalid (checked before streaming)
+    """
+    fmt = args.get('format', 'json')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    records = adapter.transform_rows(
+        PaymentService.iter_payment_rows(**parse_export_params(args)), PAYMENT_COLUMNS
+    )
+
+    def generate() -> Iterator[str]:
+        # Group records into chunks: one tiny write per row costs more than
+        # the serialization itself, a few hundred rows per chunk stays small
+        if fmt == 'ndjson':
+            prefix, separator, suffix = '', '\n', '\n'
+        else:
+            prefix, separator, suffix = '[', ',', ']'
+        yield prefix
+        chunk, written = [], 0
+        for record in records:
+            chunk.append(json.dumps(record))
+            if len(chunk) >= EXPORT_CHUNK_RECORDS:
+                yield (separator if written else '') + separator.join(chunk)
+                written += len(chunk)
+                chunk = []
+        if chunk:
+            yield (separator if written else '') + separator.join(chunk)
+            written += len(chunk)
+        if written or fmt == 'json':
+            yield suffix
+
+    return Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[fmt])
+
+
+def parse_wait(args) -> float:
+    """Seconds a read may wait for a PENDING payment to settle (?wait=, 0..MAX_WAIT)."""
+    try:
+        wait = float(args.get('wait', 0))
+    except ValueError:
+        raise ValueError("wait must be a number of seconds")
+    if not 0 <= wait <= MAX_WAIT:
+        raise ValueError(f"wait must be between 0 and {MAX_WAIT} seconds")
+    return wait
+
+
+def cached_payment_response(version: str, payment_id: int, render, wait: float = 0) -> Response:
+    """
+    Serve a single-payment read from the rendered-response cache.
+
+    On a miss, the payment is read through the record cache (shared by every
+    version), projected to `version` (memoized on the cached record) and
+    render(projection) builds the response as usual (projection is None if the
+    payment does not exist). With wait > 0, a PENDING payment is long-polled
+    until it settles or `wait` seconds pass.
+
+    A 200 body of a settled payment is cached under (version, payment_id);
+    cached responses carry a strong ETag and a long Cache-Control, and a
+    matching If-None-Match is answered with 304 Not Modified. A PENDING
+    payment is about to change, so its response is not cached here and is
+    sent with Cache-Control: no-cache (clients revalidate with its ETag).
+    """
+    entry = response_cache.get(version, payment_id)
+    if entry is None:
+        epoch = response_cache.epoch
+        payment = record_cache.get(payment_id)
+        if payment is None:
+            record_epoch = record_cache.epoch
+            payment = PaymentService.get_payment_by_id(payment_id)
+            if wait and payment and payment['status_code'] == PENDING_STATUS_CODE:
+                payment = wait_for_settlement(payment_id, wait)
+            if payment and payment['status_code'] != PENDING_STATUS_CODE:
+                payment = record_cache.put(payment, record_epoch)
+        projection = (record_cache.project(payment, version, get_adapter(version).transform_response)
+                      if payment else None)
+        response = make_response(render(projection))
+        if response.status_code != 200:
+            return response
+        if payment['status_code'] == PENDING_STATUS_CODE:
+            response.add_etag()
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+        entry = response_cache.put(version, payment_id, response.get_data(), epoch)
+    body, etag = entry
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+BATCH_RESULTS = ('created', 'duplicate', 'conflict', 'invalid')
+
+
+def _batch_item_error(item: Any, required: Tuple[str, ...], any_of: Tuple[str, ...] = ()) -> Optional[str]:
+    """Validate one batch item; returns an error message or None."""
+    if not isinstance(item, dict):
+        return 'Each item must be an object'
+    missing = [field for field in required if field not in item]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    if any_of and not any(item.get(field) for field in any_of):
+        return f"Either {' or '.join(any_of)} is required"
+    amount = item['amount']
+    if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+        return 'amount must be a number'
+    for field in ('card_number', 'payment_token', 'status', 'idempotency_key'):
+        if item.get(field) is not None and not isinstance(item[field], str):
+            return f"{field} must be a string"
+    return None
+
+
+def create_batch(adapter, body: Any, collection: str, required: Tuple[str, ...],
+                 any_of: Tuple[str, ...] = (),
+                 idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], int, Optional[str]]:
+    """
+    Validate, transform and insert a batch of payments in one transaction.
+
+    Request body: {"<collection>": [item, ...]}. Invalid items are reported
+    and skipped; the others are inserted together. Each item may carry its
+    own idempotency_key; otherwise, if the request has an Idempotency-Key
+    header, item i gets "<header>:<i>", so retrying the same batch with the
+    same header returns the payments created the first time.
+
+    Returns:
+        (data, http_status, deprecation_warning) where data is
+        {"summary": {result: count}, "results": [{"index", "result", "data", "error"?}]}
+        and http_status is 201 if anything was created, else 200
+
+    Raises:
+        ValueError: If the body is not a non-empty list of at most MAX_BATCH_SIZE items
+    """
+    items = body.get(collection) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError(f"Request body must be {{\"{collection}\": [...]}} with at least one item")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch holds at most {MAX_BATCH_SIZE} items")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    positions = []
+    for index, item in enumerate(items):
+        error = _batch_item_error(item, required, any_of)
+        if error:
+            results[index] = {'index': index, 'result': 'invalid', 'data': None, 'error': error}
+        else:
+            positions.append(index)
+
+    valid = adapter.transform_request_list([items[index] for index in positions])
+    deprecation_warning = None
+    for index, transformed in zip(positions, valid):
+        deprecation_warning = transformed.pop('_deprecation_warning', None) or deprecation_warning
+        transformed['idempotency_key'] = items[index].get('idempotency_key') or (
+            f"{idempotency_key}:{index}" if idempotency_key else None
+        )
+
+    outcomes = PaymentService.create_payments_batch(valid) if valid else []
+    for index, outcome in zip(positions, outcomes):
+        results[index] = {
+            'index': index,
+            'result': outcome['result'],
+            'data': adapter.transform_response(outcome['payment'])
+        }
+        if outcome['result'] == 'conflict':
+            results[index]['error'] = 'Idempotency key already used for a different payment'
+
+    counts = Counter(result['result'] for result in results)
+    summary = {name: counts[name] for name in BATCH_RESULTS}
+    status = 201 if summary['created'] else 200
+    return {'summary': summary, 'results': results}, status, deprecation_warning
+
+
+def lookup_batch(adapter, body: Any, collection: str, column: str) -> Dict[str, Any]:
+    """
+    Look up many payments by transaction_id or payment_token in one query.
+
+    Request body: {"<collection>": [key, ...]} with at most MAX_LOOKUP_KEYS keys.
+    A transaction_id resolves to one payment (or None), a payment_token to
+    every payment made with it (possibly none).
+
+    Returns:
+        {"summary": {"found", "missing"}, "results": [{"<column>": key, "data": ...}]}
+        with one result per distinct key, in request order
+
+    Raises:
+        ValueError: If the body is not a non-empty list of at most MAX_LOOKUP_KEYS strings
+    """
+    keys = body.get(collection) if isinstance(body, dict) else None
+    if not isinstance(keys, list) or not keys:
+        raise ValueError(f"Request body must be {{\"{collection}\": [...]}} with at least one key")
+    if not all(isinstance(key, str) for key in keys):
+        raise ValueError(f"{collection} must be strings")
+    keys = list(dict.fromkeys(keys))
+    if len(keys) > MAX_LOOKUP_KEYS:
+        raise ValueError(f"A lookup holds at most {MAX_LOOKUP_KEYS} keys")
+
+    found = PaymentService.lookup_payments(column, keys)
+    unique = column == 'transaction_id'
+    results = []
+    for key in keys:
+        payments = found.get(key, [])
+        if unique:
+            data = adapter.transform_response(payments[0]) if payments else None
+        else:
+            data = adapter.transform_response_list(payments)
+        results.append({column: key, 'data': data})
+    return {
+        'summary': {'found': sum(1 for key in keys if key in found),
+                    'missing': sum(1 for key in keys if key not in found)},
+        'results': results
+    }
 
 
 # ============================================================================
@@ -44,17 +356,25 @@ def get_adapter(version: str):
 
 @unified_bp.route('/v1/payments', methods=['GET'])
 def get_all_payments_v1():
-    """GET /api/v1/payments - Retrieve all payments (V1 format)"""
+    """GET /api/v1/payments - Retrieve one page of payments (V1 format)"""
     try:
         adapter = get_adapter('v1')
-        payments = PaymentService.get_all_payments()
-        transformed = adapter.transform_response_list(payments)
+        page = PaymentService.list_payments(**parse_list_params(request.args))
+        transformed = adapter.transform_response_list(page['items'])
         
-        return jsonify(adapter.format_success_response(
+        return jsonify(adapter.format_list_response(
             data=transformed,
-            message='Payments retrieved successfully'
+            message='Payments retrieved successfully',
+            next_cursor=page['next_cursor'],
+            query=request.args.to_dict()
         )), 200
         
+    except ValueError as e:
+        adapter = get_adapter('v1')
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            status_code=400
+        )), 400
     except Exception as e:
         adapter = get_adapter('v1')
         return jsonify(adapter.format_error_response(
@@ -63,25 +383,148 @@ def get_all_payments_v1():
         )), 500
 
 
-@unified_bp.route('/v1/payments/<int:payment_id>', methods=['GET'])
-def get_payment_v1(payment_id):
-    """GET /api/v1/payments/<id> - Retrieve specific payment (V1 format)"""
+@unified_bp.route('/v1/payments/export', methods=['GET'])
+def export_payments_v1():
+    """GET /api/v1/payments/export - Stream all matching payments (V1 format)"""
+    adapter = get_adapter('v1')
     try:
-        adapter = get_adapter('v1')
-        payment = PaymentService.get_payment_by_id(payment_id)
+        return stream_export(adapter, request.args)
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            status_code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error exporting payments: {str(e)}',
+            status_code=500
+        )), 500
+
+
+@unified_bp.route('/v1/payments/summary', methods=['GET'])
+def get_payments_summary_v1():
+    """GET /api/v1/payments/summary - Payment count and total per period and status (V1 format)"""
+    adapter = get_adapter('v1')
+    try:
+        params = parse_summary_params(request.args)
+        rows = PaymentService.get_summary(**params)
+        
+        return jsonify(adapter.format_success_response(
+            data=adapter.transform_summary(rows, params['granularity']),
+            message='Payment summary retrieved successfully'
+        )), 200
+        
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            status_code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error retrieving payment summary: {str(e)}',
+            status_code=500
+        )), 500
+
+
+@unified_bp.route('/v1/payments/batch', methods=['POST'])
+def create_payments_batch_v1():
+    """POST /api/v1/payments/batch - Create many payments in one transaction (V1 format)"""
+    adapter = get_adapter('v1')
+    try:
+        data, status, _ = create_batch(
+            adapter, request.get_json(silent=True), 'payments', ('amount', 'card_number'),
+            idempotency_key=request.headers.get('Idempotency-Key')
+        )
+        return jsonify(adapter.format_success_response(
+            data=data,
+            message='Payment batch processed',
+            status_code=status
+        )), status
+        
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            status_code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error creating payments: {str(e)}',
+            status_code=500
+        )), 500
+
+
+@unified_bp.route('/v1/payments/lookup', methods=['POST'])
+def lookup_payments_v1():
+    """POST /api/v1/payments/lookup - Retrieve many payments by transaction_id (V1 format)"""
+    adapter = get_adapter('v1')
+    try:
+        data = lookup_batch(adapter, request.get_json(silent=True), 'transaction_ids', 'transaction_id')
+        return jsonify(adapter.format_success_response(
+            data=data,
+            message='Payments looked up successfully'
+        )), 200
+        
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            status_code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error looking up payments: {str(e)}',
+            status_code=500
+        )), 500
+
+
+@unified_bp.route('/v1/payments/by-transaction/<transaction_id>', methods=['GET'])
+def get_payment_by_transaction_v1(transaction_id):
+    """GET /api/v1/payments/by-transaction/<transaction_id> - Retrieve payment by transaction_id (V1 format)"""
+    adapter = get_adapter('v1')
+    try:
+        payment = PaymentService.get_payment_by_transaction_id(transaction_id)
         
         if not payment:
+            return jsonify(adapter.format_error_response(
+                message=f'Payment with transaction_id {transaction_id} not found',
+                status_code=404
+            )), 404
+        
+        return jsonify(adapter.format_success_response(
+            data=adapter.transform_response(payment),
+            message='Payment retrieved successfully'
+        )), 200
+        
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error retrieving payment: {str(e)}',
+            status_code=500
+        )), 500
+
+
+@unified_bp.route('/v1/payments/<int:payment_id>', methods=['GET'])
+def get_payment_v1(payment_id):
+    """GET /api/v1/payments/<id> - Retrieve specific payment (V1 format, cached)"""
+    def render(transformed):
+        if not transformed:
             return jsonify(adapter.format_error_response(
                 message=f'Payment with id {payment_id} not found',
                 status_code=404
             )), 404
         
-        transformed = adapter.transform_response(payment)
         return jsonify(adapter.format_success_response(
             data=transformed,
             message='Payment retrieved successfully'
         )), 200
+    
+    try:
+        adapter = get_adapter('v1')
+        return cached_payment_response('v1', payment_id, render, parse_wait(request.args))
         
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            status_code=400
+        )), 400
     except Exception as e:
         adapter = get_adapter('v1')
         return jsonify(adapter.format_error_response(
@@ -163,18 +606,27 @@ def delete_payment_v1(payment_id):
 
 @unified_bp.route('/v2/transactions', methods=['GET'])
 def get_all_transactions_v2():
-    """GET /api/v2/transactions - Retrieve all transactions (V2 format)"""
+    """GET /api/v2/transactions - Retrieve one page of transactions (V2 format)"""
     try:
         adapter = get_adapter('v2')
-        payments = PaymentService.get_all_payments()
-        transformed = adapter.transform_response_list(payments)
+        params = parse_list_params(request.args)
+        page = PaymentService.list_payments(**params)
+        transformed = adapter.transform_response_list(page['items'])
         
-        return jsonify(adapter.format_success_response(
+        return jsonify(adapter.format_list_response(
             data=transformed,
             message='Transactions retrieved successfully',
-            code=200
+            next_cursor=page['next_cursor'],
+            limit=params['limit'],
+            query=request.args.to_dict()
         )), 200
         
+    except ValueError as e:
+        adapter = get_adapter('v2')
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            code=400
+        )), 400
     except Exception as e:
         adapter = get_adapter('v2')
         return jsonify(adapter.format_error_response(
@@ -183,26 +635,127 @@ def get_all_transactions_v2():
         )), 500
 
 
-@unified_bp.route('/v2/transactions/<int:transaction_id>', methods=['GET'])
-def get_transaction_v2(transaction_id):
-    """GET /api/v2/transactions/<id> - Retrieve specific transaction (V2 format)"""
+@unified_bp.route('/v2/transactions/export', methods=['GET'])
+def export_transactions_v2():
+    """GET /api/v2/transactions/export - Stream all matching transactions (V2 format)"""
+    adapter = get_adapter('v2')
     try:
-        adapter = get_adapter('v2')
-        payment = PaymentService.get_payment_by_id(transaction_id)
+        return stream_export(adapter, request.args)
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error exporting transactions: {str(e)}',
+            code=500
+        )), 500
+
+
+@unified_bp.route('/v2/transactions/summary', methods=['GET'])
+def get_transactions_summary_v2():
+    """GET /api/v2/transactions/summary - Transaction totals per period, by status (V2 format)"""
+    adapter = get_adapter('v2')
+    try:
+        params = parse_summary_params(request.args)
+        rows = PaymentService.get_summary(**params)
         
-        if not payment:
+        return jsonify(adapter.format_success_response(
+            data=adapter.transform_summary(rows, params['granularity']),
+            message='Transaction summary retrieved successfully'
+        )), 200
+        
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error retrieving transaction summary: {str(e)}',
+            code=500
+        )), 500
+
+
+@unified_bp.route('/v2/transactions/batch', methods=['POST'])
+def create_transactions_batch_v2():
+    """POST /api/v2/transactions/batch - Create many transactions in one transaction (V2 format)"""
+    adapter = get_adapter('v2')
+    try:
+        data, status, deprecation_warning = create_batch(
+            adapter, request.get_json(silent=True), 'transactions', ('amount',),
+            any_of=('payment_token', 'card_number'),
+            idempotency_key=request.headers.get('Idempotency-Key')
+        )
+        return jsonify(adapter.format_success_response(
+            data=data,
+            message='Transaction batch processed',
+            code=status,
+            deprecation_warning=deprecation_warning
+        )), status
+        
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error creating transactions: {str(e)}',
+            code=500
+        )), 500
+
+
+@unified_bp.route('/v2/transactions/lookup', methods=['POST'])
+def lookup_transactions_v2():
+    """POST /api/v2/transactions/lookup - Retrieve the transactions of many payment tokens (V2 format)"""
+    adapter = get_adapter('v2')
+    try:
+        data = lookup_batch(adapter, request.get_json(silent=True), 'payment_tokens', 'payment_token')
+        return jsonify(adapter.format_success_response(
+            data=data,
+            message='Transactions looked up successfully',
+            code=200
+        )), 200
+        
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            code=400
+        )), 400
+    except Exception as e:
+        return jsonify(adapter.format_error_response(
+            message=f'Error looking up transactions: {str(e)}',
+            code=500
+        )), 500
+
+
+@unified_bp.route('/v2/transactions/<int:transaction_id>', methods=['GET'])
+def get_transaction_v2(transaction_id):
+    """GET /api/v2/transactions/<id> - Retrieve specific transaction (V2 format, cached)"""
+    def render(transformed):
+        if not transformed:
             return jsonify(adapter.format_error_response(
                 message=f'Transaction with id {transaction_id} not found',
                 code=404
             )), 404
         
-        transformed = adapter.transform_response(payment)
         return jsonify(adapter.format_success_response(
             data=transformed,
             message='Transaction retrieved successfully',
             code=200
         )), 200
+    
+    try:
+        adapter = get_adapter('v2')
+        return cached_payment_response('v2', transaction_id, render, parse_wait(request.args))
         
+    except ValueError as e:
+        return jsonify(adapter.format_error_response(
+            message=str(e),
+            code=400
+        )), 400
     except Exception as e:
         adapter = get_adapter('v2')
         return jsonify(adapter.format_error_response(
@@ -4,6 +4,7 @@ Tests both V1 and V2 endpoints using the unified adapter pattern.
 """
 import requests
 import json
+import uuid
 from typing import Dict, Any
 
 
@@ -206,6 +207,282 @@ def test_v2_delete_transaction(transaction_id: int):
     assert 'code' in data, "V2 should have code"
 
 
+# ============================================================================
+# Pagination Tests
+# ============================================================================
+
+def collect_pages(url: str, next_href) -> list:
+    """Follow next links until the last page, returning all item ids."""
+    ids = []
+    while url:
+        response = requests.get(f"{BASE_URL}{url}")
+        assert response.status_code == 200, "Every page should return 200"
+        data = response.json()
+        ids.extend(item['id'] for item in data['data'])
+        url = next_href(data['links'])
+    return ids
+
+
+def test_v1_pagination():
+    """Test V1: keyset pagination via next links, with filters kept across pages."""
+    print_test_header("V1 - Paginated Listing")
+    created = [test_v1_create_payment() for _ in range(3)]
+    
+    ids = collect_pages("/api/v1/payments?limit=2&status=SUCCESS", lambda links: links.get('next'))
+    print(f"\nCollected {len(ids)} payment ids across pages")
+    assert len(ids) == len(set(ids)), "Pages should not overlap"
+    assert set(created) <= set(ids), "All new payments should appear in some page"
+    
+    response = requests.get(f"{BASE_URL}/api/v1/payments?min_amount=1000000")
+    assert response.json()['data'] == [], "Amount filter should exclude everything"
+    
+    for payment_id in created:
+        test_v1_delete_payment(payment_id)
+
+
+def test_v2_pagination():
+    """Test V2: pagination metadata and method-tagged links."""
+    print_test_header("V2 - Paginated Listing")
+    response = requests.get(f"{BASE_URL}/api/v2/transactions?limit=1")
+    print_response(response)
+    data = response.json()
+    assert data['pagination']['limit'] == 1, "V2 should echo the page size"
+    if data['pagination']['has_more']:
+        assert data['links']['next']['method'] == 'GET', "V2 links carry the HTTP method"
+    
+    ids = collect_pages("/api/v2/transactions?limit=2",
+                        lambda links: links['next']['href'] if 'next' in links else None)
+    assert len(ids) == len(set(ids)), "Pages should not overlap"
+    
+    response = requests.get(f"{BASE_URL}/api/v2/transactions?cursor=not-a-cursor")
+    assert response.status_code == 400, "Invalid cursor should return 400"
+
+
+# ============================================================================
+# Export Tests
+# ============================================================================
+
+def test_export_streams():
+    """Test streaming export: JSON array (V1) and NDJSON (V2) with filters."""
+    print_test_header("Export - Streaming JSON / NDJSON")
+    
+    response = requests.get(f"{BASE_URL}/api/v1/payments/export", stream=True)
+    assert response.status_code == 200, "Should return 200"
+    assert response.headers.get('Transfer-Encoding') == 'chunked', "Export should be chunked"
+    payments = json.loads(b''.join(response.iter_content(8192)))
+    assert isinstance(payments, list), "V1 export is a JSON array"
+    assert all('transaction_id' in p for p in payments), "V1 export uses V1 fields"
+    print(f"\nV1 export: {len(payments)} payments")
+    
+    response = requests.get(f"{BASE_URL}/api/v2/transactions/export?format=ndjson&status=PENDING", stream=True)
+    assert response.headers['Content-Type'].startswith('application/x-ndjson')
+    transactions = [json.loads(line) for line in response.iter_lines() if line]
+    assert all(t['status'] == 'PENDING' for t in transactions), "Filters apply to exports"
+    assert all('transaction_id' not in t for t in transactions), "V2 export uses V2 fields"
+    print(f"V2 export (PENDING): {len(transactions)} transactions")
+    
+    response = requests.get(f"{BASE_URL}/api/v2/transactions/export?format=xml")
+    assert response.status_code == 400, "Unknown format should return 400"
+
+
+# ============================================================================
+# Batch Ingestion Tests
+# ============================================================================
+
+def test_batch_ingestion():
+    """Test batch create: per-item results, Idempotency-Key replay, key conflicts."""
+    print_test_header("Batch - Ingestion with Idempotency Keys")
+    
+    batch_key = f"test-{uuid.uuid4()}"
+    payload = {"payments": [
+        {"amount": 10.0, "card_number": "4111-1111-1111-1111"},
+        {"amount": 20.0},  # Missing card_number
+        {"amount": 30.0, "card_number": "5500-0000-0000-0004", "status": "PENDING"}
+    ]}
+    response = requests.post(f"{BASE_URL}/api/v1/payments/batch", json=payload,
+                             headers={"Idempotency-Key": batch_key})
+    print_response(response)
+    assert response.status_code == 201, "Should return 201 Created"
+    data = response.json()['data']
+    assert data['summary']['created'] == 2 and data['summary']['invalid'] == 1
+    assert data['results'][1]['result'] == 'invalid', "Invalid items are reported, not inserted"
+    created_ids = [r['data']['id'] for r in data['results'] if r['result'] == 'created']
+    
+    retry = requests.post(f"{BASE_URL}/api/v1/payments/batch", json=payload,
+                          headers={"Idempotency-Key": batch_key})
+    assert retry.status_code == 200, "A replayed batch creates nothing"
+    replayed = retry.json()['data']
+    assert replayed['summary']['duplicate'] == 2, "Retried items resolve to existing payments"
+    assert [r['data']['id'] for r in replayed['results'] if r['result'] == 'duplicate'] == created_ids
+    
+    item_key = f"item-{uuid.uuid4()}"
+    response = requests.post(f"{BASE_URL}/api/v2/transactions/batch", json={"transactions": [
+        {"amount": 5.0, "payment_token": "TOK-BATCH", "idempotency_key": item_key},
+        {"amount": 6.0, "card_number": "4111-1111-1111-1111"},
+        {"amount": 7.0, "payment_token": "TOK-OTHER", "idempotency_key": item_key}
+    ]})
+    print_response(response)
+    data = response.json()
+    assert data['code'] == 201, "V2 uses the code field"
+    assert 'deprecation_warning' in data, "card_number items trigger the deprecation warning"
+    results = data['data']['results']
+    assert [r['result'] for r in results] == ['created', 'created', 'conflict']
+    assert 'transaction_id' not in results[0]['data'], "V2 results use V2 fields"
+    created_ids += [r['data']['id'] for r in results if r['result'] == 'created']
+    
+    response = requests.post(f"{BASE_URL}/api/v2/transactions/batch", json={"transactions": []})
+    assert response.status_code == 400, "Empty batch should return 400"
+    
+    for payment_id in created_ids:
+        requests.delete(f"{BASE_URL}/api/v1/payments/{payment_id}")
+
+
+def test_lookups():
+    """Test lookups by transaction_id (v1) and payment_token (v2), single and batch."""
+    print_test_header("Lookups - transaction_id & payment_token")
+    
+    token = f"TOK-LOOKUP-{uuid.uuid4().hex[:8].upper()}"
+    created = requests.post(f"{BASE_URL}/api/v2/transactions/batch", json={"transactions": [
+        {"amount": 11.0, "payment_token": token},
+        {"amount": 12.0, "payment_token": token}
+    ]}).json()['data']['results']
+    ids = [r['data']['id'] for r in created]
+    txn_ids = [requests.get(f"{BASE_URL}/api/v1/payments/{payment_id}").json()['data']['transaction_id']
+               for payment_id in ids]
+    
+    response = requests.get(f"{BASE_URL}/api/v1/payments/by-transaction/{txn_ids[0]}")
+    print_response(response)
+    assert response.status_code == 200 and response.json()['data']['id'] == ids[0]
+    assert requests.get(f"{BASE_URL}/api/v1/payments/by-transaction/TXN-MISSING").status_code == 404
+    
+    response = requests.get(f"{BASE_URL}/api/v2/transactions", params={"payment_token": token})
+    assert sorted(t['id'] for t in response.json()['data']) == sorted(ids), "Filter by payment_token"
+    
+    response = requests.post(f"{BASE_URL}/api/v1/payments/lookup",
+                             json={"transaction_ids": [txn_ids[1], "TXN-MISSING", txn_ids[0]]})
+    print_response(response)
+    data = response.json()['data']
+    assert data['summary'] == {'found': 2, 'missing': 1}
+    assert [r['data']['id'] if r['data'] else None for r in data['results']] == [ids[1], None, ids[0]], \
+        "Results follow the request order"
+    
+    response = requests.post(f"{BASE_URL}/api/v2/transactions/lookup",
+                             json={"payment_tokens": [token, "TOK-NONE"]})
+    results = response.json()['data']['results']
+    assert sorted(t['id'] for t in results[0]['data']) == sorted(ids) and results[1]['data'] == []
+    
+    response = requests.post(f"{BASE_URL}/api/v1/payments/lookup",
+                             json={"transaction_ids": [f"TXN-{i}" for i in range(1001)]})
+    assert response.status_code == 400, "At most 1000 keys per lookup"
+    
+    for payment_id in ids:
+        requests.delete(f"{BASE_URL}/api/v1/payments/{payment_id}")
+
+
+def test_response_cache():
+    """Test cached single reads: strong ETag, 304 revalidation, invalidation on delete."""
+    print_test_header("Response Cache - ETag & Invalidation")
+    
+    payment_id = requests.post(f"{BASE_URL}/api/v1/payments", json={
+        "amount": 42.0, "card_number": "4111-1111-1111-1111"
+    }).json()['data']['id']
+    
+    first = requests.get(f"{BASE_URL}/api/v1/payments/{payment_id}")
+    second = requests.get(f"{BASE_URL}/api/v1/payments/{payment_id}")
+    print(f"ETag: {first.headers.get('ETag')}  Cache-Control: {first.headers.get('Cache-Control')}")
+    etag = first.headers['ETag']
+    assert not etag.startswith('W/'), "ETag should be strong"
+    assert 'max-age' in first.headers['Cache-Control']
+    assert second.headers['ETag'] == etag and second.json() == first.json(), "Cached body is identical"
+    
+    v2 = requests.get(f"{BASE_URL}/api/v2/transactions/{payment_id}")
+    assert v2.headers['ETag'] != etag and 'transaction_id' not in v2.json()['data'], "Cached per version"
+    
+    response = requests.get(f"{BASE_URL}/api/v1/payments/{payment_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and not response.content, "Matching If-None-Match returns 304"
+    
+    requests.delete(f"{BASE_URL}/api/v2/transactions/{payment_id}")
+    assert requests.get(f"{BASE_URL}/api/v1/payments/{payment_id}").status_code == 404, "Delete invalidates v1"
+    assert requests.get(f"{BASE_URL}/api/v2/transactions/{payment_id}").status_code == 404, "Delete invalidates v2"
+    
+    stats = requests.get(f"{BASE_URL}/health").json()['response_cache']
+    print(f"Cache stats: {stats}")
+    assert stats['hits'] >= 2
+
+
+def test_record_cache():
+    """Test the cross-version record cache: a v2 read after a v1 read skips the database."""
+    print_test_header("Record Cache - Shared Record, Per-Version Projections")
+    
+    def record_stats():
+        return requests.get(f"{BASE_URL}/health").json()['record_cache']
+    
+    payment_id = requests.post(f"{BASE_URL}/api/v1/payments", json={
+        "amount": 43.0, "card_number": "4111-1111-1111-1111"
+    }).json()['data']['id']
+    
+    before = record_stats()
+    assert requests.get(f"{BASE_URL}/api/v1/payments/{payment_id}").status_code == 200
+    after_v1 = record_stats()
+    v2 = requests.get(f"{BASE_URL}/api/v2/transactions/{payment_id}")
+    after_v2 = record_stats()
+    print(f"Record cache stats: {after_v2}")
+    assert after_v1['misses'] == before['misses'] + 1, "First read loads the record"
+    assert after_v2['hits'] == after_v1['hits'] + 1, "v2 read after v1 read reuses the record"
+    assert after_v2['projections']['v2']['misses'] == after_v1['projections'].get('v2', {}).get('misses', 0) + 1
+    assert v2.json()['data']['id'] == payment_id and 'transaction_id' not in v2.json()['data']
+    assert after_v2['bytes'] > 0 and after_v2['bytes'] <= after_v2['max_bytes']
+    
+    pending_id = requests.post(f"{BASE_URL}/api/v2/transactions", json={
+        "amount": 44.0, "payment_token": "TOK-RECORDCACHE", "status": "PENDING"
+    }).json()['data']['id']
+    requests.get(f"{BASE_URL}/api/v2/transactions/{pending_id}")
+    assert record_stats()['size'] == after_v2['size'], "PENDING records are not cached"
+    
+    requests.delete(f"{BASE_URL}/api/v1/payments/{payment_id}")
+    requests.delete(f"{BASE_URL}/api/v1/payments/{pending_id}")
+    assert record_stats()['size'] == after_v2['size'] - 1, "Delete drops the cached record"
+    assert requests.get(f"{BASE_URL}/api/v2/transactions/{payment_id}").status_code == 404
+
+
+def test_summary():
+    """Test summaries from the rollup table, kept in step by create, batch create and delete."""
+    print_test_header("Summary - Rollups per Period & Status")
+    
+    def failed_totals():
+        buckets = requests.get(f"{BASE_URL}/api/v1/payments/summary").json()['data']['buckets']
+        failed = [b for b in buckets if b['status'] == 'FAILED']
+        return sum(b['count'] for b in failed), round(sum(b['total_amount'] for b in failed), 2)
+    
+    count, total = failed_totals()
+    single = requests.post(f"{BASE_URL}/api/v1/payments", json={
+        "amount": 10.25, "card_number": "4111-1111-1111-1111", "status": "FAILED"
+    }).json()['data']['id']
+    batch = requests.post(f"{BASE_URL}/api/v2/transactions/batch", json={"transactions": [
+        {"amount": 1.5, "payment_token": "TOK-SUMMARY", "status": "FAILED"},
+        {"amount": 2.0, "payment_token": "TOK-SUMMARY", "status": "FAILED"}
+    ]}).json()['data']['results']
+    assert failed_totals() == (count + 3, round(total + 13.75, 2)), "Creates are added to the rollups"
+    
+    requests.delete(f"{BASE_URL}/api/v1/payments/{single}")
+    assert failed_totals() == (count + 2, round(total + 3.5, 2)), "Deletes are taken out of the rollups"
+    
+    response = requests.get(f"{BASE_URL}/api/v2/transactions/summary", params={"granularity": "hour"})
+    print_response(response)
+    periods = response.json()['data']['periods']
+    assert response.json()['data']['granularity'] == 'hour' and len(periods[-1]['period']) == 19
+    latest = periods[-1]
+    assert latest['by_status']['FAILED']['code'] == 400
+    assert latest['count'] == sum(s['count'] for s in latest['by_status'].values())
+    
+    response = requests.get(f"{BASE_URL}/api/v1/payments/summary", params={"from": "2000-01-01", "to": "2000-01-31"})
+    assert response.json()['data']['buckets'] == [], "Range without payments is empty"
+    assert requests.get(f"{BASE_URL}/api/v2/transactions/summary?granularity=week").status_code == 400
+    
+    for result in batch:
+        requests.delete(f"{BASE_URL}/api/v2/transactions/{result['data']['id']}")
+
+
 # ============================================================================
 # Error Handling Tests
 # ============================================================================
@@ -275,6 +552,26 @@ def run_all_tests():
         test_v2_delete_transaction(v2_transaction_id_1)
         test_v2_delete_transaction(v2_transaction_id_2)
         
+        # Pagination tests
+        test_v1_pagination()
+        test_v2_pagination()
+        
+        # Export tests
+        test_export_streams()
+        
+        # Batch tests
+        test_batch_ingestion()
+        
+        # Lookup tests
+        test_lookups()
+        
+        # Response cache tests
+        test_response_cache()
+        test_record_cache()
+        
+        # Summary tests
+        test_summary()
+        
         # Error handling tests
         test_error_handling_v1()
         test_error_handling_v2()
@@ -288,6 +585,13 @@ def run_all_tests():
         print("   ✅ V1 API (payments) - CRUD operations")
         print("   ✅ V2 API (transactions) - CRUD operations")
         print("   ✅ V2 Backward compatibility (card_number → token)")
+        print("   ✅ Keyset pagination + filters for both versions")
+        print("   ✅ Streaming export (JSON array / NDJSON)")
+        print("   ✅ Batch ingestion with idempotency keys")
+        print("   ✅ Lookups by transaction_id / payment_token")
+        print("   ✅ Response cache (ETag, 304, invalidation)")
+        print("   ✅ Record cache shared across versions (per-version projections)")
+        print("   ✅ Summaries from incrementally maintained rollups")
         print("   ✅ Error handling for both versions")
         print("\n🎉 AdapterTransformer pattern working perfectly!")
         
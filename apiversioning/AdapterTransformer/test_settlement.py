@@ -0,0 +1,127 @@
+"""
+Tests for the settlement pipeline (queue, workers, bulk transitions, long-poll).
+Runs in-process on a temporary database, no server needed.
+Run: python test_settlement.py
+"""
+import os
+import tempfile
+import threading
+
+import core.database as database
+
+database.DB_PATH = os.path.join(tempfile.mkdtemp(), 'settlement.db')
+
+from app import create_app  # noqa: E402
+from core.service import PaymentService  # noqa: E402
+from core import settlement  # noqa: E402
+from core.settlement import FakeProcessor, SettlementProcessor, SettlementWorkerPool, queue_stats  # noqa: E402
+
+app = create_app()
+
+
+def rollups():
+    conn = database.get_db_connection()
+    rows = conn.execute('SELECT hour, status, payment_count, amount_cents FROM payment_rollups ORDER BY 1, 2').fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+def create_pending(count):
+    results = PaymentService.create_payments_batch([
+        {'amount': 10 + i, 'card_number': '4111-1111-1111-1111', 'status': 'PENDING'} for i in range(count)
+    ])
+    return [result['payment']['id'] for result in results]
+
+
+def test_pending_payments_are_queued():
+    before = queue_stats()['queued']
+    PaymentService.create_payment(5.0, '4111-1111-1111-1111', status='SUCCESS')
+    pending = PaymentService.create_payment(6.0, '4111-1111-1111-1111', status='PENDING')
+    ids = create_pending(3)
+    assert queue_stats()['queued'] == before + 4, "Only PENDING payments are queued"
+    PaymentService.delete_payment(ids[0])
+    assert queue_stats()['queued'] == before + 3, "Deleting a payment drops its job"
+    print(f"✅ PENDING payments queued on create (payment {pending['id']}), dropped on delete")
+
+
+def test_batch_settlement():
+    create_pending(50)
+    pool = SettlementWorkerPool(FakeProcessor(failure_rate=0.2), workers=1, batch_size=1000)
+    assert pool.run_once('test-worker') > 0
+    assert queue_stats() == {'queued': 0, 'claimed': 0, 'failed': 0}
+    conn = database.get_db_connection()
+    statuses = dict(conn.execute('SELECT status, COUNT(*) FROM payments GROUP BY status').fetchall())
+    codes = conn.execute('SELECT DISTINCT status, status_code, code FROM payments').fetchall()
+    conn.close()
+    assert 'PENDING' not in statuses and statuses['FAILED'] > 0, statuses
+    assert all(status_code == code == PaymentService._get_status_code(status) for status, status_code, code in codes)
+    incremental = rollups()
+    database.backfill_rollups()
+    assert rollups() == incremental, "Rollups moved from PENDING to the settled status"
+    print(f"✅ one batch settles every job in bulk: {statuses}")
+
+
+def test_rollup_cents_match_backfill():
+    before = rollups()
+    payments = [PaymentService.create_payment(amount, '4111-1111-1111-1111', status='SUCCESS')
+                for amount in (0.125, 10.125, 1.005, 2.675)]
+    incremental = rollups()
+    database.backfill_rollups()
+    assert rollups() == incremental, "Backfill and incremental updates round half-cents alike"
+    for payment in payments:
+        PaymentService.delete_payment(payment['id'])
+    assert rollups() == before, "Deleting backfilled payments leaves no residual cents"
+    print("✅ half-cent amounts roll up the same incrementally and from the backfill")
+
+
+def test_processor_errors_retry_then_park():
+    class Down(SettlementProcessor):
+        def settle(self, payments):
+            raise ConnectionError('provider unavailable')
+
+    payment_id = create_pending(1)[0]
+    pool = SettlementWorkerPool(Down(), workers=1)
+    for attempt in range(1, settlement.MAX_ATTEMPTS + 1):
+        conn = database.get_db_connection()
+        conn.execute('UPDATE settlement_jobs SET available_at = 0')     # skip the backoff
+        conn.commit()
+        conn.close()
+        assert pool.run_once('test-worker') == 1
+    conn = database.get_db_connection()
+    job = conn.execute('SELECT state, attempts, last_error FROM settlement_jobs WHERE payment_id = ?',
+                       (payment_id,)).fetchone()
+    conn.close()
+    assert tuple(job) == ('failed', settlement.MAX_ATTEMPTS, 'ConnectionError: provider unavailable'), tuple(job)
+    assert PaymentService.get_payment_by_id(payment_id)['status'] == 'PENDING'
+    print("✅ failing processor: job retried with backoff, parked after MAX_ATTEMPTS")
+
+
+def test_long_poll():
+    client = app.test_client()
+    payment_id = create_pending(1)[0]
+    pending = client.get(f'/api/v1/payments/{payment_id}')
+    assert pending.json['data']['status'] == 'PENDING'
+    assert pending.headers['Cache-Control'] == 'no-cache' and pending.headers.get('ETag'), "PENDING is not cached"
+    assert client.get(f'/api/v1/payments/{payment_id}',
+                      headers={'If-None-Match': pending.headers['ETag']}).status_code == 304
+
+    pool = SettlementWorkerPool(FakeProcessor(), workers=2, poll_interval=0.05)
+    threading.Timer(0.3, pool.start).start()
+    try:
+        settled = client.get(f'/api/v2/transactions/{payment_id}?wait=10')
+    finally:
+        pool.drain(5)
+        pool.stop()
+    assert settled.json['data']['status'] == 'SUCCESS' and settled.json['data']['code'] == 200
+    assert 'max-age' in settled.headers['Cache-Control'], "Settled responses are cached again"
+    assert client.get(f'/api/v1/payments/{payment_id}?wait=31').status_code == 400
+    print("✅ ?wait= long-polls until the payment settles")
+
+
+if __name__ == '__main__':
+    test_pending_payments_are_queued()
+    test_batch_settlement()
+    test_rollup_cents_match_backfill()
+    test_processor_errors_retry_then_park()
+    test_long_poll()
+    print("\nAll settlement tests passed")
@@ -1,25 +1,66 @@
 """
 Base Transformer for data transformations.
 Defines the interface for all transformers.
+
+Response formats are declared as RESPONSE_FIELDS (see field_spec.py) and
+compiled into a mapping function once, when the subclass is defined.
+Row mappers for a given column order are compiled on first use and cached.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Iterable, Iterator, Sequence, Tuple
+from .field_spec import Field, compile_mapper
 
 
 class BaseTransformer(ABC):
     """Abstract base class for all transformers."""
     
+    # Version name and response field specs, declared by each subclass
+    VERSION: str = ''
+    RESPONSE_FIELDS: Tuple[Field, ...] = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.RESPONSE_FIELDS:
+            name = cls.VERSION or cls.__name__.lower()
+            cls._map_response = staticmethod(compile_mapper(cls.RESPONSE_FIELDS, name))
+            cls._row_mappers = {}
+    
+    @classmethod
+    def row_mapper(cls, columns: Sequence[str]) -> Callable[[tuple], Dict[str, Any]]:
+        """Mapper for tuple rows ordered like `columns` (compiled once per column order)."""
+        columns = tuple(columns)
+        mapper = cls._row_mappers.get(columns)
+        if mapper is None:
+            name = cls.VERSION or cls.__name__.lower()
+            mapper = cls._row_mappers[columns] = compile_mapper(cls.RESPONSE_FIELDS, name, columns)
+        return mapper
+    
     @abstractmethod
     def transform_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """Transform incoming request data to internal format."""
         pass
     
+    def transform_request_list(self, request_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transform many incoming requests (batch ingestion) to internal format."""
+        return [self.transform_request(item) for item in request_items]
+    
     @abstractmethod
+    def transform_summary(self, rows: List[Dict[str, Any]], granularity: str) -> Dict[str, Any]:
+        """Shape summary rows (period, status, count, amount_cents) for the API version."""
+        pass
+    
     def transform_response(self, payment_record: Dict[str, Any]) -> Dict[str, Any]:
         """Transform internal data to API response format."""
-        pass
+        return self._map_response(payment_record)
     
-    @abstractmethod
     def transform_response_list(self, payment_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform list of internal records to API response format."""
-        pass
+        return list(map(self._map_response, payment_records))
+    
+    def transform_response_stream(self, payment_records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazily transform records one at a time (for streaming exports)."""
+        return map(self._map_response, payment_records)
+    
+    def transform_rows(self, rows: Iterable[tuple], columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """Lazily transform tuple rows (ordered like `columns`) to API response format."""
+        return map(self.row_mapper(columns), rows)
@@ -0,0 +1,78 @@
+"""
+Field specs - declarative version mappings compiled into plain functions.
+
+Each transformer declares its response shape once as a tuple of Field specs.
+compile_mapper() turns the specs into a specialized function at import time
+(generated source, one dict literal), so transforming a record costs a single
+function call with no per-field loops, spec lookups or attribute access.
+
+Given the column order of a query, the same specs also compile into a mapper
+over plain tuple rows (record[3] instead of record.get('card_number')), which
+lets bulk paths skip building an intermediate dict per row.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+
+class Field(NamedTuple):
+    """
+    One output field of a version's response format.
+
+    Attributes:
+        name: Key in the API response
+        source: Column in the internal record (defaults to name)
+        required: Read with record[source] (KeyError if missing) instead of .get
+        fallbacks: Columns tried in order when source is missing
+        default: Value when source and every fallback are missing
+    """
+    name: str
+    source: Optional[str] = None
+    required: bool = True
+    fallbacks: Tuple[str, ...] = ()
+    default: Any = None
+
+
+def _field_expression(field: Field, index: int, columns: Optional[Sequence[str]]) -> str:
+    source = field.source or field.name
+    if columns is not None:
+        # Tuple rows always carry every selected column → plain indexing
+        for column in (source, *field.fallbacks):
+            if column in columns:
+                return f"record[{columns.index(column)}]"
+        if field.required:
+            raise ValueError(f"Column {source!r} required by field {field.name!r} is not selected")
+        return f"_default_{index}"
+    if field.required and not field.fallbacks:
+        return f"record[{source!r}]"
+    # Nested .get keeps dict.get semantics: a present key wins even if None
+    expression = None if field.default is None else f"_default_{index}"
+    for column in reversed((source, *field.fallbacks)):
+        expression = f"record.get({column!r}, {expression})" if expression else f"record.get({column!r})"
+    return expression
+
+
+def compile_mapper(fields: Sequence[Field], name: str,
+                   columns: Optional[Sequence[str]] = None) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Compile field specs into a function record -> response dict.
+
+    Records are dicts, or tuples ordered like `columns` when it is given.
+
+    Example:
+        compile_mapper((Field('id'), Field('code', required=False,
+                        fallbacks=('status_code',), default=200)), 'v2')
+        generates:
+            def map_v2_response(record):
+                return {'id': record['id'],
+                        'code': record.get('code', record.get('status_code', _default_1))}
+    """
+    namespace = {f"_default_{i}": field.default for i, field in enumerate(fields)}
+    columns = tuple(columns) if columns is not None else None
+    items = ", ".join(
+        f"{field.name!r}: {_field_expression(field, i, columns)}" for i, field in enumerate(fields)
+    )
+    function_name = f"map_{name}_{'row' if columns is not None else 'response'}"
+    source = f"def {function_name}(record):\n    return {{{items}}}\n"
+    exec(compile(source, f"<field_spec {name}>", "exec"), namespace)
+    mapper = namespace[function_name]
+    mapper.__doc__ = f"Generated from field specs:\n{source}"
+    return mapper
@@ -4,11 +4,47 @@ Handles V1-specific data structure (transaction_id, card_number, status_code).
 """
 from typing import Dict, Any, List
 from .base_transformer import BaseTransformer
+from .field_spec import Field
 
 
 class V1Transformer(BaseTransformer):
     """Transformer for V1 API format."""
     
+    VERSION = 'v1'
+    
+    # V1 response format, compiled into one mapping function by BaseTransformer.
+    #
+    # Internal Data:
+    # {
+    #     "id": 1,
+    #     "transaction_id": "TXN-ABC",
+    #     "amount": 100.0,
+    #     "card_number": "4111-1111-1111-1111",
+    #     "payment_token": "TOK-XYZ",
+    #     "status": "SUCCESS",
+    #     "status_code": 200,
+    #     "code": 200,
+    #     "created_at": "2024-01-01 12:00:00"
+    # }
+    #
+    # V1 Response:
+    # {
+    #     "id": 1,
+    #     "transaction_id": "TXN-ABC",
+    #     "amount": 100.0,
+    #     "card_number": "4111-1111-1111-1111",
+    #     "status": "SUCCESS",
+    #     "created_at": "2024-01-01 12:00:00"
+    # }
+    RESPONSE_FIELDS = (
+        Field('id'),
+        Field('transaction_id', required=False),
+        Field('amount'),
+        Field('card_number', required=False),
+        Field('status'),
+        Field('created_at'),
+    )
+    
     def transform_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Transform V1 request to internal format.
@@ -42,46 +78,31 @@ class V1Transformer(BaseTransformer):
             'code': status_code
         }
     
-    def transform_response(self, payment_record: Dict[str, Any]) -> Dict[str, Any]:
+    def transform_summary(self, rows: List[Dict[str, Any]], granularity: str) -> Dict[str, Any]:
         """
-        Transform internal data to V1 response format.
-        
-        Internal Data:
-        {
-            "id": 1,
-            "transaction_id": "TXN-ABC",
-            "amount": 100.0,
-            "card_number": "4111-1111-1111-1111",
-            "payment_token": "TOK-XYZ",
-            "status": "SUCCESS",
-            "status_code": 200,
-            "code": 200,
-            "created_at": "2024-01-01 12:00:00"
-        }
+        Transform summary rows to V1 format: one flat entry per period and status.
         
         V1 Response:
         {
-            "id": 1,
-            "transaction_id": "TXN-ABC",
-            "amount": 100.0,
-            "card_number": "4111-1111-1111-1111",
-            "status": "SUCCESS",
-            "created_at": "2024-01-01 12:00:00"
+            "granularity": "day",
+            "buckets": [
+                {"period": "2024-01-01", "status": "SUCCESS", "count": 2, "total_amount": 400.5}
+            ]
         }
         """
         return {
-            'id': payment_record['id'],
-            'transaction_id': payment_record.get('transaction_id'),
-            'amount': payment_record['amount'],
-            'card_number': payment_record.get('card_number'),
-            'status': payment_record['status'],
-            'created_at': payment_record['created_at']
+            'granularity': granularity,
+            'buckets': [
+                {
+                    'period': row['period'],
+                    'status': row['status'],
+                    'count': row['count'],
+                    'total_amount': row['amount_cents'] / 100
+                }
+                for row in rows
+            ]
         }
     
-    def transform_response_list(self, payment_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Transform list of records to V1 format."""
-        return [self.transform_response(record) for record in payment_records]
-    
     @staticmethod
     def _get_status_code(status: str) -> int:
         """Map status string to status code."""
@@ -2,14 +2,49 @@
 V2 Transformer - Transforms data between internal format and V2 API format.
 Handles V2-specific data structure (no transaction_id, payment_token, code field).
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from core.tokenization import tokenizer
 from .base_transformer import BaseTransformer
-import hashlib
+from .field_spec import Field
 
 
 class V2Transformer(BaseTransformer):
     """Transformer for V2 API format."""
     
+    VERSION = 'v2'
+    
+    # V2 response format, compiled into one mapping function by BaseTransformer.
+    #
+    # Internal Data:
+    # {
+    #     "id": 1,
+    #     "transaction_id": "TXN-ABC",
+    #     "amount": 100.0,
+    #     "card_number": "4111-1111-1111-1111",
+    #     "payment_token": "TOK-XYZ",
+    #     "status": "SUCCESS",
+    #     "code": 200,
+    #     "created_at": "2024-01-01 12:00:00"
+    # }
+    #
+    # V2 Response:
+    # {
+    #     "id": 1,
+    #     "amount": 100.0,
+    #     "payment_token": "TOK-XYZ",
+    #     "status": "SUCCESS",
+    #     "code": 200,
+    #     "created_at": "2024-01-01 12:00:00"
+    # }
+    RESPONSE_FIELDS = (
+        Field('id'),
+        Field('amount'),
+        Field('payment_token', required=False),
+        Field('status'),
+        Field('code', required=False, fallbacks=('status_code',), default=200),
+        Field('created_at'),
+    )
+    
     def transform_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Transform V2 request to internal format.
@@ -44,6 +79,22 @@ class V2Transformer(BaseTransformer):
         if card_number and not payment_token:
             payment_token = self.generate_payment_token(card_number)
         
+        return self._to_internal(request_data, payment_token)
+    
+    def transform_request_list(self, request_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Transform many V2 requests, tokenizing every card_number in one batch."""
+        needs_token = [bool(item.get('card_number') and not item.get('payment_token'))
+                       for item in request_items]
+        tokens = iter(tokenizer.tokenize_many(
+            item['card_number'] for item, needed in zip(request_items, needs_token) if needed
+        ))
+        return [
+            self._to_internal(item, next(tokens) if needed else item.get('payment_token'))
+            for item, needed in zip(request_items, needs_token)
+        ]
+    
+    def _to_internal(self, request_data: Dict[str, Any], payment_token: Optional[str]) -> Dict[str, Any]:
+        card_number = request_data.get('card_number')
         status = request_data.get('status', 'SUCCESS')
         code = self._get_status_code(status)
         
@@ -56,52 +107,58 @@ class V2Transformer(BaseTransformer):
             'code': code
         }
     
-    def transform_response(self, payment_record: Dict[str, Any]) -> Dict[str, Any]:
+    def transform_summary(self, rows: List[Dict[str, Any]], granularity: str) -> Dict[str, Any]:
         """
-        Transform internal data to V2 response format.
-        
-        Internal Data:
-        {
-            "id": 1,
-            "transaction_id": "TXN-ABC",
-            "amount": 100.0,
-            "card_number": "4111-1111-1111-1111",
-            "payment_token": "TOK-XYZ",
-            "status": "SUCCESS",
-            "code": 200,
-            "created_at": "2024-01-01 12:00:00"
-        }
+        Transform summary rows to V2 format: one entry per period with its
+        totals, broken down by status (keyed by status, carrying its code).
         
         V2 Response:
         {
-            "id": 1,
-            "amount": 100.0,
-            "payment_token": "TOK-XYZ",
-            "status": "SUCCESS",
-            "code": 200,
-            "created_at": "2024-01-01 12:00:00"
+            "granularity": "day",
+            "periods": [
+                {
+                    "period": "2024-01-01",
+                    "count": 3,
+                    "total_amount": 500.49,
+                    "by_status": {
+                        "SUCCESS": {"code": 200, "count": 2, "total_amount": 400.5},
+                        "PENDING": {"code": 202, "count": 1, "total_amount": 99.99}
+                    }
+                }
+            ]
         }
         """
+        periods: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            period = periods.get(row['period'])
+            if period is None:
+                period = periods[row['period']] = {
+                    'period': row['period'], 'count': 0, 'amount_cents': 0, 'by_status': {}
+                }
+            period['count'] += row['count']
+            period['amount_cents'] += row['amount_cents']
+            period['by_status'][row['status']] = {
+                'code': self._get_status_code(row['status']),
+                'count': row['count'],
+                'total_amount': row['amount_cents'] / 100
+            }
         return {
-            'id': payment_record['id'],
-            'amount': payment_record['amount'],
-            'payment_token': payment_record.get('payment_token'),
-            'status': payment_record['status'],
-            'code': payment_record.get('code', payment_record.get('status_code', 200)),
-            'created_at': payment_record['created_at']
+            'granularity': granularity,
+            'periods': [
+                {
+                    'period': period['period'],
+                    'count': period['count'],
+                    'total_amount': period['amount_cents'] / 100,
+                    'by_status': period['by_status']
+                }
+                for period in periods.values()
+            ]
         }
     
-    def transform_response_list(self, payment_records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Transform list of records to V2 format."""
-        return [self.transform_response(record) for record in payment_records]
-    
     @staticmethod
     def generate_payment_token(card_number: str) -> str:
-        """Generate a payment token from card number using SHA256."""
-        card_clean = card_number.replace('-', '').replace(' ', '')
-        hash_obj = hashlib.sha256(card_clean.encode())
-        token = hash_obj.hexdigest()[:12].upper()
-        return f"TOK-{token}"
+        """Generate a payment token from card number (shared keyed, memoized tokenizer)."""
+        return tokenizer.tokenize(card_number)
     
     @staticmethod
     def _get_status_code(status: str) -> int:
@@ -1,5 +1,7 @@
-from flask import Flask, jsonify, request, g
+from flask import Flask, jsonify, request
 from database import init_db, seed_sample_data
+from shared.dispatch import VersionRouter
+from shared.metrics import install_metrics
 
 
 app = Flask(__name__)
@@ -9,58 +11,34 @@ init_db()
 seed_sample_data()
 
 
-@app.before_request
-def detect_version():
-    """Detect API version from header before processing request."""
-    api_version = request.headers.get('API-Version', 'v1').lower()
-    
-    if api_version in ['1', 'v1']:
-        g.api_version = 'v1'
-    elif api_version in ['2', 'v2']:
-        g.api_version = 'v2'
-    else:
-        g.api_version = 'v1'  # Default to v1
-
-
 # Import route functions directly from modules
 import v1.routes as v1
 import v2.routes as v2
 
-@app.route('/api/health', methods=['GET'])
-def route_health_check():
-    """Route health check to correct version based on API-Version header."""
-    if g.api_version == 'v2':
-        return v2.health_check()
-    else:
-        return v1.health_check()
+# Dispatch table built once: (version, method, has_id) -> view.
+# Responses carry Vary: API-Version so shared caches keep versions apart.
+router = VersionRouter(lambda: request.environ.get('HTTP_API_VERSION'), default='v1', vary='API-Version')
+router.register('v1', {
+    ('GET', False): v1.get_payments,
+    ('GET', True): v1.get_payment,
+    ('POST', False): v1.create_payment,
+    ('DELETE', True): v1.delete_payment,
+}, aliases=('1',))
+router.register('v2', {
+    ('GET', False): v2.get_transactions,
+    ('GET', True): v2.get_transaction,
+    ('POST', False): v2.create_transaction,
+    ('DELETE', True): v2.delete_transaction,
+}, aliases=('2',))
+router.install(app, '/api/payments', '/api/payments/<int:payment_id>')
 
+# Per-version request metrics at /metrics, labelled with the resolved version
+install_metrics(app, 'HeaderVersioning', version_of=lambda: router.resolve(router.version_from()))
 
-@app.route('/api/payments', methods=['GET', 'POST'])
-@app.route('/api/payments/<int:payment_id>', methods=['GET', 'DELETE'])
-def route_to_version(payment_id=None):
-    """Route to correct version based on API-Version header."""
-    if g.api_version == 'v2':
-        # Call V2 endpoint
-        if request.method == 'GET':
-            if payment_id:
-                return v2.get_transaction(payment_id)
-            else:
-                return v2.get_transactions()
-        elif request.method == 'POST':
-            return v2.create_transaction()
-        elif request.method == 'DELETE':
-            return v2.delete_transaction(payment_id)
-    else:
-        # Call V1 endpoint (default)
-        if request.method == 'GET':
-            if payment_id:
-                return v1.get_payment(payment_id)
-            else:
-                return v1.get_payments()
-        elif request.method == 'POST':
-            return v1.create_payment()
-        elif request.method == 'DELETE':
-            return v1.delete_payment(payment_id)
+health_router = VersionRouter(router.version_from, default='v1', vary='API-Version')
+health_router.register('v1', {('GET', False): v1.health_check}, aliases=('1',))
+health_router.register('v2', {('GET', False): v2.health_check}, aliases=('2',))
+app.add_url_rule('/api/health', 'health', health_router.dispatch, methods=['GET'])
 
 
 @app.route('/')
@@ -2,26 +2,19 @@
 Database module for HeaderVersioning project.
 Independent SQLite database for header-based versioning demo.
 """
-import sqlite3
 import os
+import sys
 
+# apiversioning/ holds the shared package. database is the first module every
+# other module of this variant imports, so this is the only sys.path change.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.persistence import Migration, close_pool, get_connection, run_migrations  # noqa: E402
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'payments_header.db')
 
-
-def get_db_connection():
-    """Get a connection to the HeaderVersioning database."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_db():
-    """Initialize the database with the payments table."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+# Schema history; the database records the last applied version in PRAGMA user_version
+MIGRATIONS = [
+    Migration(1, 'create payments table', '''
         CREATE TABLE IF NOT EXISTS payments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             transaction_id TEXT,
@@ -33,10 +26,18 @@ def init_db():
             code INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    '''),
+]
+
+
+def get_db_connection():
+    """Get a pooled connection to the HeaderVersioning database; conn.close() returns it to the pool."""
+    return get_connection(DB_PATH)
+
+
+def init_db():
+    """Initialize the database with the payments table."""
+    run_migrations(DB_PATH, MIGRATIONS)
     print(f"HeaderVersioning database initialized: {DB_PATH}")
 
 
@@ -102,9 +103,13 @@ def seed_sample_data():
 
 def reset_db():
     """Reset the database by dropping and recreating tables."""
+    close_pool(DB_PATH)
     if os.path.exists(DB_PATH):
         os.remove(DB_PATH)
         print(f"🗑️  Removed old database: {DB_PATH}")
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
     
     init_db()
     seed_sample_data()
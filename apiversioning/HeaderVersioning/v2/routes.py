@@ -5,7 +5,10 @@ Accessed via header: API-Version: v2
 from flask import Blueprint, request, jsonify
 from database import get_db_connection
 import uuid
-import hashlib
+
+from shared.tokenization import get_tokenizer
+
+tokenizer = get_tokenizer(length=32)
 
 v2_bp = Blueprint('v2', __name__)
 
@@ -16,7 +19,8 @@ def health_check():
     return jsonify({
         'code': 200,
         'message': 'V2 API is running',
-        'version': 'v2'
+        'version': 'v2',
+        'tokenization': tokenizer.stats()
     }), 200
 
 
@@ -34,9 +38,8 @@ def generate_hateoas_links(transaction_id=None, base_url='/api/payments'):
 
 
 def generate_payment_token(card_number):
-    """Generate payment token from card number"""
-    token = hashlib.sha256(card_number.encode()).hexdigest()[:32].upper()
-    return f"TOK-{token}"
+    """Generate payment token from card number (shared keyed HMAC tokenizer, memoized)."""
+    return tokenizer.tokenize(card_number)
 
 
 @v2_bp.route('/payments', methods=['GET'])
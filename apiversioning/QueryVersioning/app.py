@@ -1,58 +1,35 @@
-from flask import Flask, jsonify, request, g
+from flask import Flask, jsonify, request
 from database import init_db, seed_sample_data
 import v1.routes as v1
 import v2.routes as v2
+from shared.dispatch import VersionRouter
+from shared.metrics import install_metrics
+
 app = Flask(__name__)
 
 init_db()
 seed_sample_data()
 
 
-@app.before_request
-def detect_version():
-    """Detect API version from query parameter before processing request."""
-    # Skip for root endpoint
-    if request.path == '/':
-        return
-    
-    # Get version from query parameter
-    api_version = request.args.get('version', '1')
-    
-    # Normalize version
-    if api_version in ['1', 'v1']:
-        g.api_version = 'v1'
-    elif api_version in ['2', 'v2']:
-        g.api_version = 'v2'
-    else:
-        g.api_version = 'v1'  # Default to v1
+# Custom routing - dispatch table built once: (version, method, has_id) -> view.
+# The version is part of the URL (?version=), so caches already key on it: no Vary.
+router = VersionRouter(lambda: request.args.get('version'), default='v1')
+router.register('v1', {
+    ('GET', False): v1.get_payments,
+    ('GET', True): v1.get_payment,
+    ('POST', False): v1.create_payment,
+    ('DELETE', True): v1.delete_payment,
+}, aliases=('1',))
+router.register('v2', {
+    ('GET', False): v2.get_transactions,
+    ('GET', True): v2.get_transaction,
+    ('POST', False): v2.create_transaction,
+    ('DELETE', True): v2.delete_transaction,
+}, aliases=('2',))
+router.install(app, '/api/payments', '/api/payments/<int:payment_id>')
 
-# Custom routing - dispatch to correct module based on query parameter
-@app.route('/api/payments', methods=['GET', 'POST'])
-@app.route('/api/payments/<int:payment_id>', methods=['GET', 'DELETE'])
-def route_to_version(payment_id=None):
-    """Route to correct version based on ?version= query parameter."""
-    if g.api_version == 'v2':
-        # Call V2 endpoint
-        if request.method == 'GET':
-            if payment_id:
-                return v2.get_transaction(payment_id)
-            else:
-                return v2.get_transactions()
-        elif request.method == 'POST':
-            return v2.create_transaction()
-        elif request.method == 'DELETE':
-            return v2.delete_transaction(payment_id)
-    else:
-        # Call V1 endpoint (default)
-        if request.method == 'GET':
-            if payment_id:
-                return v1.get_payment(payment_id)
-            else:
-                return v1.get_payments()
-        elif request.method == 'POST':
-            return v1.create_payment()
-        elif request.method == 'DELETE':
-            return v1.delete_payment(payment_id)
+# Per-version request metrics at /metrics, labelled with the resolved version
+install_metrics(app, 'QueryVersioning', version_of=lambda: router.resolve(router.version_from()))
 
 
 @app.route('/')
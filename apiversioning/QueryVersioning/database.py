@@ -2,27 +2,20 @@
 Database module for QueryVersioning project.
 Independent SQLite database for query parameter versioning demo.
 """
-import sqlite3
 import os
+import sys
 import hashlib
 
+# apiversioning/ holds the shared package. database is the first module every
+# other module of this variant imports, so this is the only sys.path change.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.persistence import Migration, get_connection, run_migrations  # noqa: E402
 
 DB_PATH = 'payments_query.db'
 
-
-def get_db_connection():
-    """Get a connection to the QueryVersioning database."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_db():
-    """Initialize the database with the payments table."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+# Schema history; the database records the last applied version in PRAGMA user_version
+MIGRATIONS = [
+    Migration(1, 'create payments table', '''
         CREATE TABLE IF NOT EXISTS payments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             transaction_id TEXT,
@@ -34,10 +27,18 @@ def init_db():
             code INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    '''),
+]
+
+
+def get_db_connection():
+    """Get a pooled connection to the QueryVersioning database; conn.close() returns it to the pool."""
+    return get_connection(DB_PATH)
+
+
+def init_db():
+    """Initialize the database with the payments table."""
+    run_migrations(DB_PATH, MIGRATIONS)
     print(f"QueryVersioning database initialized: {DB_PATH}")
 
 
@@ -1,7 +1,10 @@
 from flask import Blueprint, request, jsonify
 from database import get_db_connection
 import uuid
-import hashlib
+
+from shared.tokenization import get_tokenizer
+
+tokenizer = get_tokenizer(length=32)
 
 v2_bp = Blueprint('v2', __name__)
 
@@ -20,9 +23,8 @@ def generate_hateoas_links(transaction_id=None, base_url='/api/payments'):
 
 
 def generate_payment_token(card_number):
-    """Generate payment token from card number"""
-    token = hashlib.sha256(card_number.encode()).hexdigest()[:32].upper()
-    return f"TOK-{token}"
+    """Generate payment token from card number (shared keyed HMAC tokenizer, memoized)."""
+    return tokenizer.tokenize(card_number)
 
 
 @v2_bp.route('/payments', methods=['GET'])
@@ -1,13 +1,18 @@
 from flask import Flask, jsonify, request, redirect
 from flask_cors import CORS
 from v1.routes import v1_bp
-from v2.routes import v2_bp
+from v2.routes import v2_bp, tokenizer
 from database import init_db, migrate_db
 import os
+from shared.metrics import install_metrics
 
 app = Flask(__name__)
 CORS(app)
 
+# Per-version request metrics at /metrics; installed before the feature
+# toggle so redirected v2 requests are counted too
+install_metrics(app, 'Routes')
+
 # Register blueprints
 app.register_blueprint(v1_bp)
 app.register_blueprint(v2_bp)
@@ -68,7 +73,8 @@ def health():
     """Health check endpoint."""
     return jsonify({
         'status': 'healthy',
-        'message': 'API is running'
+        'message': 'API is running',
+        'tokenization': tokenizer.stats()
     }), 200
 
 if __name__ == '__main__':
@@ -1,21 +1,16 @@
-import sqlite3
 import os
-from datetime import datetime
+import sys
 
-DATABASE_PATH = 'payments.db'
+# apiversioning/ holds the shared package. database is the first module every
+# other module of this variant imports, so this is the only sys.path change.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.persistence import Migration, add_missing_columns, get_connection, run_migrations  # noqa: E402
 
-def get_db_connection():
-    """Create and return a database connection."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+DATABASE_PATH = 'payments.db'
 
-def init_db():
-    """Initialize the database with the payments table."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+# Schema history; the database records the last applied version in PRAGMA user_version
+MIGRATIONS = [
+    Migration(1, 'create payments table', '''
         CREATE TABLE IF NOT EXISTS payments (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             transaction_id TEXT UNIQUE NOT NULL,
@@ -27,32 +22,27 @@ def init_db():
             payment_token TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    '''),
+    # Databases created before v2 have neither column
+    Migration(2, 'add v2 columns code and payment_token',
+              add_missing_columns('payments', {'code': 'INTEGER', 'payment_token': 'TEXT'})),
+]
+
+def get_db_connection():
+    """Return a pooled database connection; conn.close() gives it back to the pool."""
+    return get_connection(DATABASE_PATH)
+
+def init_db():
+    """Initialize the database with the payments table."""
+    run_migrations(DATABASE_PATH, MIGRATIONS)
     print("Database initialized successfully!")
 
 def migrate_db():
-    """Migrate existing database to add new columns for v2."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Check if columns exist, if not add them
-    cursor.execute("PRAGMA table_info(payments)")
-    columns = [column[1] for column in cursor.fetchall()]
-    
-    if 'code' not in columns:
-        cursor.execute('ALTER TABLE payments ADD COLUMN code INTEGER')
-        print("Added 'code' column")
-    
-    if 'payment_token' not in columns:
-        cursor.execute('ALTER TABLE payments ADD COLUMN payment_token TEXT')
-        print("Added 'payment_token' column")
-    
-    # Migrate existing data: copy status_code to code
-    cursor.execute('UPDATE payments SET code = status_code WHERE code IS NULL')
+    """Apply pending schema migrations and fill v2's code for payments created through v1."""
+    run_migrations(DATABASE_PATH, MIGRATIONS)
     
+    conn = get_db_connection()
+    conn.execute('UPDATE payments SET code = status_code WHERE code IS NULL')
     conn.commit()
     conn.close()
     print("Database migration completed successfully!")
@@ -2,7 +2,10 @@ from flask import Blueprint, request, jsonify, url_for
 from database import get_db_connection
 from datetime import datetime
 import uuid
-import hashlib
+
+from shared.tokenization import get_tokenizer
+
+tokenizer = get_tokenizer(length=32)
 
 v2_bp = Blueprint('v2', __name__, url_prefix='/api/v2')
 
@@ -19,10 +22,8 @@ def generate_hateoas_links(transaction_id=None, base_url='/api/v2/transactions')
     return links
 
 def generate_payment_token(card_number):
-    """Generate a secure payment token from card number."""
-    # Simple tokenization: hash the card number
-    token = hashlib.sha256(card_number.encode()).hexdigest()[:32].upper()
-    return f"TOK-{token}"
+    """Generate a secure payment token from card number (shared keyed HMAC tokenizer, memoized)."""
+    return tokenizer.tokenize(card_number)
 
 def format_transaction_response(transaction):
     """Format a single transaction record with HATEOAS links (v2 format)."""
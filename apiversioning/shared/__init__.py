@@ -0,0 +1 @@
+"""Shared building blocks for the apiversioning variants (Routes, QueryVersioning, HeaderVersioning, AdapterTransformer)."""
@@ -0,0 +1,129 @@
+"""
+Benchmark: 100 parallel POSTs against each apiversioning variant.
+
+Every variant runs as its own threaded Flask dev server (one thread per
+request) on a copy of the apiversioning tree in a temp directory, so the
+checked-in databases are never touched. Reports wall time, p50 / p99 latency
+and failed requests (5xx, "database is locked", connection errors).
+
+Pass a second apiversioning tree to compare, e.g. the previous commit:
+    git worktree add /tmp/before HEAD~1
+    python shared/bench_concurrency.py --compare /tmp/before/apiversioning
+
+Usage:
+    python shared/bench_concurrency.py [--requests N] [--compare PATH]   (default: 100)
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+APIVERSIONING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN = "{setup}from app import {app}; {app_expr}.run(port={port}, use_reloader=False, threaded=True)"
+
+# name -> (directory, setup code, app import, app expression, POST path, headers)
+VARIANTS = {
+    'Routes': ('Routes', 'import database; database.init_db(); database.migrate_db(); ', 'app', 'app',
+               '/api/v1/payments', {}),
+    'QueryVersioning': ('QueryVersioning', '', 'app', 'app', '/api/payments?version=1', {}),
+    'HeaderVersioning': ('HeaderVersioning', '', 'app', 'app', '/api/payments', {'API-Version': '1'}),
+    'AdapterTransformer': ('AdapterTransformer', '', 'create_app', 'create_app()', '/api/v1/payments', {}),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def copy_tree(source, target):
+    shutil.copytree(source, target, ignore=shutil.ignore_patterns('*.db', '*.db-*', '__pycache__', 'venv'))
+    return target
+
+
+def start_server(tree, variant, port):
+    directory, setup, app, app_expr, _, _ = VARIANTS[variant]
+    code = RUN.format(setup=setup, app=app, app_expr=app_expr, port=port)
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=os.path.join(tree, directory),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{variant} did not start')
+
+
+def fire(port, variant, count):
+    _, _, _, _, path, headers = VARIANTS[variant]
+    url = f'http://127.0.0.1:{port}{path}'
+
+    def post(i):
+        body = {'amount': 10 + i, 'card_number': f'4111-1111-1111-{i:04d}', 'status': 'SUCCESS'}
+        started = time.perf_counter()
+        try:
+            ok = requests.post(url, json=body, headers=headers, timeout=30).status_code < 300
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(post, range(count)))
+        wall = time.perf_counter() - started
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'wall_ms': wall * 1000,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'failed': sum(1 for _, ok in results if not ok),
+    }
+
+
+def bench_tree(source, count):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = copy_tree(source, os.path.join(tmp, 'apiversioning'))
+        for variant in VARIANTS:
+            port = free_port()
+            process = start_server(tree, variant, port)
+            try:
+                fire(port, variant, 5)      # warm up imports and the first connections
+                results[variant] = fire(port, variant, count)
+            finally:
+                process.terminate()
+                process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--compare', help='another apiversioning tree, e.g. a worktree of the previous commit')
+    args = parser.parse_args()
+
+    trees = [('current', APIVERSIONING_DIR)] + ([('compare', args.compare)] if args.compare else [])
+    print(f"{args.requests} concurrent POSTs per variant")
+    print(f"{'variant':<20}{'tree':<10}{'wall ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'failed':>8}")
+    all_results = [(label, bench_tree(path, args.requests)) for label, path in trees]
+    for variant in VARIANTS:
+        for label, results in all_results:
+            r = results[variant]
+            print(f"{variant:<20}{label:<10}{r['wall_ms']:>10.0f}{r['p50_ms']:>10.1f}"
+                  f"{r['p99_ms']:>10.1f}{r['failed']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: per-request version dispatch overhead.
+
+Both apps serve the same stub views (no database, no JSON), so the difference
+is the routing itself:
+  - before: before_request hook normalizing the version into g, then an
+            if/elif chain on version, method and payment_id
+  - table:  VersionRouter (memoized alias lookup + one dict lookup, Vary header)
+
+Reports µs per request through the Flask test client, and the cost of the
+dispatch step alone inside one request context.
+
+Usage:
+    python shared/bench_dispatch.py [requests]     (default: 20000)
+"""
+import os
+import sys
+import time
+
+from flask import Flask, g, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.dispatch import VersionRouter  # noqa: E402
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+ROUNDS = 3
+
+
+def stub(*args):
+    return 'ok'
+
+
+def before_app():
+    app = Flask('before')
+
+    @app.before_request
+    def detect_version():
+        api_version = request.headers.get('API-Version', 'v1').lower()
+        if api_version in ['1', 'v1']:
+            g.api_version = 'v1'
+        elif api_version in ['2', 'v2']:
+            g.api_version = 'v2'
+        else:
+            g.api_version = 'v1'
+
+    @app.route('/api/payments', methods=['GET', 'POST'])
+    @app.route('/api/payments/<int:payment_id>', methods=['GET', 'DELETE'])
+    def route_to_version(payment_id=None):
+        if g.api_version == 'v2':
+            if request.method == 'GET':
+                if payment_id:
+                    return stub(payment_id)
+                else:
+                    return stub()
+            elif request.method == 'POST':
+                return stub()
+            elif request.method == 'DELETE':
+                return stub(payment_id)
+        else:
+            if request.method == 'GET':
+                if payment_id:
+                    return stub(payment_id)
+                else:
+                    return stub()
+            elif request.method == 'POST':
+                return stub()
+            elif request.method == 'DELETE':
+                return stub(payment_id)
+
+    return app, route_to_version, detect_version
+
+
+def table_app():
+    app = Flask('table')
+    router = VersionRouter(lambda: request.environ.get('HTTP_API_VERSION'), default='v1', vary='API-Version')
+    for version in ('v1', 'v2'):
+        router.register(version, {
+            ('GET', False): stub, ('GET', True): stub, ('POST', False): stub, ('DELETE', True): stub,
+        }, aliases=(version[1:],))
+    router.install(app, '/api/payments', '/api/payments/<int:payment_id>')
+    return app, router
+
+
+def best_of(func):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) / REQUESTS * 1e6
+
+
+def main():
+    old_app, old_view, old_hook = before_app()
+    new_app, router = table_app()
+    headers = {'API-Version': 'v2'}
+
+    def requests_to(app):
+        client = app.test_client()
+        return lambda: [client.get('/api/payments/5', headers=headers) for _ in range(REQUESTS)]
+
+    def dispatch_only(app, step):
+        def run():
+            with app.test_request_context('/api/payments/5', headers=headers):
+                for _ in range(REQUESTS):
+                    step()
+        return run
+
+    def old_step():
+        old_hook()
+        return old_view(5)
+
+    old_full, new_full = best_of(requests_to(old_app)), best_of(requests_to(new_app))
+    old_step_us = best_of(dispatch_only(old_app, old_step))
+    new_step_us = best_of(dispatch_only(new_app, lambda: router.dispatch(5)))
+    new_lookup_us = best_of(dispatch_only(
+        new_app, lambda: router.table[(router.resolve(request.environ.get('HTTP_API_VERSION')), request.method, True)]
+    ))
+
+    print(f"{REQUESTS} requests, best of {ROUNDS}")
+    print(f"{'':<28}{'before':>10}{'table':>10}")
+    print(f"{'full request (µs)':<28}{old_full:>10.2f}{new_full:>10.2f}")
+    print(f"{'dispatch step (µs)':<28}{old_step_us:>10.2f}{new_step_us:>10.2f}")
+    print(f"{'  of which lookup (µs)':<28}{'':>10}{new_lookup_us:>10.2f}")
+    print("\n'table' dispatch step includes building the response and the Vary / API-Version headers.")
+
+
+if __name__ == '__main__':
+    main()
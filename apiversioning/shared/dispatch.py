@@ -0,0 +1,112 @@
+"""
+Table-driven version dispatch for apps that serve every version on one URL
+(HeaderVersioning: API-Version header, QueryVersioning: ?version=).
+
+The dispatch table maps (version, HTTP method, has_id) to a view function.
+It is filled once at startup, so a request costs one alias lookup for the
+raw version value plus one table lookup, with no before_request hook and no
+if/elif chain. Adding a version is one register() call; the router itself
+never changes.
+
+Usage:
+    router = VersionRouter(lambda: request.headers.get('API-Version'), vary='API-Version')
+    router.register('v1', {
+        ('GET', False): v1.get_payments,
+        ('GET', True): v1.get_payment,
+        ('POST', False): v1.create_payment,
+        ('DELETE', True): v1.delete_payment,
+    }, aliases=('1',))
+    router.install(app, '/api/payments', '/api/payments/<int:payment_id>')
+"""
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from flask import jsonify, make_response, request
+
+ROUTED_METHODS = ['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+MAX_MEMOIZED_VALUES = 256   # distinct raw version values remembered
+
+
+class VersionRouter:
+    """
+    Dispatch table (version, method, has_id) -> view.
+
+    Args:
+        version_from: Returns the raw version value of the current request (or None)
+        default: Version used when the value is missing or unknown
+        vary: Request header the version comes from; added to Vary so shared
+              caches store each version separately (None for URL-based versions)
+    """
+
+    def __init__(self, version_from: Callable[[], Optional[str]], default: str = 'v1',
+                 vary: Optional[str] = None):
+        self.version_from = version_from
+        self.default = default
+        self.vary = vary
+        self.table: Dict[Tuple[str, str, bool], Callable] = {}
+        self.versions = []
+        self._aliases: Dict[str, str] = {}                    # lowercase alias -> version
+        self._memo: Dict[Optional[str], str] = {None: default}  # raw request value -> version
+        self._headers: Dict[str, Dict[str, str]] = {}          # version -> response headers
+        self._lock = threading.Lock()
+
+    def register(self, version: str, views: Dict[Tuple[str, bool], Callable], aliases: Iterable[str] = ()):
+        """Add a version: views maps (method, has_id) to a view function."""
+        for (method, has_id), view in views.items():
+            self.table[(version, method.upper(), has_id)] = view
+        if version not in self.versions:
+            self.versions.append(version)
+        self._headers[version] = {'API-Version': version, **({'Vary': self.vary} if self.vary else {})}
+        with self._lock:
+            for alias in (version, *aliases):
+                self._aliases[alias.lower()] = version
+            # A value that fell back to the default may now name this version
+            self._memo = {None: self.default}
+
+    def resolve(self, raw: Optional[str]) -> str:
+        """Map a raw version value ('2', 'V2', 'v2', None, ...) to a registered version."""
+        version = self._memo.get(raw)
+        if version is not None:
+            return version
+        version = self._aliases.get(raw.strip().lower(), self.default)
+        with self._lock:
+            if len(self._memo) < MAX_MEMOIZED_VALUES:
+                self._memo[raw] = version
+        return version
+
+    def allowed_methods(self, version: str, has_id: bool):
+        return sorted(method for (known, method, with_id) in self.table
+                      if known == version and with_id == has_id)
+
+    def dispatch(self, payment_id: Optional[int] = None):
+        """
+        Flask view: call the registered view for the request's version.
+
+        The version headers (API-Version, Vary) are precomputed per version and
+        returned as the headers element of the view's return tuple, so Flask
+        adds them while building the response it builds anyway.
+        """
+        version = self.resolve(self.version_from())
+        has_id = payment_id is not None
+        method = 'GET' if request.method == 'HEAD' else request.method
+        view = self.table.get((version, method, has_id))
+        if view is None:
+            headers = {**self._headers.get(version, {}),
+                       'Allow': ', '.join(self.allowed_methods(version, has_id))}
+            return jsonify({
+                'message': f'Method {method} not allowed for API version {version}',
+                'version': version
+            }), 405, headers
+        rv = view(payment_id) if has_id else view()
+        if isinstance(rv, tuple):
+            if len(rv) == 2 and isinstance(rv[1], int):
+                return rv[0], rv[1], self._headers[version]
+            response = make_response(rv)
+            response.headers.update(self._headers[version])
+            return response
+        return rv, self._headers[version]
+
+    def install(self, app, collection_rule: str, item_rule: str, endpoint: str = 'versioned'):
+        """Register the collection and item URL rules on app, both dispatched by this router."""
+        app.add_url_rule(collection_rule, endpoint, self.dispatch, methods=ROUTED_METHODS)
+        app.add_url_rule(item_rule, endpoint, self.dispatch, methods=ROUTED_METHODS)
@@ -0,0 +1,432 @@
+"""
+Benchmark and regression harness for the apiversioning variants.
+
+Replays a v1/v2 traffic mix (shared/traffic.py) against every variant, in
+two modes:
+  - inprocess: through Flask's test client (no sockets: measures the app)
+  - wsgi:      over real sockets, the app served by werkzeug's threaded
+               WSGI server in its own process, with --concurrency client
+               threads
+
+Each variant runs in its own subprocess on a copy of the apiversioning tree
+in a temp directory: the variants share module names (app, database, v1,
+v2), and the checked-in databases are never touched. Routes runs with
+IS_V2_ENABLED, so its v2 traffic is served rather than redirected.
+
+For every variant and mode the harness records throughput and p50 / p95 /
+p99 latency, overall and per endpoint ('v1 get', 'v2 list', ...), and
+compares them with a JSON baseline. The baseline holds absolute numbers, so
+it only means something on the machine and commit it was recorded on: it is
+not checked in (.gitignore), and is recorded with --record on the commit to
+compare against. The run fails (exit status 1) on any 5xx, on a throughput
+drop beyond --tolerance, or on a latency rise beyond --tolerance (and beyond
+--min-delta-ms): p50 and p95 in-process, p50 over wsgi. Each variant and
+mode runs --repeat times (3 by default), and every metric is the median over
+those runs. p99 and endpoints with fewer than MIN_SAMPLES requests are
+recorded but not gated, because they are too noisy. The baseline's traffic
+settings are reused unless overridden, so runs stay comparable.
+
+Usage:
+    python shared/harness.py --record      # on the base commit: record shared/perf_baseline.json
+    python shared/harness.py               # on the change: compare, exit 1 on regression
+    python shared/harness.py --variants Routes AdapterTransformer --modes inprocess
+        [--requests 2000] [--v2-share 0.5] [--mix get=60,list=25,create=10,delete=5]
+        [--concurrency 8] [--seed 1] [--repeat 3] [--tolerance 0.5] [--baseline PATH]
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.bench_concurrency import copy_tree, free_port  # noqa: E402
+from shared.traffic import OPERATIONS, VARIANTS, parse_mix, payment_body, request_for  # noqa: E402
+
+APIVERSIONING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(APIVERSIONING_DIR, 'shared', 'perf_baseline.json')
+MODES = ('inprocess', 'wsgi')
+DEFAULTS = {
+    'requests': 2000,
+    'v2_share': 0.5,
+    'mix': ','.join(f'{name}={weight}' for name, weight in OPERATIONS),
+    'concurrency': 8,
+    'warmup': 50,
+    'seed': 1,
+    'repeat': 3,
+}
+TOLERANCE = 0.5         # allowed relative throughput drop / latency rise
+MIN_DELTA_MS = 0.5      # latency rises smaller than this never fail a run
+MIN_SAMPLES = 50        # endpoints with fewer requests per run are reported, not gated
+# Over sockets the server is saturated by the client threads, so its tail is queueing
+# jitter; wsgi gates the median only
+GATED_LATENCIES = {'inprocess': ('p50_ms', 'p95_ms'), 'wsgi': ('p50_ms',)}
+
+# Code run in the variant's directory to build its app (bound to `app`)
+APPS = {
+    'Routes': 'import database; database.init_db(); database.migrate_db()\n'
+              'import app as module\n'
+              'module.IS_V2_ENABLED = True\n'
+              'app = module.app',
+    'QueryVersioning': 'from app import app',
+    'HeaderVersioning': 'from app import app',
+    'AdapterTransformer': 'from app import create_app\n'
+                          'app = create_app()',
+}
+
+
+# ============================================================================
+# Child: one variant, one mode
+# ============================================================================
+
+class InProcessClient:
+    """Requests through Flask's test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, params, headers, body=None):
+        response = self.client.open(path, method=method, query_string=params, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class SocketClient:
+    """
+    Requests over HTTP to the app served by werkzeug's threaded WSGI server,
+    in a separate process so client threads do not compete with it for the GIL.
+    Each client thread keeps one HTTP/1.1 connection (http.client: the
+    requests library would add ~2 ms of client time to every measurement).
+    """
+
+    def __init__(self, variant: str):
+        port = free_port()
+        self.server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--serve', variant, '--port', str(port)],
+            stdout=subprocess.DEVNULL
+        )
+        self.port = port
+        self.local = threading.local()
+        deadline = time.time() + 30
+        while True:
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                    break
+            except OSError:
+                if time.time() > deadline or self.server.poll() is not None:
+                    self.close()
+                    raise RuntimeError(f'{variant} did not start')
+                time.sleep(0.1)
+
+    def request(self, method, path, params, headers, body=None):
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        headers = dict(headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            conn = getattr(self.local, 'conn', None)
+            if conn is None:
+                conn = self.local.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            try:
+                conn.request(method, path, payload, headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # The server closed the kept-alive connection: reconnect once
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    return 599, None
+        try:
+            return response.status, json.loads(data)
+        except ValueError:
+            return response.status, None
+
+    def close(self):
+        self.server.terminate()
+        self.server.wait()
+
+
+def percentile_ms(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+def summarize(latencies: List[float], wall: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'throughput_rps': round(len(ordered) / wall, 1),
+        'p50_ms': round(percentile_ms(ordered, 0.50), 3),
+        'p95_ms': round(percentile_ms(ordered, 0.95), 3),
+        'p99_ms': round(percentile_ms(ordered, 0.99), 3),
+    }
+
+
+def replay(client, variant: str, config: Dict[str, Any], concurrency: int) -> Dict[str, Any]:
+    """Replay config['requests'] requests of the mix; returns overall and per-endpoint stats."""
+    rng = random.Random(config['seed'])
+    lock = threading.Lock()
+    ids: List[int] = []
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+
+    def send(version, operation, payment_id=None):
+        method = {'get': 'GET', 'list': 'GET', 'create': 'POST', 'delete': 'DELETE'}[operation]
+        path, params, headers = request_for(variant, version, payment_id)
+        with lock:
+            body = payment_body(rng) if operation == 'create' else None
+        started = time.perf_counter()
+        status, data = client.request(method, path, params, headers, body)
+        elapsed = time.perf_counter() - started
+        if operation == 'create' and status < 300:
+            data = (data or {}).get('data')
+            if isinstance(data, dict) and 'id' in data:
+                with lock:
+                    ids.append(data['id'])
+        return elapsed, status
+
+    def step(planned):
+        nonlocal errors
+        version, operation = planned
+        with lock:
+            payment_id = rng.choice(ids) if ids else None
+            if operation == 'delete' and payment_id is not None:
+                ids.remove(payment_id)
+        if operation in ('get', 'delete') and payment_id is None:
+            operation = 'create'
+        elapsed, status = send(version, operation, payment_id if operation in ('get', 'delete') else None)
+        with lock:
+            latencies[f'{version} {operation}'].append(elapsed)
+            errors += status >= 500
+
+    # Untimed warm-up: payments to read, imports, first connections
+    for i in range(config['warmup']):
+        send('v1' if i % 2 else 'v2', 'create')
+
+    mix = parse_mix(config['mix'])
+    plan = [('v2' if rng.random() < config['v2_share'] else 'v1',
+             rng.choices([name for name, _ in mix], [weight for _, weight in mix])[0])
+            for _ in range(config['requests'])]
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(step, plan))
+    else:
+        for planned in plan:
+            step(planned)
+    wall = time.perf_counter() - started
+
+    result = summarize([latency for values in latencies.values() for latency in values], wall)
+    result['errors'] = errors
+    result['endpoints'] = {label: summarize(values, wall) for label, values in sorted(latencies.items())}
+    return result
+
+
+def build_app(variant: str):
+    """Build the variant's app from the current directory (its databases are created there)."""
+    sys.path.insert(0, os.getcwd())
+    namespace: Dict[str, Any] = {}
+    exec(APPS[variant], namespace)
+    return namespace['app']
+
+
+def serve(variant: str, port: int):
+    """Serve the variant's app with werkzeug's threaded WSGI server until terminated."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'   # keep-alive, like a production server
+
+        def log_request(self, *args, **kwargs):
+            pass    # one stderr line per request would skew the timings
+
+    make_server('127.0.0.1', port, build_app(variant), threaded=True,
+                request_handler=QuietRequestHandler).serve_forever()
+
+
+def run_child(variant: str, mode: str, config: Dict[str, Any], out: str):
+    """Replay the mix against the variant's app (built in the current directory)."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        client = InProcessClient(build_app(variant)) if mode == 'inprocess' else SocketClient(variant)
+        try:
+            result = replay(client, variant, config, 1 if mode == 'inprocess' else config['concurrency'])
+        finally:
+            client.close()
+    with open(out, 'w') as f:
+        json.dump(result, f)
+
+
+# ============================================================================
+# Parent: run every variant / mode, compare with the baseline
+# ============================================================================
+
+def run_variant(tree: str, variant: str, mode: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    out = os.path.join(tree, f'{variant}-{mode}.json')
+    process = subprocess.run(
+        [sys.executable, os.path.join(tree, 'shared', 'harness.py'), '--child', variant, '--mode', mode,
+         '--config', json.dumps(config), '--out', out],
+        cwd=os.path.join(tree, variant), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f'{variant} ({mode}) failed:\n{process.stderr[-2000:]}')
+    with open(out) as f:
+        return json.load(f)
+
+
+def median_of_runs(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median of every metric over repeated runs (overall and per endpoint)."""
+    def median(values):
+        return sorted(values)[len(values) // 2]
+
+    merged = {key: median([run[key] for run in runs]) for key in runs[0] if key != 'endpoints'}
+    labels = sorted({label for run in runs for label in run['endpoints']})
+    merged['endpoints'] = {}
+    for label in labels:
+        stats = [run['endpoints'][label] for run in runs if label in run['endpoints']]
+        merged['endpoints'][label] = {key: median([s[key] for s in stats]) for key in stats[0]}
+    return merged
+
+
+def run_all(config: Dict[str, Any], variants: List[str], modes: List[str]) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for variant in variants:
+        for mode in modes:
+            runs = []
+            for _ in range(config['repeat']):
+                # A fresh copy per run, so every run starts from the same empty databases
+                with tempfile.TemporaryDirectory() as tmp:
+                    tree = copy_tree(APIVERSIONING_DIR, os.path.join(tmp, 'apiversioning'))
+                    runs.append(run_variant(tree, variant, mode, config))
+            results.setdefault(variant, {})[mode] = median_of_runs(runs)
+    return results
+
+
+def compare(baseline: Dict[str, Any], results: Dict[str, Dict[str, Any]],
+            tolerance: float = TOLERANCE, min_delta_ms: float = MIN_DELTA_MS) -> List[str]:
+    """Regressions of results against the baseline's results, as readable lines."""
+    regressions = []
+    for variant, modes in results.items():
+        for mode, current in modes.items():
+            name = f'{variant} ({mode})'
+            if current['errors']:
+                regressions.append(f"{name}: {current['errors']} server errors")
+            base = baseline.get(variant, {}).get(mode)
+            if base is None:
+                continue
+            if current['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+                regressions.append(f"{name}: throughput {current['throughput_rps']:.0f} req/s, "
+                                   f"baseline {base['throughput_rps']:.0f}")
+            for label, stats in [('all', current), *current['endpoints'].items()]:
+                base_stats = base if label == 'all' else base['endpoints'].get(label)
+                if base_stats is None or min(stats['requests'], base_stats['requests']) < MIN_SAMPLES:
+                    continue
+                for key in GATED_LATENCIES[mode]:
+                    now, before = stats[key], base_stats[key]
+                    if now > before * (1 + tolerance) and now - before > min_delta_ms:
+                        regressions.append(f"{name} {label}: {key} {now:.2f} ms, baseline {before:.2f}")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]):
+    print(f"{'variant':<20}{'mode':<11}{'endpoint':<11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'base p95':>10}")
+    for variant, modes in results.items():
+        for mode, result in modes.items():
+            base = (baseline or {}).get(variant, {}).get(mode) or {}
+            rows = [('all', result, base)] + [
+                (label, stats, base.get('endpoints', {}).get(label, {}))
+                for label, stats in result['endpoints'].items()
+            ]
+            for label, stats, base_stats in rows:
+                before = f"{base_stats['p95_ms']:>10.3f}" if base_stats else f"{'-':>10}"
+                print(f"{variant:<20}{mode:<11}{label:<11}{stats['throughput_rps']:>9.0f}{stats['p50_ms']:>9.3f}"
+                      f"{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}{before}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every apiversioning variant against a baseline')
+    parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--requests', type=int)
+    parser.add_argument('--v2-share', type=float)
+    parser.add_argument('--mix', help='operation weights, e.g. get=60,list=25,create=10,delete=5')
+    parser.add_argument('--concurrency', type=int, help='client threads in wsgi mode')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--repeat', type=int, help='runs per variant and mode (metrics are their median)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--record', action='store_true', help='write the results as the local baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_MS)
+    # Internal: run one variant / mode in this process
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--config', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    parser.add_argument('--serve', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+    if args.child:
+        run_child(args.child, args.mode, json.loads(args.config), args.out)
+        return
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    overrides = {key: getattr(args, key) for key in DEFAULTS if getattr(args, key, None) is not None}
+    parse_mix(overrides.get('mix', DEFAULTS['mix']))     # fail early on a bad --mix
+    config = {**DEFAULTS, **((baseline or {}).get('config') or {}), **overrides}
+    if baseline and not args.record and config != baseline.get('config'):
+        print("⚠️  Traffic settings differ from the baseline's: latencies are not comparable")
+
+    print(f"{config['requests']} requests per variant and mode, v2 share {config['v2_share']:.0%}, "
+          f"mix {config['mix']}, {config['concurrency']} client threads (wsgi)\n")
+    results = run_all(config, args.variants, args.modes)
+
+    if args.record:
+        print_report(results, None)
+        saved = (baseline or {}).get('results', {}) if baseline and baseline.get('config') == config else {}
+        for variant, modes in results.items():
+            saved.setdefault(variant, {}).update(modes)
+        with open(args.baseline, 'w') as f:
+            json.dump({'config': config, 'results': saved}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return
+
+    print_report(results, baseline and baseline['results'])
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; record one on this machine with --record")
+        return
+    regressions = compare(baseline['results'], results, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"\n✅ No regression beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == '__main__':
+    main()
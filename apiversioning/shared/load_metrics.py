@@ -0,0 +1,121 @@
+"""
+Load generator for the /metrics endpoint of a running apiversioning app.
+
+Sends a v1/v2 mix of list / get / create / delete requests to one variant,
+then reads its /metrics and prints, per version and endpoint, the request
+count, mean latency and mean time spent in each phase (db, transform,
+serialize).
+
+Start the variant first, e.g.:
+    cd AdapterTransformer && python app.py
+
+Usage:
+    python shared/load_metrics.py VARIANT [--base-url URL] [--requests N]
+                                          [--v2-share 0.5] [--workers 8]
+    VARIANT: Routes | QueryVersioning | HeaderVersioning | AdapterTransformer
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.traffic import DEFAULT_PORTS, OPERATIONS, payment_body, request_for  # noqa: E402
+
+
+class Load:
+    def __init__(self, variant: str, base_url: str, v2_share: float):
+        self.variant = variant
+        self.base_url = base_url.rstrip('/')
+        self.v2_share = v2_share
+        self.session = requests.Session()
+        self.ids = []
+        self.lock = threading.Lock()
+
+    def call(self, method, version, payment_id=None, body=None):
+        path, params, headers = request_for(self.variant, version, payment_id)
+        return self.session.request(method, self.base_url + path, params=params, headers=headers,
+                                    json=body, allow_redirects=False, timeout=30)
+
+    def create(self, version):
+        response = self.call('POST', version, body=payment_body(random))
+        data = response.json().get('data') if response.ok else None
+        if isinstance(data, dict) and 'id' in data:
+            with self.lock:
+                self.ids.append(data['id'])
+
+    def step(self, _):
+        version = 'v2' if random.random() < self.v2_share else 'v1'
+        operation = random.choices([name for name, _ in OPERATIONS], [w for _, w in OPERATIONS])[0]
+        with self.lock:
+            payment_id = random.choice(self.ids) if self.ids else None
+            if operation == 'delete' and payment_id is not None:
+                self.ids.remove(payment_id)
+        if operation == 'create' or payment_id is None:
+            self.create(version)
+        elif operation == 'list':
+            self.call('GET', version)
+        elif operation == 'get':
+            self.call('GET', version, payment_id)
+        else:
+            self.call('DELETE', version, payment_id)
+
+
+def summarize(metrics_text: str, variant: str):
+    """Print count, mean latency and mean phase times per (version, method, endpoint)."""
+    rows = defaultdict(lambda: defaultdict(float))
+    phases = defaultdict(lambda: defaultdict(float))
+    for family in text_string_to_metric_families(metrics_text):
+        for sample in family.samples:
+            labels = sample.labels
+            if labels.get('variant') != variant:
+                continue
+            if sample.name == 'api_request_duration_seconds_count':
+                rows[(labels['version'], labels['method'], labels['endpoint'])]['count'] += sample.value
+            elif sample.name == 'api_request_duration_seconds_sum':
+                rows[(labels['version'], labels['method'], labels['endpoint'])]['latency'] += sample.value
+            elif sample.name == 'api_phase_duration_seconds_sum':
+                # Phases are labelled by endpoint only; split them across its methods below
+                phases[(labels['version'], labels['endpoint'])][labels['phase']] += sample.value
+
+    print(f"{'version':<9}{'method':<8}{'endpoint':<44}{'requests':>9}{'mean ms':>9}")
+    for (version, method, endpoint), row in sorted(rows.items()):
+        print(f"{version:<9}{method:<8}{endpoint:<44}{int(row['count']):>9}"
+              f"{row['latency'] / (row['count'] or 1) * 1000:>9.3f}")
+
+    print(f"\nmean ms per request{'':<3}{'endpoint':<44}{'db':>8}{'transf':>8}{'serial':>8}")
+    for (version, endpoint), totals in sorted(phases.items()):
+        count = sum(row['count'] for (v, _, e), row in rows.items() if (v, e) == (version, endpoint)) or 1
+        means = ''.join(f"{totals[phase] / count * 1000:>8.3f}" for phase in ('db', 'transform', 'serialize'))
+        print(f"{version:<22}{endpoint:<44}{means}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('variant', choices=sorted(DEFAULT_PORTS))
+    parser.add_argument('--base-url')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--v2-share', type=float, default=0.5)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    base_url = args.base_url or f"http://localhost:{DEFAULT_PORTS[args.variant]}"
+    load = Load(args.variant, base_url, args.v2_share)
+    for version in ('v1', 'v2'):
+        for _ in range(10):
+            load.create(version)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(load.step, range(args.requests)))
+
+    print(f"{args.requests} requests to {args.variant} at {base_url} (v2 share {args.v2_share:.0%})\n")
+    summarize(requests.get(f"{base_url}/metrics", timeout=30).text, args.variant)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Per-version traffic and latency metrics for the apiversioning apps, exported
+at /metrics in the Prometheus text format (prometheus_client).
+
+    api_requests_total{variant, version, endpoint, method, status}
+    api_request_duration_seconds{variant, version, endpoint, method}
+    api_phase_duration_seconds{variant, version, endpoint, phase}
+
+`endpoint` is the URL rule ('/api/v1/payments/<int:payment_id>'), not the
+path, so ids do not create new series. Phases are summed per request and
+observed once per request:
+  - db:        time pooled SQLite connections are checked out
+               (shared.persistence release listener)
+  - transform: functions decorated with @timed_phase('transform')
+               (the AdapterTransformer adapters)
+  - serialize: JSON encoding through the app's JSON provider (jsonify)
+
+Usage:
+    from shared.metrics import install_metrics
+    install_metrics(app, 'HeaderVersioning', version_of=lambda: router.resolve(router.version_from()))
+"""
+import functools
+import re
+import time
+from typing import Callable, Optional
+
+from flask import Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+from shared.persistence import add_release_listener
+
+LATENCY_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+PHASE_BUCKETS = (.00002, .00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .5)
+PHASES = ('db', 'transform', 'serialize')
+
+REQUEST_COUNT = Counter(
+    'api_requests_total',
+    'HTTP requests by API version',
+    ['variant', 'version', 'endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds',
+    'HTTP request latency in seconds by API version',
+    ['variant', 'version', 'endpoint', 'method'],
+    buckets=LATENCY_BUCKETS
+)
+PHASE_LATENCY = Histogram(
+    'api_phase_duration_seconds',
+    'Time per request spent in the db, transform and serialize phases',
+    ['variant', 'version', 'endpoint', 'phase'],
+    buckets=PHASE_BUCKETS
+)
+
+_PATH_VERSION = re.compile(r'^/api/(v\d+)(?:/|$)')
+
+
+def version_from_path() -> str:
+    """Version of URL-versioned apps (/api/v1/..., /api/v2/...)."""
+    match = _PATH_VERSION.match(request.path)
+    return match.group(1) if match else 'unversioned'
+
+
+def record_phase(phase: str, seconds: float):
+    """Add time spent in a phase to the current request (no-op outside requests)."""
+    if has_request_context():
+        phases = g.get('_metrics_phases')
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+def timed_phase(phase: str):
+    """Decorator: count the wrapped call's duration towards `phase` of the current request."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_phase(phase, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, with encoding time counted as the serialize phase."""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            record_phase('serialize', time.perf_counter() - started)
+
+
+add_release_listener(lambda seconds: record_phase('db', seconds))
+
+
+def install_metrics(app, variant: str, version_of: Optional[Callable[[], str]] = None,
+                    path: str = '/metrics'):
+    """
+    Record request metrics for every request of app and serve them at `path`.
+
+    Install before other before_request hooks (e.g. a redirecting feature
+    toggle) so their short-circuited requests are timed too.
+
+    Args:
+        app: Flask app
+        variant: Value of the variant label (e.g. 'HeaderVersioning')
+        version_of: Returns the API version of the current request
+                    (default: the /api/vN/ prefix of the path)
+    """
+    version_of = version_of or version_from_path
+    json_provider = TimedJSONProvider(app)
+    json_provider.sort_keys = app.json.sort_keys
+    json_provider.compact = app.json.compact
+    app.json = json_provider
+
+    @app.before_request
+    def start_request_metrics():
+        if request.path != path:
+            g._metrics_started = time.perf_counter()
+            g._metrics_phases = {}
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        version = version_of() or 'unversioned'
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_COUNT.labels(variant, version, endpoint, request.method, str(response.status_code)).inc()
+        REQUEST_LATENCY.labels(variant, version, endpoint, request.method).observe(elapsed)
+        for phase, seconds in g.pop('_metrics_phases', {}).items():
+            PHASE_LATENCY.labels(variant, version, endpoint, phase).observe(seconds)
+        return response
+
+    def metrics_endpoint():
+        """Expose Prometheus metrics"""
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule(path, 'metrics', metrics_endpoint, methods=['GET'])
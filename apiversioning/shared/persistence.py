@@ -0,0 +1,227 @@
+"""
+SQLite persistence shared by every apiversioning variant.
+
+- Pooled connections: get_connection(db_path) hands out a connection that no
+  other thread is using, and conn.close() returns it to the pool instead of
+  closing it. Call sites keep the usual `conn = get_db_connection() ...
+  conn.close()` shape, and one connection serves many requests.
+- Every connection runs in WAL mode (readers never block the writer) with a
+  busy timeout (writers wait for each other instead of failing with
+  "database is locked") and a statement cache, which only pays off now that
+  connections outlive a single request.
+- Migrations: run_migrations() applies numbered steps once per database and
+  records the schema version in PRAGMA user_version, replacing ad-hoc
+  PRAGMA table_info checks on every startup.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Sequence, Union
+
+POOL_SIZE = 8               # idle connections kept per database
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool."""
+
+    pool: 'ConnectionPool' = None
+    checked_out = False
+    acquired_at = 0.0
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def close_for_real(self):
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Idle SQLite connections for one database file, shared by all threads.
+
+    A connection is used by one thread at a time. When every pooled connection
+    is busy a new one is opened instead of waiting; on release at most
+    `size` idle connections are kept. A connection that is never released is
+    simply closed by the garbage collector.
+    """
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle: List[PooledConnection] = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _connect(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=PooledConnection,
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        conn.pool = self
+        self.opened += 1
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.reused += 1
+        if conn is None:
+            conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        conn.checked_out = True
+        conn.acquired_at = time.perf_counter()
+        return conn
+
+    def release(self, conn: PooledConnection):
+        if not conn.checked_out:
+            return      # closed twice
+        conn.checked_out = False
+        held = time.perf_counter() - conn.acquired_at
+        # Undo per-use changes so the next user gets a clean connection
+        if conn.in_transaction:
+            conn.rollback()
+        conn.isolation_level = ''
+        for listener in _release_listeners:
+            listener(held)
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close_for_real()
+
+    def close(self):
+        """Close idle connections (e.g. before deleting the database file)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close_for_real()
+
+    def stats(self) -> Dict[str, int]:
+        return {'opened': self.opened, 'reused': self.reused, 'idle': len(self._idle)}
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_release_listeners: List[Callable[[float], None]] = []
+
+
+def add_release_listener(listener: Callable[[float], None]):
+    """Call listener(seconds) whenever a connection returns to a pool, with how long it was held."""
+    _release_listeners.append(listener)
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Return the pool for db_path (one pool per database file)."""
+    path = os.path.abspath(db_path)
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+def get_connection(db_path: str) -> PooledConnection:
+    """Pooled connection to db_path with rows as sqlite3.Row; conn.close() returns it."""
+    return get_pool(db_path).acquire()
+
+
+def close_pool(db_path: str):
+    """Close the idle connections of db_path's pool."""
+    pool = _pools.get(os.path.abspath(db_path))
+    if pool is not None:
+        pool.close()
+
+
+# ---------------------------
+# Migrations
+# ---------------------------
+class Migration(NamedTuple):
+    """
+    One schema step.
+
+    Attributes:
+        version: Schema version after this step (1, 2, ... in order)
+        description: Shown when the step is applied
+        apply: SQL script, or a function taking the connection
+    """
+    version: int
+    description: str
+    apply: Union[str, Callable[[sqlite3.Connection], None]]
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def add_missing_columns(table: str, columns: Dict[str, str]) -> Callable[[sqlite3.Connection], None]:
+    """
+    Migration step adding columns (name -> declaration) absent from table.
+    For databases created before the migration runner, whose schema may
+    already include some of the columns.
+    """
+    def apply(conn: sqlite3.Connection):
+        existing = table_columns(conn, table)
+        for name, declaration in columns.items():
+            if name not in existing:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {declaration}')
+    return apply
+
+
+def run_migrations(db_path: str, migrations: Sequence[Migration], verbose: bool = True) -> List[int]:
+    """
+    Apply the migrations newer than the database's user_version, in order.
+
+    Each step runs in its own transaction together with the user_version bump,
+    so a failing step leaves the database at the previous version. The write
+    lock is taken up front, so two processes starting at once apply each step
+    only once.
+
+    Returns:
+        Versions applied by this call (empty if the schema was up to date)
+    """
+    versions = [migration.version for migration in migrations]
+    if versions != sorted(set(versions)) or (versions and versions[0] < 1):
+        raise ValueError('Migration versions must be unique, ascending and start at 1 or more')
+
+    conn = get_connection(db_path)
+    applied = []
+    try:
+        conn.isolation_level = None
+        for migration in migrations:
+            conn.execute('BEGIN IMMEDIATE')
+            current = conn.execute('PRAGMA user_version').fetchone()[0]
+            if migration.version <= current:
+                conn.execute('ROLLBACK')
+                continue
+            try:
+                if callable(migration.apply):
+                    migration.apply(conn)
+                else:
+                    for statement in migration.apply.split(';'):
+                        if statement.strip():
+                            conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(migration.version)}')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            applied.append(migration.version)
+            if verbose:
+                print(f"Applied migration {migration.version}: {migration.description}")
+    finally:
+        conn.close()
+    return applied
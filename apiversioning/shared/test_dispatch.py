@@ -0,0 +1,104 @@
+"""
+Tests for the table-driven version router.
+Run: python shared/test_dispatch.py
+"""
+import os
+import sys
+import tempfile
+
+from flask import Flask, jsonify, request
+
+APIVERSIONING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APIVERSIONING_DIR)
+from shared.dispatch import VersionRouter  # noqa: E402
+
+
+def make_app():
+    app = Flask(__name__)
+    router = VersionRouter(lambda: request.headers.get('API-Version'), default='v1', vary='API-Version')
+    for version in ('v1', 'v2'):
+        router.register(version, {
+            ('GET', False): lambda version=version: jsonify({'version': version, 'kind': 'list'}),
+            ('GET', True): lambda payment_id, version=version: jsonify({'version': version, 'id': payment_id}),
+            ('POST', False): lambda version=version: (jsonify({'version': version}), 201),
+        }, aliases=(version[1:],))
+    router.install(app, '/api/payments', '/api/payments/<int:payment_id>')
+    return app, router
+
+
+def test_dispatch_and_aliases():
+    app, _ = make_app()
+    client = app.test_client()
+    for raw, expected in [(None, 'v1'), ('1', 'v1'), ('v2', 'v2'), ('V2', 'v2'), (' 2 ', 'v2'), ('9', 'v1')]:
+        headers = {'API-Version': raw} if raw is not None else {}
+        response = client.get('/api/payments', headers=headers)
+        assert response.get_json()['version'] == expected, (raw, response.get_json())
+        assert response.headers['API-Version'] == expected
+    assert client.get('/api/payments/0', headers={'API-Version': '2'}).get_json() == {'version': 'v2', 'id': 0}
+    assert client.post('/api/payments', headers={'API-Version': 'v2'}).status_code == 201
+    assert client.head('/api/payments').status_code == 200, "HEAD is served by the GET view"
+    print("✅ dispatch by version, method and id; aliases and default")
+
+
+def test_vary_header():
+    app, _ = make_app()
+    response = app.test_client().get('/api/payments', headers={'API-Version': 'v2'})
+    assert 'API-Version' in response.headers.get('Vary', ''), "Shared caches must key on the version header"
+    print("✅ Vary: API-Version")
+
+
+def test_method_not_allowed():
+    app, _ = make_app()
+    response = app.test_client().delete('/api/payments/1', headers={'API-Version': 'v1'})
+    assert response.status_code == 405
+    assert response.headers['Allow'] == 'GET'
+    print("✅ 405 with Allow for methods missing from the table")
+
+
+def test_synthetic_v3_without_router_changes():
+    app, router = make_app()
+    client = app.test_client()
+    assert client.get('/api/payments', headers={'API-Version': '3'}).get_json()['version'] == 'v1'
+
+    router.register('v3', {
+        ('GET', False): lambda: jsonify({'version': 'v3', 'items': []}),
+        ('PUT', True): lambda payment_id: jsonify({'version': 'v3', 'replaced': payment_id}),
+    }, aliases=('3',))
+
+    assert client.get('/api/payments', headers={'API-Version': '3'}).get_json()['version'] == 'v3', \
+        "Values memoized as the default before v3 existed resolve to v3 now"
+    assert client.put('/api/payments/7', headers={'API-Version': 'v3'}).get_json()['replaced'] == 7
+    assert client.put('/api/payments/7', headers={'API-Version': 'v2'}).status_code == 405
+    print("✅ synthetic v3 registered without touching the router")
+
+
+def test_header_versioning_app_v3():
+    """Add a v3 to the real HeaderVersioning app through its router, on a scratch database."""
+    sys.path.insert(0, os.path.join(APIVERSIONING_DIR, 'HeaderVersioning'))
+    import database
+    with tempfile.TemporaryDirectory() as tmp:
+        # Point the app at a temporary database before importing it: app import
+        # runs init_db() and seed_sample_data(), which must not touch payments_header.db
+        database.DB_PATH = os.path.join(tmp, 'payments_header.db')
+        try:
+            import app as header_app
+            header_app.router.register('v3', {
+                ('GET', False): lambda: jsonify({'code': 200, 'version': 'v3', 'data': []}),
+            }, aliases=('3',))
+            client = header_app.app.test_client()
+            v3 = client.get('/api/payments', headers={'API-Version': '3'})
+            assert v3.get_json()['version'] == 'v3' and 'API-Version' in v3.headers['Vary']
+            v2 = client.get('/api/payments', headers={'API-Version': '2'})
+            assert v2.status_code == 200 and 'code' in v2.get_json(), "Existing versions are unaffected"
+            assert client.get('/api/health', headers={'API-Version': 'v2'}).get_json()['version'] == 'v2'
+        finally:
+            database.close_pool(database.DB_PATH)
+    print("✅ HeaderVersioning app serves a registered v3")
+
+if __name__ == '__main__':
+    test_dispatch_and_aliases()
+    test_vary_header()
+    test_method_not_allowed()
+    test_synthetic_v3_without_router_changes()
+    test_header_versioning_app_v3()
+    print("\nAll dispatch tests passed")
@@ -0,0 +1,61 @@
+"""
+Tests for the benchmark harness: traffic mix parsing and the baseline gate.
+Run: python shared/test_harness.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.harness import compare, median_of_runs  # noqa: E402
+from shared.traffic import parse_mix, request_for  # noqa: E402
+
+
+def result(rps=1000.0, p50=1.0, p95=2.0, errors=0, requests=500):
+    stats = {'requests': requests, 'throughput_rps': rps, 'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p95 * 2}
+    return {**stats, 'errors': errors, 'endpoints': {'v1 get': dict(stats)}}
+
+
+def test_parse_mix():
+    assert parse_mix('get=60,list=25,create=10,delete=5') == [('get', 60), ('list', 25), ('create', 10), ('delete', 5)]
+    for bad in ('get=60,fetch=40', 'get=abc', 'get'):
+        try:
+            parse_mix(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} should be rejected")
+    print("✅ parse_mix reads weights and rejects unknown operations")
+
+
+def test_request_for():
+    assert request_for('Routes', 'v2', 7) == ('/api/v2/transactions/7', {}, {})
+    assert request_for('AdapterTransformer', 'v1') == ('/api/v1/payments', {}, {})
+    assert request_for('QueryVersioning', 'v1', 7) == ('/api/payments/7', {'version': '1'}, {})
+    assert request_for('HeaderVersioning', 'v2') == ('/api/payments', {}, {'API-Version': 'v2'})
+    print("✅ request_for speaks each variant's versioning scheme")
+
+
+def test_compare():
+    baseline = {'Routes': {'inprocess': result(), 'wsgi': result(p50=20.0, p95=30.0)}}
+    assert compare(baseline, {'Routes': {'inprocess': result(rps=800, p50=1.3)}}) == []
+    assert len(compare(baseline, {'Routes': {'inprocess': result(rps=400)}})) == 1, "throughput drop"
+    assert len(compare(baseline, {'Routes': {'inprocess': result(p95=4.0)}})) == 2, "p95 rise, overall and endpoint"
+    assert compare(baseline, {'Routes': {'inprocess': result(p50=1.4, p95=2.9)}}, min_delta_ms=1.0) == []
+    assert compare(baseline, {'Routes': {'inprocess': result(p95=4.0, requests=10)}}) == [], "too few samples"
+    assert compare(baseline, {'Routes': {'wsgi': result(p50=20.0, p95=90.0)}}) == [], "wsgi tail is not gated"
+    assert compare(baseline, {'Routes': {'inprocess': result(errors=3)}}) == ['Routes (inprocess): 3 server errors']
+    assert compare({}, {'Routes': {'inprocess': result(p95=100.0)}}) == [], "no baseline, nothing to compare"
+    print("✅ compare gates throughput, latency and server errors")
+
+
+def test_median_of_runs():
+    merged = median_of_runs([result(p50=1.0), result(p50=9.0), result(p50=2.0)])
+    assert merged['p50_ms'] == 2.0 and merged['endpoints']['v1 get']['p50_ms'] == 2.0
+    print("✅ repeated runs merge to their median")
+
+
+if __name__ == '__main__':
+    test_parse_mix()
+    test_request_for()
+    test_compare()
+    test_median_of_runs()
+    print("\nAll harness tests passed")
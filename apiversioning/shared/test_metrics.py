@@ -0,0 +1,89 @@
+"""
+Tests for the shared per-version request metrics.
+Run: python shared/test_metrics.py
+"""
+import os
+import sys
+import tempfile
+
+from flask import Flask, jsonify, request
+from prometheus_client.parser import text_string_to_metric_families
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.metrics import install_metrics, timed_phase  # noqa: E402
+from shared.persistence import get_connection  # noqa: E402
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'metrics.db')
+
+
+@timed_phase('transform')
+def to_v2(row):
+    return {'id': row[0], 'code': 200}
+
+
+def make_app(variant, version_of=None):
+    app = Flask(__name__)
+    install_metrics(app, variant, version_of)
+
+    @app.route('/api/v1/payments/<int:payment_id>')
+    def get_v1(payment_id):
+        return jsonify({'id': payment_id})
+
+    @app.route('/api/v2/transactions/<int:payment_id>')
+    def get_v2(payment_id):
+        conn = get_connection(DB_PATH)
+        row = conn.execute('SELECT ?', (payment_id,)).fetchone()
+        conn.close()
+        return jsonify(to_v2(row))
+
+    @app.route('/api/payments')
+    def by_header():
+        return jsonify([])
+
+    return app
+
+
+def samples(app, name, variant):
+    text = app.test_client().get('/metrics').get_data(as_text=True)
+    return [s for family in text_string_to_metric_families(text) for s in family.samples
+            if s.name == name and s.labels.get('variant') == variant]
+
+
+def test_counts_by_version_endpoint_status():
+    app = make_app('PathTest')
+    client = app.test_client()
+    client.get('/api/v1/payments/1')
+    client.get('/api/v1/payments/2')
+    client.get('/api/v2/transactions/3')
+    client.get('/missing')
+    counts = {(s.labels['version'], s.labels['endpoint'], s.labels['status']): s.value
+              for s in samples(app, 'api_requests_total', 'PathTest')}
+    assert counts[('v1', '/api/v1/payments/<int:payment_id>', '200')] == 2, "Endpoint is the URL rule, not the path"
+    assert counts[('v2', '/api/v2/transactions/<int:payment_id>', '200')] == 1
+    assert counts[('unversioned', 'unmatched', '404')] == 1
+    assert not any(endpoint == '/metrics' for _, endpoint, _ in counts), "/metrics is not counted"
+    print("✅ request counts by version, endpoint and status")
+
+
+def test_phase_timers():
+    app = make_app('PhaseTest')
+    app.test_client().get('/api/v2/transactions/7')
+    phases = {s.labels['phase']: s.value for s in samples(app, 'api_phase_duration_seconds_count', 'PhaseTest')}
+    assert phases == {'db': 1, 'transform': 1, 'serialize': 1}, phases
+    assert to_v2((1,)) == {'id': 1, 'code': 200}, "Timed functions still work outside a request"
+    print("✅ db, transform and serialize phases, once per request")
+
+
+def test_custom_version_of():
+    app = make_app('HeaderTest', version_of=lambda: request.headers.get('API-Version', 'v1'))
+    app.test_client().get('/api/payments', headers={'API-Version': 'v2'})
+    versions = [s.labels['version'] for s in samples(app, 'api_requests_total', 'HeaderTest')]
+    assert versions == ['v2']
+    print("✅ version taken from version_of (header / query based apps)")
+
+
+if __name__ == '__main__':
+    test_counts_by_version_endpoint_status()
+    test_phase_timers()
+    test_custom_version_of()
+    print("\nAll metrics tests passed")
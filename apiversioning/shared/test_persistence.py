@@ -0,0 +1,156 @@
+"""
+Tests for the shared pooled SQLite layer and migration runner.
+Run: python shared/test_persistence.py
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.persistence import (  # noqa: E402
+    POOL_SIZE, Migration, add_missing_columns, close_pool, get_connection, get_pool, run_migrations, table_columns
+)
+
+
+def scratch_db():
+    return os.path.join(tempfile.mkdtemp(), 'test.db')
+
+
+def test_pragmas_and_row_factory():
+    conn = get_connection(scratch_db())
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] > 0
+    assert isinstance(conn.execute('SELECT 1 AS one').fetchone(), sqlite3.Row)
+    conn.close()
+    print("✅ WAL, busy timeout and sqlite3.Row rows")
+
+
+def test_close_returns_connection_to_pool():
+    path = scratch_db()
+    first = get_connection(path)
+    first.row_factory = None
+    first.isolation_level = None
+    first.execute('BEGIN')
+    first.execute('CREATE TABLE t (x)')
+    first.close()
+    first.close()   # closing twice must not put it in the pool twice
+
+    second = get_connection(path)
+    assert second is first, "An idle connection is reused"
+    assert not second.in_transaction, "An open transaction is rolled back on release"
+    assert second.isolation_level == '' and second.row_factory is sqlite3.Row, "Per-use settings are reset"
+    assert second.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 't'").fetchone()[0] == 0
+    assert get_connection(path) is not second, "A busy connection is never handed out twice"
+    second.close()
+    print("✅ close() returns a clean connection to the pool")
+
+
+def test_pool_keeps_at_most_pool_size_idle():
+    path = scratch_db()
+    connections = [get_connection(path) for _ in range(POOL_SIZE + 3)]
+    for conn in connections:
+        conn.close()
+    assert get_pool(path).stats()['idle'] == POOL_SIZE
+    close_pool(path)
+    assert get_pool(path).stats()['idle'] == 0
+    print("✅ overflow connections are closed, close_pool empties the pool")
+
+
+def test_concurrent_writers():
+    path = scratch_db()
+    conn = get_connection(path)
+    conn.execute('CREATE TABLE t (x INTEGER)')
+    conn.commit()
+    conn.close()
+    errors = []
+
+    def write(start):
+        try:
+            for i in range(50):
+                conn = get_connection(path)
+                conn.execute('INSERT INTO t VALUES (?)', (start + i,))
+                conn.commit()
+                conn.close()
+        except sqlite3.Error as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write, args=(n * 1000,)) for n in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    conn = get_connection(path)
+    assert not errors, errors
+    assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 16 * 50
+    conn.close()
+    print("✅ 16 threads writing at once, no 'database is locked'")
+
+
+def test_migrations_apply_once_in_order():
+    path = scratch_db()
+    migrations = [
+        Migration(1, 'create', 'CREATE TABLE payments (id INTEGER PRIMARY KEY, amount REAL)'),
+        Migration(2, 'add code', add_missing_columns('payments', {'code': 'INTEGER'})),
+    ]
+    assert run_migrations(path, migrations, verbose=False) == [1, 2]
+    assert run_migrations(path, migrations, verbose=False) == [], "Nothing to do the second time"
+
+    migrations.append(Migration(3, 'add token', 'ALTER TABLE payments ADD COLUMN payment_token TEXT'))
+    assert run_migrations(path, migrations, verbose=False) == [3]
+    conn = get_connection(path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == 3
+    assert table_columns(conn, 'payments') == ['id', 'amount', 'code', 'payment_token']
+    conn.close()
+    print("✅ migrations apply once, in order, tracked in user_version")
+
+
+def test_failed_migration_rolls_back():
+    path = scratch_db()
+
+    def broken(conn):
+        conn.execute('CREATE TABLE half_done (x)')
+        raise RuntimeError('boom')
+
+    migrations = [Migration(1, 'create', 'CREATE TABLE payments (id INTEGER PRIMARY KEY)'),
+                  Migration(2, 'broken', broken)]
+    try:
+        run_migrations(path, migrations, verbose=False)
+        raise AssertionError('expected the migration to fail')
+    except RuntimeError:
+        pass
+    conn = get_connection(path)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'half_done'").fetchone()[0] == 0
+    conn.close()
+    print("✅ a failing step leaves the database at the previous version")
+
+
+def test_legacy_database_is_adopted():
+    """A database created by the old ad-hoc init (user_version 0) migrates without errors."""
+    path = scratch_db()
+    legacy = sqlite3.connect(path)
+    legacy.execute('CREATE TABLE payments (id INTEGER PRIMARY KEY, amount REAL, code INTEGER)')
+    legacy.commit()
+    legacy.close()
+    migrations = [
+        Migration(1, 'create', 'CREATE TABLE IF NOT EXISTS payments (id INTEGER PRIMARY KEY, amount REAL)'),
+        Migration(2, 'v2 columns', add_missing_columns('payments', {'code': 'INTEGER', 'payment_token': 'TEXT'})),
+    ]
+    assert run_migrations(path, migrations, verbose=False) == [1, 2]
+    conn = get_connection(path)
+    assert table_columns(conn, 'payments') == ['id', 'amount', 'code', 'payment_token']
+    conn.close()
+    print("✅ legacy databases are brought under the migration runner")
+
+
+if __name__ == '__main__':
+    test_pragmas_and_row_factory()
+    test_close_returns_connection_to_pool()
+    test_pool_keeps_at_most_pool_size_idle()
+    test_concurrent_writers()
+    test_migrations_apply_once_in_order()
+    test_failed_migration_rolls_back()
+    test_legacy_database_is_adopted()
+    print("\nAll persistence tests passed")
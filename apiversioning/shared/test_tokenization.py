@@ -0,0 +1,97 @@
+"""
+Tests for the shared payment tokenizer.
+Run: python shared/test_tokenization.py
+"""
+import hashlib
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.tokenization import Tokenizer, get_tokenizer  # noqa: E402
+
+KEY = b'test-key'
+
+
+def test_format_and_normalization():
+    tokenizer = Tokenizer(KEY, length=12)
+    token = tokenizer.tokenize('4111-1111-1111-1111')
+    assert token.startswith('TOK-') and len(token) == 4 + 12
+    assert token == token.upper()
+    assert tokenizer.tokenize('4111 1111 1111 1111') == token, "Formatting does not change the token"
+    print("✅ format and normalization")
+
+
+def test_keyed():
+    card = '4111111111111111'
+    token = Tokenizer(KEY).tokenize(card)
+    assert token != Tokenizer(b'other-key').tokenize(card), "Different keys give different tokens"
+    plain = 'TOK-' + hashlib.sha256(card.encode()).hexdigest()[:32].upper()
+    assert token != plain, "Token is not the unkeyed SHA-256"
+    print("✅ keyed HMAC")
+
+
+def test_lru_and_stats():
+    tokenizer = Tokenizer(KEY, cache_size=2)
+    first = tokenizer.tokenize('1111')
+    assert tokenizer.tokenize('1111') == first
+    tokenizer.tokenize('2222')
+    tokenizer.tokenize('1111')          # 1111 is now the most recent
+    tokenizer.tokenize('3333')          # evicts 2222
+    stats = tokenizer.stats()
+    assert stats['size'] == 2 and stats['hits'] == 2 and stats['misses'] == 3
+    assert stats['hit_rate'] == 0.4
+    tokenizer.tokenize('2222')
+    assert tokenizer.stats()['misses'] == 4, "Evicted entry is recomputed"
+    assert tokenizer.tokenize('1111') == first
+    print("✅ LRU eviction and hit-rate metrics")
+
+
+def test_tokenize_many_matches_single():
+    cards = ['4111-1111-1111-1111', '5500000000000004', '4111111111111111', '340000000000009']
+    single = Tokenizer(KEY)
+    bulk = Tokenizer(KEY)
+    bulk.tokenize('5500000000000004')
+    assert bulk.tokenize_many(cards) == [single.tokenize(card) for card in cards]
+    stats = bulk.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 3, "Repeats within a batch and cached cards are hits"
+    assert bulk.tokenize_many([]) == []
+    print("✅ tokenize_many")
+
+
+def test_thread_safety():
+    tokenizer = Tokenizer(KEY, cache_size=50)
+    expected = {str(i): Tokenizer(KEY, cache_size=0).tokenize(str(i)) for i in range(100)}
+    errors = []
+
+    def worker():
+        for i in range(2000):
+            card = str(i % 100)
+            if tokenizer.tokenize(card) != expected[card]:
+                errors.append(card)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert tokenizer.stats()['size'] <= 50
+    print("✅ thread safety")
+
+
+def test_shared_instances():
+    assert get_tokenizer(32) is get_tokenizer(32)
+    assert get_tokenizer(12) is not get_tokenizer(32)
+    assert len(get_tokenizer(12).tokenize('4111')) == 16
+    print("✅ one tokenizer per token length")
+
+
+if __name__ == '__main__':
+    test_format_and_normalization()
+    test_keyed()
+    test_lru_and_stats()
+    test_tokenize_many_matches_single()
+    test_thread_safety()
+    test_shared_instances()
+    print("\nAll tokenization tests passed")
@@ -0,0 +1,151 @@
+"""
+Payment tokenization shared by every apiversioning variant.
+
+Tokens are a keyed HMAC-SHA256 of the normalized card number (dashes and
+spaces removed), so they cannot be recomputed from a card number without the
+key, unlike the plain SHA-256 used before. The key comes from the
+PAYMENT_TOKEN_KEY environment variable.
+
+Each Tokenizer keeps a bounded LRU of recent card -> token mappings, so a
+repeat customer costs one dict lookup instead of an HMAC. The cache lives in
+process memory only; it is never persisted or logged.
+
+Usage:
+    from shared.tokenization import get_tokenizer
+
+    tokenizer = get_tokenizer(length=32)
+    tokenizer.tokenize('4111-1111-1111-1111')      # 'TOK-...'
+    tokenizer.tokenize_many(card_numbers)          # bulk imports
+    tokenizer.stats()                              # hits, misses, hit_rate, size
+"""
+import hashlib
+import hmac
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+TOKEN_PREFIX = 'TOK-'
+DEFAULT_TOKEN_LENGTH = 32
+CACHE_SIZE = 4096
+DEV_KEY = b'apiversioning-dev-token-key'
+
+
+def load_key() -> bytes:
+    """Read the HMAC key from PAYMENT_TOKEN_KEY, falling back to a development key."""
+    key = os.environ.get('PAYMENT_TOKEN_KEY')
+    if key:
+        return key.encode()
+    warnings.warn('PAYMENT_TOKEN_KEY is not set; using the development tokenization key')
+    return DEV_KEY
+
+
+def normalize_card_number(card_number: str) -> str:
+    """Remove the dashes and spaces clients use to format card numbers."""
+    return card_number.replace('-', '').replace(' ', '')
+
+
+class Tokenizer:
+    """
+    Keyed, memoized card number -> payment token mapping.
+
+    Args:
+        key: HMAC key
+        length: Number of hex characters kept after the prefix (at most 64)
+        cache_size: Maximum number of card numbers kept in the LRU (0 disables it)
+    """
+
+    def __init__(self, key: bytes, length: int = DEFAULT_TOKEN_LENGTH, cache_size: int = CACHE_SIZE):
+        if not 1 <= length <= 64:
+            raise ValueError('length must be between 1 and 64')
+        self.length = length
+        self.cache_size = cache_size
+        # Keyed once: copying a prepared HMAC skips deriving the key pads per call
+        self._hmac = hmac.new(key, digestmod=hashlib.sha256)
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _compute(self, card: str) -> str:
+        mac = self._hmac.copy()
+        mac.update(card.encode())
+        return TOKEN_PREFIX + mac.hexdigest()[:self.length].upper()
+
+    def _store(self, tokens: Dict[str, str]):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache.update(tokens)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def tokenize(self, card_number: str) -> str:
+        """Return the payment token for one card number."""
+        card = normalize_card_number(card_number)
+        with self._lock:
+            token = self._cache.get(card)
+            if token is not None:
+                self._cache.move_to_end(card)
+                self.hits += 1
+                return token
+            self.misses += 1
+        token = self._compute(card)
+        self._store({card: token})
+        return token
+
+    def tokenize_many(self, card_numbers: Iterable[str]) -> List[str]:
+        """
+        Return tokens for many card numbers, in order.
+
+        Cache lookups and inserts happen under one lock acquisition each, and
+        a card repeated within the batch is hashed once.
+        """
+        cards = [normalize_card_number(card_number) for card_number in card_numbers]
+        tokens: Dict[str, Optional[str]] = dict.fromkeys(cards)
+        with self._lock:
+            for card in tokens:
+                token = self._cache.get(card)
+                if token is not None:
+                    self._cache.move_to_end(card)
+                    tokens[card] = token
+            missing = [card for card, token in tokens.items() if token is None]
+            self.misses += len(missing)
+            self.hits += len(cards) - len(missing)
+        computed = {card: self._compute(card) for card in missing}
+        tokens.update(computed)
+        self._store(computed)
+        return [tokens[card] for card in cards]
+
+    def stats(self) -> Dict[str, float]:
+        """Cache metrics: hits, misses, hit_rate (0..1) and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._cache),
+                'capacity': self.cache_size
+            }
+
+    def clear(self):
+        """Drop cached mappings and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+_tokenizers: Dict[int, Tokenizer] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def get_tokenizer(length: int = DEFAULT_TOKEN_LENGTH) -> Tokenizer:
+    """Return the process-wide Tokenizer for a token length (created on first use)."""
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(length)
+        if tokenizer is None:
+            cache_size = int(os.environ.get('PAYMENT_TOKEN_CACHE_SIZE', CACHE_SIZE))
+            tokenizer = _tokenizers[length] = Tokenizer(load_key(), length, cache_size)
+        return tokenizer
@@ -0,0 +1,45 @@
+"""
+Request mix replayed against the apiversioning variants by
+shared/load_metrics.py and shared/harness.py.
+
+Every variant exposes the same payments under a different versioning
+scheme; request_for() hides the scheme, so one traffic mix (operation
+weights, v1/v2 share) drives all of them.
+"""
+import random
+from typing import Dict, Optional, Tuple
+
+DEFAULT_PORTS = {'Routes': 5000, 'QueryVersioning': 5003, 'HeaderVersioning': 5001, 'AdapterTransformer': 5000}
+VARIANTS = tuple(DEFAULT_PORTS)
+OPERATIONS = [('get', 60), ('list', 25), ('create', 10), ('delete', 5)]
+
+
+def request_for(variant: str, version: str, payment_id: Optional[int] = None) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """(path, query params, headers) addressing a payment (or the collection) of `version`."""
+    suffix = f"/{payment_id}" if payment_id is not None else ''
+    if variant == 'QueryVersioning':
+        return f"/api/payments{suffix}", {'version': version[1:]}, {}
+    if variant == 'HeaderVersioning':
+        return f"/api/payments{suffix}", {}, {'API-Version': version}
+    resource = 'payments' if version == 'v1' else 'transactions'
+    return f"/api/{version}/{resource}{suffix}", {}, {}
+
+
+def payment_body(rng: random.Random) -> Dict[str, object]:
+    """A create payload accepted by v1 and v2 of every variant."""
+    return {
+        'amount': round(rng.uniform(1, 500), 2),
+        'card_number': f"4111-1111-1111-{rng.randrange(10000):04d}",
+        'status': rng.choice(['SUCCESS', 'PENDING'])
+    }
+
+
+def parse_mix(text: str) -> list:
+    """'get=60,list=25,create=10,delete=5' -> [('get', 60), ...]"""
+    mix = []
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in dict(OPERATIONS) or not weight.isdigit():
+            raise ValueError(f"Bad mix entry {part!r}: expected <{'|'.join(dict(OPERATIONS))}>=<weight>")
+        mix.append((name, int(weight)))
+    return mix
@@ -0,0 +1,247 @@
+"""
+Shared SQLite access layer for every library server version (v1 → v5).
+
+- Connection pool: connections are reused instead of calling sqlite3.connect
+  inside every handler.
+- WAL mode + busy timeout: readers never block the writer, and writers wait
+  for each other instead of failing with "database is locked".
+- Retry-on-busy: write helpers retry with exponential backoff if SQLite still
+  reports the database as busy/locked after the busy timeout.
+- Prepared statements: every query is a module-level SQL constant, so each
+  pooled connection compiles it once and reuses it from its statement cache.
+"""
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+DB_NAME = "books.db"
+
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 64
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 0.01   # giây, nhân đôi sau mỗi lần thử lại
+
+# ---------------------------
+# Prepared statements
+# ---------------------------
+SQL_CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS borrowed_books (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        book_key TEXT UNIQUE,
+        title TEXT,
+        author TEXT,
+        cover_url TEXT
+    )
+"""
+# library_meta.last_modified được trigger cập nhật sau mỗi lần mượn/trả,
+# dùng làm Last-Modified cho danh sách sách (kể cả khi nhiều process cùng ghi)
+SQL_NOW = "(julianday('now') - 2440587.5) * 86400.0"   # unix time, có phần thập phân
+SQL_CREATE_META = """
+    CREATE TABLE IF NOT EXISTS library_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        last_modified REAL NOT NULL
+    )
+"""
+SQL_INIT_META = (
+    "INSERT OR IGNORE INTO library_meta (id, last_modified) "
+    f"VALUES (1, {SQL_NOW})"
+)
+SQL_CREATE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS borrowed_books_{event.lower()}_touch
+    AFTER {event} ON borrowed_books
+    BEGIN
+        UPDATE library_meta SET last_modified = {SQL_NOW} WHERE id = 1;
+    END
+    """
+    for event in ("INSERT", "UPDATE", "DELETE")
+]
+SQL_SELECT_LAST_MODIFIED = "SELECT last_modified FROM library_meta WHERE id = 1"
+SQL_INSERT_BOOK = (
+    "INSERT OR IGNORE INTO borrowed_books (book_key, title, author, cover_url) "
+    "VALUES (?, ?, ?, ?)"
+)
+SQL_SELECT_BOOKS = "SELECT book_key, title, author, cover_url FROM borrowed_books"
+SQL_SELECT_BOOK = (
+    "SELECT book_key, title, author, cover_url FROM borrowed_books WHERE book_key = ?"
+)
+SQL_DELETE_BOOK = "DELETE FROM borrowed_books WHERE book_key = ?"
+
+
+# ---------------------------
+# Connection pool
+# ---------------------------
+class PoolExhausted(sqlite3.OperationalError):
+    """Every pooled connection stayed busy for BUSY_TIMEOUT_MS.
+
+    Message chứa "busy" nên retry_on_busy thử lại như một lỗi SQLITE_BUSY."""
+
+
+class ConnectionPool:
+    """Pool of SQLite connections (WAL, busy timeout) shared by all threads."""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            reserved = self._created < self.size
+            if reserved:
+                self._created += 1
+        if reserved:
+            try:
+                return self._connect()
+            except Exception:
+                # Connect lỗi → trả lại slot, nếu không pool mất vĩnh viễn một chỗ
+                with self._lock:
+                    self._created -= 1
+                raise
+        # Pool đầy → chờ một connection được trả lại
+        try:
+            return self._idle.get(timeout=BUSY_TIMEOUT_MS / 1000)
+        except queue.Empty:
+            raise PoolExhausted(
+                f"database is busy: all {self.size} connections to {self.db_path} "
+                f"in use for {BUSY_TIMEOUT_MS} ms"
+            ) from None
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name=DB_NAME):
+    """Return the pool for db_name (one pool per database file)."""
+    path = os.path.abspath(db_name)
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+def _is_busy_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_on_busy(func):
+    """Retry func when SQLite reports busy/locked, with exponential backoff + jitter."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not _is_busy_error(e) or attempt == MAX_RETRIES - 1:
+                    raise
+                delay = RETRY_BASE_DELAY * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, delay))
+    return wrapper
+
+
+# ---------------------------
+# Thao tác dữ liệu
+# ---------------------------
+@retry_on_busy
+def init_db(db_name=DB_NAME):
+    with get_pool(db_name).connection() as conn:
+        with conn:
+            conn.execute(SQL_CREATE_TABLE)
+            conn.execute(SQL_CREATE_META)
+            conn.execute(SQL_INIT_META)
+            for sql in SQL_CREATE_TRIGGERS:
+                conn.execute(sql)
+
+
+@retry_on_busy
+def borrow_book(book_key, title, author, cover_url, db_name=DB_NAME):
+    """Insert a borrowed book. Returns False if book_key was already borrowed."""
+    with get_pool(db_name).connection() as conn:
+        with conn:
+            cur = conn.execute(SQL_INSERT_BOOK, (book_key, title, author, cover_url))
+            return cur.rowcount == 1
+
+
+@retry_on_busy
+def list_books(db_name=DB_NAME):
+    """Return all borrowed books as (book_key, title, author, cover_url) tuples."""
+    with get_pool(db_name).connection() as conn:
+        return conn.execute(SQL_SELECT_BOOKS).fetchall()
+
+
+@retry_on_busy
+def get_book(book_key, db_name=DB_NAME):
+    with get_pool(db_name).connection() as conn:
+        return conn.execute(SQL_SELECT_BOOK, (book_key,)).fetchone()
+
+
+@retry_on_busy
+def return_book(book_key, db_name=DB_NAME):
+    """Delete a borrowed book. Returns False if it was not borrowed."""
+    with get_pool(db_name).connection() as conn:
+        with conn:
+            cur = conn.execute(SQL_DELETE_BOOK, (book_key,))
+            return cur.rowcount > 0
+
+
+@retry_on_busy
+def last_modified(db_name=DB_NAME):
+    """Unix timestamp (float) of the last borrow/return in this database."""
+    with get_pool(db_name).connection() as conn:
+        return conn.execute(SQL_SELECT_LAST_MODIFIED).fetchone()[0]
@@ -0,0 +1,154 @@
+# Test đồng thời cho tầng database dùng chung (database.py)
+# Chạy 50 writer (mượn + trả sách) và 200 reader (lấy danh sách) song song
+# vào từng phiên bản server. Mỗi server chạy trong process này trên một port
+# ngẫu nhiên với database tạm, nên không cần start server trước.
+#
+#   python test_concurrency.py
+
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SRC_DIR)
+import database as db
+
+VERSIONS = {
+    "v1": "v1_clientserver",
+    "v2": "v2_stateless",
+    "v3": "v3_cache",
+    "v4": "v4_uniform",
+    "v5": "v5_layered",
+}
+WRITERS = 50
+READERS = 200
+OPS_PER_THREAD = 5
+HEADERS = {"Authorization": "Bearer demo123"}
+
+
+def load_server(version, folder):
+    """Import <folder>/server.py as a fresh module (init_db chạy trong cwd hiện tại)."""
+    path = os.path.join(SRC_DIR, folder, "server.py")
+    if os.path.dirname(path) not in sys.path:
+        sys.path.insert(0, os.path.dirname(path))  # cho các import cùng thư mục (middleware, ...)
+    spec = importlib.util.spec_from_file_location(f"library_server_{version}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_load(base_url):
+    """Chạy writer + reader song song, trả về (số request, danh sách lỗi)."""
+    errors = []
+    counts = {"requests": 0}
+    lock = threading.Lock()
+    start = threading.Barrier(WRITERS + READERS)
+
+    def record(resp, expected):
+        with lock:
+            counts["requests"] += 1
+            if resp.status_code not in expected:
+                errors.append(f"{resp.request.method} {resp.url} -> {resp.status_code}")
+
+    def writer(n):
+        session = requests.Session()
+        start.wait()
+        for i in range(OPS_PER_THREAD):
+            key = f"W{n}-{i}"
+            resp = session.post(f"{base_url}/books", headers=HEADERS, json={
+                "book_key": key, "title": f"Book {key}", "author": "Tester", "cover_url": ""
+            })
+            record(resp, (201,))
+            resp = session.delete(f"{base_url}/books/{key}", headers=HEADERS)
+            record(resp, (200,))
+
+    def reader():
+        session = requests.Session()
+        start.wait()
+        for _ in range(OPS_PER_THREAD):
+            resp = session.get(f"{base_url}/books", headers=HEADERS)
+            record(resp, (200, 304))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts["requests"], errors
+
+
+def check_version(version, folder):
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            module = load_server(version, folder)
+            server = make_server("127.0.0.1", 0, module.app, threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                base_url = f"http://127.0.0.1:{server.server_port}/api/{version}"
+                started = time.perf_counter()
+                total, errors = run_load(base_url)
+                elapsed = time.perf_counter() - started
+                remaining = db.list_books(module.DB_NAME)
+            finally:
+                server.shutdown()
+                db.close_all_pools()
+        finally:
+            os.chdir(old_cwd)
+
+    print(f"{version}: {total} requests in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} req/s), {len(errors)} errors")
+    for line in errors[:5]:
+        print(f"   {line}")
+    return errors, remaining
+
+
+def test_concurrency():
+    """Không có lỗi "database is locked" và mọi sách mượn đều đã được trả."""
+    for version, folder in VERSIONS.items():
+        errors, remaining = check_version(version, folder)
+        assert not errors, f"{version}: {len(errors)} failed requests"
+        assert remaining == [], f"{version}: {len(remaining)} books left after return"
+
+
+def test_pool_limits():
+    """Pool đầy → PoolExhausted (lỗi "busy" có thông điệp); connect lỗi không làm mất slot."""
+    old_timeout = db.BUSY_TIMEOUT_MS
+    db.BUSY_TIMEOUT_MS = 50
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pool = db.ConnectionPool(os.path.join(tmp, "books.db"), size=1)
+            with pool.connection():
+                try:
+                    pool._acquire()
+                except db.PoolExhausted as e:
+                    assert db._is_busy_error(e), "retry_on_busy must treat it as busy"
+                else:
+                    raise AssertionError("exhausted pool should raise PoolExhausted")
+            pool.close()
+
+            broken = db.ConnectionPool(os.path.join(tmp, "missing", "books.db"), size=1)
+            for _ in range(2):
+                try:
+                    broken._acquire()
+                except db.sqlite3.OperationalError:
+                    pass
+            assert broken._created == 0, "failed connect must give its slot back"
+    finally:
+        db.BUSY_TIMEOUT_MS = old_timeout
+
+
+if __name__ == "__main__":
+    test_pool_limits()
+    print("✅ Exhausted pool raises PoolExhausted, failed connects keep their slot")
+    test_concurrency()
+    print("✅ All versions handled concurrent borrow/return without lock errors")
@@ -1,7 +1,10 @@
 from flask import Flask, request, jsonify
-import sqlite3
+import os, sys
 from flask_cors import CORS
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db  # Tầng truy cập SQLite dùng chung (pool + WAL)
+
 app = Flask(__name__)
 CORS(app)  # Cho phép frontend gọi từ React
 
@@ -10,22 +13,7 @@ DB_NAME = "books.db"
 # ---------------------------
 # Khởi tạo database
 # ---------------------------
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS borrowed_books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_key TEXT UNIQUE,
-            title TEXT,
-            author TEXT,
-            cover_url TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-init_db()
+db.init_db(DB_NAME)
 
 @app.route("/")
 def home():
@@ -45,25 +33,10 @@ def borrow_book():
     if not book_key:
         return jsonify({"status": "error", "message": "Missing book_key"}), 400
 
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-
-    # Kiểm tra xem đã mượn chưa
-    c.execute("SELECT * FROM borrowed_books WHERE book_key = ?", (book_key,))
-    existing = c.fetchone()
-
-    if existing:
-        conn.close()
+    # INSERT OR IGNORE: kiểm tra + thêm trong một câu lệnh, không bị race
+    if not db.borrow_book(book_key, title, author, cover_url, DB_NAME):
         return jsonify({"status": "exists", "message": "Already borrowed"}), 200
 
-    # Chưa có thì thêm vào database
-    c.execute(
-        "INSERT INTO borrowed_books (book_key, title, author, cover_url) VALUES (?, ?, ?, ?)",
-        (book_key, title, author, cover_url)
-    )
-    conn.commit()
-    conn.close()
-
     return jsonify({"status": "success", "message": "Borrowed successfully"}), 201
 
 # ---------------------------
@@ -71,11 +44,7 @@ def borrow_book():
 # ---------------------------
 @app.route("/api/v1/books", methods=["GET"])
 def get_books():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT book_key, title, author, cover_url FROM borrowed_books")
-    rows = c.fetchall()
-    conn.close()
+    rows = db.list_books(DB_NAME)
 
     books = [
         {"book_key": r[0], "title": r[1], "author": r[2], "cover_url": r[3]}
@@ -88,15 +57,7 @@ def get_books():
 # ---------------------------
 @app.route("/api/v1/books/<book_key>", methods=["DELETE"])
 def return_book(book_key):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-
-    c.execute("DELETE FROM borrowed_books WHERE book_key = ?", (book_key,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
-
-    if deleted == 0:
+    if not db.return_book(book_key, DB_NAME):
         return jsonify({"status": "error", "message": "Book not found"}), 404
 
     return jsonify({"status": "success", "message": "Returned successfully"}), 200
@@ -0,0 +1,120 @@
+# Benchmark session store với nhiều worker: sticky vs non-sticky.
+# Start WORKERS process stateful.py cho mỗi SESSION_BACKEND (dùng chung một
+# sessions.db tạm), mỗi client login rồi GET /api/books nhiều lần:
+#   - sticky:     mọi request của một client về cùng một worker
+#   - non-sticky: round-robin, mỗi request một worker khác nhau
+# Store chỉ nằm trong một process ("memory", hoặc "network" với client
+# in-memory khi không có SESSION_REDIS_URL) sẽ trả 401 khi non-sticky.
+#
+#   python bench_sessions.py [số_worker]
+
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.dirname(HERE)
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+CLIENTS = 20
+REQUESTS_PER_CLIENT = 50
+BACKENDS = ["cookie", "sqlite", "network", "memory"]
+USERS = ["user123", "user456"]
+
+WORKER_CMD = (
+    "import sys, stateful; "
+    "stateful.app.run(port=int(sys.argv[1]), threaded=True, use_reloader=False)"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_workers(backend, workdir):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([HERE, SRC_DIR]), SESSION_BACKEND=backend)
+    ports = [free_port() for _ in range(WORKERS)]
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER_CMD, str(port)], cwd=workdir, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for port in ports
+    ]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    for url in urls:
+        deadline = time.time() + 15
+        while True:
+            try:
+                requests.get(url + "/api/books", timeout=0.5)
+                break
+            except requests.RequestException:
+                if time.time() > deadline:
+                    raise RuntimeError(f"{url} did not start")
+                time.sleep(0.1)
+    return procs, urls
+
+
+def run_clients(urls, sticky):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client(n):
+        session = requests.Session()
+        home = urls[n % len(urls)]
+        rotation = itertools.cycle(urls[n % len(urls):] + urls[:n % len(urls)])
+        next(rotation)
+        session.post(f"{home}/login/{USERS[n % len(USERS)]}")
+        local_latencies, local_errors = [], 0
+        for _ in range(REQUESTS_PER_CLIENT):
+            url = home if sticky else next(rotation)
+            start = time.perf_counter()
+            resp = session.get(f"{url}/api/books")
+            local_latencies.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(CLIENTS)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def main():
+    total = CLIENTS * REQUESTS_PER_CLIENT
+    print(f"{WORKERS} workers, {CLIENTS} clients x {REQUESTS_PER_CLIENT} GET /api/books")
+    print(f"{'backend':<10}{'routing':<12}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}{'401 rate':>10}")
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp:
+            procs, urls = start_workers(backend, tmp)
+            try:
+                for sticky in (True, False):
+                    latencies, errors, elapsed = run_clients(urls, sticky)
+                    latencies.sort()
+                    p50 = statistics.median(latencies) * 1000
+                    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+                    routing = "sticky" if sticky else "non-sticky"
+                    print(f"{backend:<10}{routing:<12}{total / elapsed:>8.0f}"
+                          f"{p50:>9.2f}{p99:>9.2f}{errors / total:>10.1%}")
+            finally:
+                for p in procs:
+                    p.terminate()
+                    p.wait()
+
+
+if __name__ == "__main__":
+    main()
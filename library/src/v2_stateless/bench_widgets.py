@@ -0,0 +1,89 @@
+# Đo số byte phục vụ cho 1k lần tải widget promo, trước và sau khi dùng bundle
+# có hash + Cache-Control immutable. Chạy in-process bằng Flask test client.
+#
+# Mô hình: BROWSERS trình duyệt, mỗi trình duyệt tải widget LOADS_PER_BROWSER lần,
+# cách nhau LOAD_INTERVAL giây (đồng hồ giả lập).
+#   - trước: mỗi lần tải nhận nguyên mã JS (không nén, không header cache)
+#   - sau:   redirect 302 được cache theo max-age; bundle gzip chỉ tải ở lần
+#            đầu, các lần sau trình duyệt dùng bản trong cache (immutable)
+#
+#   python bench_widgets.py
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import stateful
+from widget_bundles import WIDGET_DIR
+
+BROWSERS = 100
+LOADS_PER_BROWSER = 10
+LOAD_INTERVAL = 30   # giây giữa 2 lần xem trang
+USER_TYPES = ["premium", "basic"]
+
+
+def wire_bytes(response):
+    """Approximate bytes on the wire: status line + headers + body."""
+    headers = "".join(f"{k}: {v}\r\n" for k, v in response.headers.items())
+    return len(f"HTTP/1.1 {response.status}\r\n{headers}\r\n".encode()) + len(response.get_data())
+
+
+def before_bytes(user_type):
+    # Endpoint cũ trả nguyên chuỗi JS (có thụt lề) cho mỗi request
+    name = "promo_premium" if user_type == "premium" else "promo_basic"
+    with open(os.path.join(WIDGET_DIR, f"{name}.js"), encoding="utf-8") as f:
+        body = "".join("        " + line for line in f.readlines()[1:]).encode()
+    headers = "Content-Type: application/javascript; charset=utf-8\r\n"
+    headers += f"Content-Length: {len(body)}\r\n"
+    return len(f"HTTP/1.1 200 OK\r\n{headers}\r\n".encode()) + len(body)
+
+
+def max_age(response):
+    for directive in response.headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "max-age":
+            return int(value)
+    return 0
+
+
+def after_bytes(client, user_type, browser_cache, now):
+    promo_url = f"/api/widget/promo?user_type={user_type}"
+    total = 0
+    cached = browser_cache.get(promo_url)
+    if cached and cached[1] > now:
+        location = cached[0]
+    else:
+        redirect = client.get(promo_url)
+        location = redirect.headers["Location"]
+        browser_cache[promo_url] = (location, now + max_age(redirect))
+        total += wire_bytes(redirect)
+    if location not in browser_cache:
+        bundle = client.get(location, headers={"Accept-Encoding": "gzip, deflate, br"})
+        assert "immutable" in bundle.headers["Cache-Control"]
+        browser_cache[location] = (None, float("inf"))
+        total += wire_bytes(bundle)
+    return total
+
+
+def main():
+    client = stateful.app.test_client()
+    before = after = 0
+    for b in range(BROWSERS):
+        browser_cache = {}   # url -> (location, hết hạn lúc)
+        for i in range(LOADS_PER_BROWSER):
+            user_type = USER_TYPES[b % len(USER_TYPES)]
+            before += before_bytes(user_type)
+            after += after_bytes(client, user_type, browser_cache, now=i * LOAD_INTERVAL)
+
+    loads = BROWSERS * LOADS_PER_BROWSER
+    print(f"{loads} widget loads ({BROWSERS} browsers x {LOADS_PER_BROWSER})")
+    print(f"{'':<8}{'total bytes':>13}{'bytes / 1k loads':>18}")
+    print(f"{'before':<8}{before:>13}{before * 1000 / loads:>18.0f}")
+    print(f"{'after':<8}{after:>13}{after * 1000 / loads:>18.0f}")
+    print(f"saved {1 - after / before:.1%}")
+
+
+if __name__ == "__main__":
+    main()
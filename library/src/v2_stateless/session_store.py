@@ -0,0 +1,355 @@
+"""
+Session store cắm được (pluggable) cho stateful.py.
+
+Flask `session` mặc định chỉ là cookie ký; bản server-side dưới đây cho phép
+chạy nhiều worker (nhiều process / nhiều máy) mà không cần sticky session:
+
+- "cookie":  toàn bộ session nằm trong cookie ký (mặc định của Flask).
+- "sqlite":  bảng key-value trong SQLite (WAL, dùng pool của database.py),
+             mọi worker trên cùng máy đọc chung một file.
+- "network": store qua mạng kiểu Redis (GET / SET PX / DELETE). Trong test
+             dùng LocalNetworkClient (in-memory) thay cho server thật.
+- "memory":  dict trong process, chỉ đúng khi chạy một worker hoặc sticky.
+
+Mọi store server-side có TTL (entry hết hạn bị bỏ qua và được dọn định kỳ)
+và có thể bọc bởi CachedStore: LRU read-through giới hạn số entry trong
+process, tránh đọc và decode data cho mỗi request. Cache hit vẫn hỏi store
+session còn tồn tại không (exists, rẻ hơn get), để logout trên một worker
+có hiệu lực ngay trên mọi worker khác thay vì sau CACHE_TTL.
+
+Chọn bằng biến môi trường:
+    SESSION_BACKEND=sqlite SESSION_DB=sessions.db SESSION_CACHE_SIZE=1024
+"""
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db  # pool + retry_on_busy dùng chung
+
+SESSION_TTL = 3600          # giây
+CACHE_SIZE = 1024           # số session giữ trong cache của mỗi process
+CACHE_TTL = 5.0             # giây; giới hạn độ cũ của data khi worker khác vừa ghi
+PURGE_EVERY = 500           # dọn session hết hạn sau mỗi N lần ghi
+SESSION_DB = "sessions.db"
+
+SQL_CREATE_SESSIONS = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        sid TEXT PRIMARY KEY,
+        data TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    )
+"""
+SQL_CREATE_SESSIONS_INDEX = (
+    "CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)"
+)
+SQL_SELECT_SESSION = "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?"
+SQL_SESSION_EXISTS = "SELECT 1 FROM sessions WHERE sid = ? AND expires_at > ?"
+SQL_UPSERT_SESSION = (
+    "INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at"
+)
+SQL_DELETE_SESSION = "DELETE FROM sessions WHERE sid = ?"
+SQL_PURGE_SESSIONS = "DELETE FROM sessions WHERE expires_at <= ?"
+
+
+# ---------------------------
+# Store: get / exists / set / delete (data là dict JSON)
+# ---------------------------
+class MemoryStore:
+    """Per-process dict with TTL. Only correct for a single (or sticky) worker."""
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, sid):
+        with self._lock:
+            item = self._data.get(sid)
+            if item is None:
+                return None
+            if item[1] <= time.time():
+                del self._data[sid]
+                return None
+            return json.loads(item[0])
+
+    def exists(self, sid):
+        with self._lock:
+            item = self._data.get(sid)
+            return item is not None and item[1] > time.time()
+
+    def set(self, sid, data):
+        with self._lock:
+            self._data[sid] = (json.dumps(data), time.time() + self.ttl)
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self.purge_expired()
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def purge_expired(self):
+        now = time.time()
+        for sid in [sid for sid, item in self._data.items() if item[1] <= now]:
+            del self._data[sid]
+
+
+class SQLiteStore:
+    """Key-value table in SQLite, shared by every worker on the same machine."""
+
+    def __init__(self, db_path=SESSION_DB, ttl=SESSION_TTL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._writes = 0
+        self._init_table()
+
+    @db.retry_on_busy
+    def _init_table(self):
+        with db.get_pool(self.db_path).connection() as conn:
+            with conn:
+                conn.execute(SQL_CREATE_SESSIONS)
+                conn.execute(SQL_CREATE_SESSIONS_INDEX)
+
+    @db.retry_on_busy
+    def get(self, sid):
+        with db.get_pool(self.db_path).connection() as conn:
+            row = conn.execute(SQL_SELECT_SESSION, (sid, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @db.retry_on_busy
+    def exists(self, sid):
+        with db.get_pool(self.db_path).connection() as conn:
+            return conn.execute(SQL_SESSION_EXISTS, (sid, time.time())).fetchone() is not None
+
+    @db.retry_on_busy
+    def set(self, sid, data):
+        with db.get_pool(self.db_path).connection() as conn:
+            with conn:
+                conn.execute(SQL_UPSERT_SESSION, (sid, json.dumps(data), time.time() + self.ttl))
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge_expired()
+
+    @db.retry_on_busy
+    def delete(self, sid):
+        with db.get_pool(self.db_path).connection() as conn:
+            with conn:
+                conn.execute(SQL_DELETE_SESSION, (sid,))
+
+    @db.retry_on_busy
+    def purge_expired(self):
+        with db.get_pool(self.db_path).connection() as conn:
+            with conn:
+                return conn.execute(SQL_PURGE_SESSIONS, (time.time(),)).rowcount
+
+
+class LocalNetworkClient:
+    """In-memory stand-in for a Redis client (get / exists / set with px / delete) used in tests."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def get(self, key):
+        with self._lock:
+            self.calls += 1
+            item = self._data.get(key)
+            if item is None or item[1] <= time.time():
+                self._data.pop(key, None)
+                return None
+            return item[0]
+
+    def exists(self, key):
+        with self._lock:
+            self.calls += 1
+            item = self._data.get(key)
+            return int(item is not None and item[1] > time.time())
+
+    def set(self, key, value, px=None):
+        with self._lock:
+            self.calls += 1
+            expires_at = time.time() + px / 1000 if px else float("inf")
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self.calls += 1
+            self._data.pop(key, None)
+
+
+class NetworkStore:
+    """Store over a Redis-compatible client; TTL eviction is done by the server (PX)."""
+
+    def __init__(self, client, ttl=SESSION_TTL, prefix="session:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, sid):
+        value = self.client.get(self.prefix + sid)
+        return json.loads(value) if value else None
+
+    def exists(self, sid):
+        return bool(self.client.exists(self.prefix + sid))
+
+    def set(self, sid, data):
+        self.client.set(self.prefix + sid, json.dumps(data), px=int(self.ttl * 1000))
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+
+class CachedStore:
+    """Bounded LRU read-through / write-through cache in front of another store.
+
+    A hit is only served after `store.exists(sid)` confirms the session was not
+    deleted (logout) or expired in the backing store, possibly by another worker.
+    """
+
+    def __init__(self, store, max_entries=CACHE_SIZE, ttl=CACHE_TTL):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # sid -> (data, cached_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _put(self, sid, data):
+        with self._lock:
+            self._entries[sid] = (data, time.monotonic())
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, sid):
+        with self._lock:
+            item = self._entries.get(sid)
+            fresh = item is not None and time.monotonic() - item[1] < self.ttl
+        if fresh:
+            # Data trong cache còn mới, nhưng session có thể đã bị xóa ở worker khác
+            alive = self.store.exists(sid)
+            with self._lock:
+                if not alive:
+                    self._entries.pop(sid, None)
+                    return None
+                if sid in self._entries:
+                    self._entries.move_to_end(sid)
+                self.hits += 1
+            return dict(item[0])
+        with self._lock:
+            self.misses += 1
+        data = self.store.get(sid)
+        if data is not None:
+            self._put(sid, data)
+        return data
+
+    def set(self, sid, data):
+        self.store.set(sid, data)
+        self._put(sid, dict(data))
+
+    def delete(self, sid):
+        self.store.delete(sid)
+        with self._lock:
+            self._entries.pop(sid, None)
+
+
+# ---------------------------
+# Flask SessionInterface dùng store server-side
+# ---------------------------
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Cookie only carries a random session id; the data lives in `store`."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                # Logout / session.clear() → xóa ở store và ở client
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not self.should_set_cookie(app, session):
+            return
+        if session.modified:
+            self.store.set(session.sid, dict(session))
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            domain=domain,
+            path=path,
+        )
+
+
+def create_store(backend, ttl=SESSION_TTL, db_path=SESSION_DB, client=None,
+                 cache_size=CACHE_SIZE):
+    """Build the store for backend ("sqlite", "network", "memory"); None for "cookie"."""
+    if backend == "cookie":
+        return None
+    if backend == "memory":
+        store = MemoryStore(ttl)
+    elif backend == "sqlite":
+        store = SQLiteStore(db_path, ttl)
+    elif backend == "network":
+        if client is None:
+            url = os.environ.get("SESSION_REDIS_URL")
+            if url:
+                import redis  # tùy chọn: pip install redis
+                client = redis.Redis.from_url(url)
+            else:
+                client = LocalNetworkClient()
+        store = NetworkStore(client, ttl)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    if cache_size:
+        store = CachedStore(store, cache_size)
+    return store
+
+
+def init_session(app, backend=None, **kwargs):
+    """Install the session store selected by SESSION_BACKEND (default: signed cookie)."""
+    backend = backend or os.environ.get("SESSION_BACKEND", "cookie")
+    kwargs.setdefault("db_path", os.environ.get("SESSION_DB", SESSION_DB))
+    kwargs.setdefault("cache_size", int(os.environ.get("SESSION_CACHE_SIZE", CACHE_SIZE)))
+    store = create_store(backend, **kwargs)
+    if store is not None:
+        app.session_interface = ServerSideSessionInterface(store)
+    app.extensions["session_store"] = store
+    return store
@@ -1,11 +1,17 @@
-from flask import Flask, jsonify, session, request, Response
+from flask import Flask, jsonify, session, request, Response, url_for
+import os
+from session_store import init_session
+from widget_bundles import BundleRegistry
 
 app = Flask(__name__)
 
 app.config['SECRET_KEY'] = 'mot_key_bi_mat_rat_bao_mat'
-app.config['SESSION_TYPE'] = 'filesystem'
+# Chọn nơi lưu session: cookie (mặc định) | sqlite | network | memory
+#   SESSION_BACKEND=sqlite python stateful.py
+init_session(app)
 
 # --- Dữ liệu giả lập ---
+# Chỉ đọc, giống nhau ở mọi worker → không phải trạng thái cần chia sẻ
 BOOK_DATA = {
     "user123": [
         {"book_key": "B001", "title": "Sức Mạnh Của Hiện Tại"},
@@ -21,42 +27,68 @@ def login(user_id):
     "Server lưu trạng thái (user_id)"
     if user_id in BOOK_DATA:
         session['user_id'] = user_id
-        return jsonify({"message": f"Login success. User {user_id} has been saved."}, 200)
-    return jsonify({"error": "User not found."}, 401)
+        return jsonify({"message": f"Login success. User {user_id} has been saved."}), 200
+    return jsonify({"error": "User not found."}), 401
+
+@app.route("/logout", methods=["POST"])
+def logout():
+    session.clear()
+    return jsonify({"message": "Logged out."}), 200
 
 @app.route("/api/books", methods=["GET"])
 def get_books():
     user_id = session.get('user_id')
     if not user_id:
-        return jsonify({"error": "Unauthorized access. Server cannot find user session."}, 401)
+        return jsonify({"error": "Unauthorized access. Server cannot find user session."}), 401
 
     print(f"Get user_id '{user_id}' from session.")
     books = BOOK_DATA.get(user_id, [])
     return jsonify({"user_id": user_id, "books": books})
 
 # CODE ON DEMAND
+# Widget JS được build sẵn lúc khởi động (minify + hash + gzip) từ widgets/*.js.
+# /api/widget/promo chỉ redirect tới URL có hash; bản bundle thì cache vĩnh viễn.
+widgets = BundleRegistry()
+IMMUTABLE = "public, max-age=31536000, immutable"
+PROMO_MAX_AGE = 60   # giây; widget sửa xong sẽ tới client chậm nhất sau chừng này
+PROMO_WIDGETS = {"premium": "promo_premium"}
 
 @app.route("/api/widget/promo", methods=["GET"])
 def get_promo_code():
-    "Code-On-Demand: Server trả về mã JavaScript thực thi"
+    "Code-On-Demand: trỏ client tới bundle JavaScript của widget"
+    widgets.reload_if_changed()
     user_type = request.args.get('user_type')
+    bundle = widgets.current(PROMO_WIDGETS.get(user_type, "promo_basic"))
+
+    # 302 không body (redirect() của Flask kèm ~280 byte HTML, lớn hơn cả widget)
+    response = Response(status=302)
+    response.headers["Location"] = url_for("get_widget_bundle", filename=bundle.filename)
+    response.headers["Cache-Control"] = f"public, max-age={PROMO_MAX_AGE}"
+    return response
 
-    if user_type == 'premium':
-        js_code = """
-        function showPremiumPromo() {
-            const promoDiv = document.getElementById('promo-message');
-            promoDiv.innerHTML = '<div>Premium!</div>';
-        }
-        showPremiumPromo();
-        """
+@app.route("/static/widgets/<filename>", methods=["GET"])
+def get_widget_bundle(filename):
+    bundle = widgets.by_filename(filename)
+    if bundle is None:
+        return jsonify({"error": "Unknown widget bundle."}), 404
+
+    # Nội dung gắn với hash trong tên file → ETag = hash, không bao giờ đổi.
+    # Bản gzip là một representation khác nên có ETag riêng ("<hash>-gzip").
+    # Accept-Encoding có q-value: "gzip;q=0" nghĩa là không nhận gzip.
+    gzip_ok = request.accept_encodings.best_match(["gzip"]) == "gzip"
+    etag = f"{bundle.hash}-gzip" if gzip_ok else bundle.hash
+    if any(tag in request.if_none_match for tag in (bundle.hash, f"{bundle.hash}-gzip")):
+        response = Response(status=304)
+    elif gzip_ok:
+        response = Response(bundle.gzipped, mimetype="application/javascript")
+        response.headers["Content-Encoding"] = "gzip"
     else:
-        js_code = """
-        function showBasicPromo() {
-            const promoDiv = document.getElementById('promo-message');
-            promoDiv.innerHTML = '<div>Cơ Bản</div>';
-        }
-        showBasicPromo();
-        """
-    
-    # JavaScript code với Content-Type là application/javascript
-    return Response(js_code, mimetype="application/javascript")
+        # JavaScript code với Content-Type là application/javascript
+        response = Response(bundle.body, mimetype="application/javascript")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = IMMUTABLE
+    response.vary.add("Accept-Encoding")
+    return response
+
+if __name__ == "__main__":
+    app.run(port=int(os.environ.get("PORT", 5003)), debug=True)
@@ -0,0 +1,110 @@
+# Test session_store.py: các store server-side, TTL, LRU cache, và
+# SessionInterface khi hai "worker" (hai app Flask) dùng chung một store.
+#
+#   python test_session_store.py
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask, jsonify, session
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+from session_store import (
+    CachedStore, LocalNetworkClient, MemoryStore, NetworkStore, SQLiteStore,
+    ServerSideSessionInterface,
+)
+
+
+def make_worker(store):
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test"
+    app.session_interface = ServerSideSessionInterface(store)
+
+    @app.route("/login/<user_id>", methods=["POST"])
+    def login(user_id):
+        session["user_id"] = user_id
+        return jsonify({"ok": True})
+
+    @app.route("/me")
+    def me():
+        return jsonify({"user_id": session.get("user_id")})
+
+    @app.route("/logout", methods=["POST"])
+    def logout():
+        session.clear()
+        return jsonify({"ok": True})
+
+    return app.test_client()
+
+
+def check_ttl(store):
+    store.set("a", {"user_id": "u1"})
+    assert store.get("a") == {"user_id": "u1"}
+    time.sleep(0.3)
+    assert store.get("a") is None, f"{type(store).__name__} returned an expired session"
+
+
+def test_ttl_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_store = SQLiteStore(os.path.join(tmp, "sessions.db"), ttl=0.2)
+        for store in (MemoryStore(ttl=0.2), sqlite_store, NetworkStore(LocalNetworkClient(), ttl=0.2)):
+            check_ttl(store)
+        sqlite_store.set("b", {"x": 1})
+        time.sleep(0.3)
+        assert sqlite_store.purge_expired() == 2  # "a" và "b"
+        db.close_all_pools()
+    print("✅ Expired sessions are never returned and get purged")
+
+
+def test_cache_is_bounded_and_read_through():
+    client = LocalNetworkClient()
+    cached = CachedStore(NetworkStore(client), max_entries=2)
+    for sid in ("a", "b", "c"):
+        cached.set(sid, {"sid": sid})
+    assert len(cached._entries) == 2
+    assert cached.get("c") == {"sid": "c"} and cached.hits == 1    # hit: chỉ hỏi exists
+    assert cached.get("a") == {"sid": "a"} and cached.misses == 1  # bị đẩy ra → đọc store
+    print(f"✅ LRU cache bounded (hits={cached.hits}, misses={cached.misses})")
+
+
+def test_workers_share_sessions():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        # Mỗi worker có store + cache riêng (TTL mặc định), chỉ chung file SQLite
+        worker_a = make_worker(CachedStore(SQLiteStore(path)))
+        worker_b = make_worker(CachedStore(SQLiteStore(path)))
+
+        worker_a.post("/login/user123")
+        cookie = worker_a.get_cookie("session")
+        assert len(cookie.value) > 20, "cookie should carry only the session id"
+        worker_b.set_cookie("session", cookie.value)
+        assert worker_b.get("/me").get_json() == {"user_id": "user123"}
+
+        worker_b.post("/logout")
+        # A vẫn còn session trong cache, nhưng không được dùng nó sau logout
+        assert worker_a.get("/me").get_json() == {"user_id": None}
+        db.close_all_pools()
+    print("✅ Login on worker A is visible on worker B; logout on B ends it on A at once")
+
+
+def test_cache_honors_delete_elsewhere():
+    client = LocalNetworkClient()
+    for store in (MemoryStore(), NetworkStore(client)):
+        worker_a, worker_b = CachedStore(store), CachedStore(store)
+        worker_a.set("s", {"user_id": "u1"})
+        assert worker_b.get("s") == {"user_id": "u1"}
+        worker_b.delete("s")
+        assert worker_a.get("s") is None, f"{type(store).__name__}: deleted session served from cache"
+        assert "s" not in worker_a._entries
+    print("✅ Cached session is dropped once another worker deletes it")
+
+
+if __name__ == "__main__":
+    test_ttl_eviction()
+    test_cache_is_bounded_and_read_through()
+    test_workers_share_sessions()
+    test_cache_honors_delete_elsewhere()
@@ -0,0 +1,72 @@
+# Test bundle widget: hash theo nội dung, gzip sẵn, header immutable, hot reload.
+#
+#   python test_widget_bundles.py
+
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stateful
+from widget_bundles import KEEP_OLD_VERSIONS, BundleRegistry
+
+
+def write_widget(directory, name, text):
+    path = os.path.join(directory, f"{name}.js")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    # mtime_ns đổi chắc chắn kể cả trên filesystem có độ phân giải thấp
+    stamp = time.time_ns() + 10**9 * len(text)
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_promo_redirects_to_immutable_bundle():
+    client = stateful.app.test_client()
+    redirect = client.get("/api/widget/promo?user_type=premium")
+    assert redirect.status_code == 302 and not redirect.data
+    location = redirect.headers["Location"]
+    assert location.startswith("/static/widgets/promo_premium.")
+
+    bundle = client.get(location, headers={"Accept-Encoding": "gzip"})
+    assert "immutable" in bundle.headers["Cache-Control"]
+    assert bundle.headers["Content-Encoding"] == "gzip"
+    assert b"Premium!" in gzip.decompress(bundle.data)
+    assert bundle.headers["ETag"].endswith('-gzip"')
+    assert client.get(location, headers={"If-None-Match": bundle.headers["ETag"]}).status_code == 304
+
+    # gzip;q=0 → bản gốc, với ETag khác bản gzip; ETag nào cũng revalidate được
+    plain = client.get(location, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in plain.headers and b"Premium!" in plain.data
+    assert plain.headers["ETag"] != bundle.headers["ETag"]
+    for etag in (plain.headers["ETag"], bundle.headers["ETag"]):
+        assert client.get(location, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/static/widgets/promo_premium.000000000000.js").status_code == 404
+    print("✅ Promo redirects to a hashed, pre-gzipped, immutable bundle with per-coding ETags")
+
+
+def test_hot_reload():
+    with tempfile.TemporaryDirectory() as tmp:
+        write_widget(tmp, "promo", "// v1\nshow('v1');\n")
+        registry = BundleRegistry(tmp, reload_interval=0)
+        first = registry.current("promo")
+        assert first.body == b"show('v1');\n"
+        assert not registry.reload_if_changed()
+
+        write_widget(tmp, "promo", "show('v2');\n")
+        assert registry.reload_if_changed()
+        second = registry.current("promo")
+        assert second.filename != first.filename
+        assert registry.by_filename(first.filename) is first, "old URL should keep working"
+
+        for n in range(3, KEEP_OLD_VERSIONS + 4):
+            write_widget(tmp, "promo", f"show('v{n}');\n")
+            registry.reload_if_changed()
+        assert registry.by_filename(first.filename) is None, "old versions are bounded"
+    print("✅ Editing a widget source rebuilds its bundle without a restart")
+
+
+if __name__ == "__main__":
+    test_promo_redirects_to_immutable_bundle()
+    test_hot_reload()
@@ -0,0 +1,108 @@
+"""
+Bundle cho Code-On-Demand widget (stateful.py).
+
+Mã nguồn widget nằm trong thư mục widgets/*.js. Lúc khởi động, mỗi file được
+build một lần thành bundle:
+- minify (bỏ comment dòng, khoảng trắng đầu/cuối dòng, dòng trống)
+- đặt tên theo hash nội dung: promo_basic.<hash>.js → URL không bao giờ đổi
+  nội dung, nên có thể cache vĩnh viễn (Cache-Control: immutable)
+- nén gzip sẵn, không phải nén lại mỗi request
+
+BundleRegistry.reload_if_changed() build lại khi file nguồn đổi (theo mtime),
+nên sửa widget không cần restart server. Bundle cũ vẫn được giữ lại một thời
+gian cho client còn đang giữ URL cũ.
+"""
+import glob
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+WIDGET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "widgets")
+HASH_LENGTH = 12
+KEEP_OLD_VERSIONS = 3       # số bản cũ giữ lại cho mỗi widget
+RELOAD_INTERVAL = 1.0       # giây giữa 2 lần kiểm tra mtime
+
+
+def minify(source):
+    """Conservative JS minifier: drops // comment lines, indentation and blank lines."""
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+class Bundle:
+    def __init__(self, name, source):
+        self.name = name
+        self.body = minify(source).encode("utf-8")
+        self.hash = hashlib.sha256(self.body).hexdigest()[:HASH_LENGTH]
+        self.filename = f"{name}.{self.hash}.js"
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+
+
+class BundleRegistry:
+    """Widget name → current Bundle, plus recent bundles by hashed filename."""
+
+    def __init__(self, source_dir=WIDGET_DIR, reload_interval=RELOAD_INTERVAL):
+        self.source_dir = source_dir
+        self.reload_interval = reload_interval
+        self._current = {}        # name -> Bundle
+        self._by_filename = {}    # "<name>.<hash>.js" -> Bundle (cả bản cũ)
+        self._mtimes = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.build()
+
+    def _sources(self):
+        return {
+            os.path.splitext(os.path.basename(path))[0]: path
+            for path in glob.glob(os.path.join(self.source_dir, "*.js"))
+        }
+
+    def build(self):
+        sources = self._sources()
+        mtimes = {path: os.stat(path).st_mtime_ns for path in sources.values()}
+        current = {}
+        for name, path in sources.items():
+            with open(path, encoding="utf-8") as f:
+                current[name] = Bundle(name, f.read())
+
+        with self._lock:
+            by_filename = dict(self._by_filename)
+            for bundle in current.values():
+                by_filename[bundle.filename] = bundle
+            # Giữ bản hiện tại + KEEP_OLD_VERSIONS bản gần nhất của mỗi widget
+            for name in {b.name for b in by_filename.values()}:
+                versions = [f for f, b in by_filename.items() if b.name == name]
+                for filename in versions[:-(KEEP_OLD_VERSIONS + 1)]:
+                    del by_filename[filename]
+            self._current, self._by_filename, self._mtimes = current, by_filename, mtimes
+            self.builds += 1
+
+    def reload_if_changed(self):
+        """Rebuild if a source file was added, removed or modified. Returns True if rebuilt."""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        sources = self._sources()
+        try:
+            mtimes = {path: os.stat(path).st_mtime_ns for path in sources.values()}
+        except FileNotFoundError:
+            mtimes = None
+        if mtimes == self._mtimes:
+            return False
+        self.build()
+        return True
+
+    def current(self, name):
+        return self._current.get(name)
+
+    def by_filename(self, filename):
+        return self._by_filename.get(filename)
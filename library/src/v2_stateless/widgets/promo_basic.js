@@ -0,0 +1,6 @@
+// Widget khuyến mãi cho thành viên cơ bản
+function showBasicPromo() {
+    const promoDiv = document.getElementById('promo-message');
+    promoDiv.innerHTML = '<div>Cơ Bản</div>';
+}
+showBasicPromo();
@@ -0,0 +1,6 @@
+// Widget khuyến mãi cho thành viên premium
+function showPremiumPromo() {
+    const promoDiv = document.getElementById('promo-message');
+    promoDiv.innerHTML = '<div>Premium!</div>';
+}
+showPremiumPromo();
@@ -1,7 +1,10 @@
 from flask import Flask, request, jsonify, make_response
-import sqlite3, hashlib, json
+import hashlib, json, os, sys
 from flask_cors import CORS
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db  # Tầng truy cập SQLite dùng chung (pool + WAL)
+
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
@@ -18,22 +21,7 @@ def check_auth():
     token = auth_header.split(" ")[1]
     return token == API_TOKEN
 
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS borrowed_books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_key TEXT UNIQUE,
-            title TEXT,
-            author TEXT,
-            cover_url TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-init_db()
+db.init_db(DB_NAME)
 
 @app.before_request
 def require_auth():
@@ -60,22 +48,10 @@ def borrow_book():
     if not book_key:
         return jsonify({"status": "error", "message": "Missing book_key"}), 400
 
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT * FROM borrowed_books WHERE book_key = ?", (book_key,))
-    existing = c.fetchone()
-
-    if existing:
-        conn.close()
+    # INSERT OR IGNORE: kiểm tra + thêm trong một câu lệnh, không bị race
+    if not db.borrow_book(book_key, title, author, cover_url, DB_NAME):
         return jsonify({"status": "exists", "message": "Already borrowed"}), 200
 
-    c.execute(
-        "INSERT INTO borrowed_books (book_key, title, author, cover_url) VALUES (?, ?, ?, ?)",
-        (book_key, title, author, cover_url)
-    )
-    conn.commit()
-    conn.close()
-
     response = {
         "status": "success",
         "message": "Borrowed successfully",
@@ -95,11 +71,7 @@ def borrow_book():
 # ---------------------------
 @app.route("/api/v4/books", methods=["GET"])
 def get_books():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT book_key, title, author, cover_url FROM borrowed_books")
-    rows = c.fetchall()
-    conn.close()
+    rows = db.list_books(DB_NAME)
 
     books = [
         {
@@ -140,11 +112,7 @@ def get_books():
 # ---------------------------
 @app.route("/api/v4/books/<book_key>", methods=["GET"])
 def get_book(book_key):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT book_key, title, author, cover_url FROM borrowed_books WHERE book_key = ?", (book_key,))
-    book = c.fetchone()
-    conn.close()
+    book = db.get_book(book_key, DB_NAME)
 
     if not book:
         return jsonify({"status": "error", "message": "Book not found"}), 404
@@ -182,14 +150,7 @@ def get_book(book_key):
 # ---------------------------
 @app.route("/api/v4/books/<book_key>", methods=["DELETE"])
 def return_book(book_key):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("DELETE FROM borrowed_books WHERE book_key = ?", (book_key,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
-
-    if deleted == 0:
+    if not db.return_book(book_key, DB_NAME):
         return jsonify({"status": "error", "message": "Book not found"}), 404
 
     return jsonify({
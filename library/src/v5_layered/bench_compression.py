@@ -0,0 +1,78 @@
+# Benchmark middleware nén + conditional request trên danh sách 5k sách.
+# Chạy in-process bằng Flask test client, database tạm (không cần start server):
+#
+#   python bench_compression.py [số_sách]
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+import database as db
+import middleware
+
+N_BOOKS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+RUNS = 30
+AUTH = {"Authorization": "Bearer demo123"}
+LINK_MBPS = 10   # băng thông giả định để ước lượng thời gian truyền
+
+
+def seed(db_name):
+    with db.get_pool(db_name).connection() as conn:
+        with conn:
+            conn.executemany(db.SQL_INSERT_BOOK, [
+                (f"/works/OL{i}W", f"Book title number {i}", f"Author {i % 300}",
+                 f"https://covers.openlibrary.org/b/id/{100000 + i}-M.jpg")
+                for i in range(N_BOOKS)
+            ])
+    # Last-Modified chỉ được gửi khi lần ghi cuối cách hiện tại >= 1 giây
+    time.sleep(1.1)
+
+
+def measure(client, headers):
+    timings, size, status = [], 0, None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        resp = client.get("/api/v5/books", headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        size, status = len(resp.get_data()), resp.status_code
+    return status, size, statistics.median(timings)
+
+
+def main():
+    old_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            import server
+            seed(server.DB_NAME)
+            client = server.app.test_client()
+
+            first = client.get("/api/v5/books", headers=AUTH)
+            validators = {"If-Modified-Since": first.headers["Last-Modified"]}
+
+            cases = [("identity", {})]
+            cases += [(enc, {"Accept-Encoding": enc}) for enc in middleware.supported_encodings()]
+            cases += [("If-Modified-Since", validators)]
+
+            print(f"GET /api/v5/books với {N_BOOKS} sách, median của {RUNS} lần")
+            print(f"{'variant':<20}{'status':>7}{'bytes':>11}{'server ms':>11}{'+ transfer ms':>15}")
+            for name, extra in cases:
+                status, size, ms = measure(client, {**AUTH, **extra})
+                transfer_ms = size * 8 / (LINK_MBPS * 1_000_000) * 1000
+                print(f"{name:<20}{status:>7}{size:>11}{ms:>11.2f}{ms + transfer_ms:>15.2f}")
+            cache = server.app.extensions["compression_cache"]
+            print(f"compressed-variant cache: {cache.hits} hits / {cache.misses} misses")
+            print(f"(transfer ước lượng ở {LINK_MBPS} Mbit/s)")
+        finally:
+            db.close_all_pools()
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    main()
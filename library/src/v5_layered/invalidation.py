@@ -0,0 +1,109 @@
+"""
+Kênh invalidation giữa backend v5 và các proxy.
+
+Backend publish danh sách key (đường dẫn phía client, ví dụ "/api/books",
+"/api/books/<book_key>") sau mỗi lần mượn/trả; mỗi proxy subscribe và chỉ xóa
+đúng các key đó khỏi cache. Nhờ vậy proxy có thể trả cache mà không cần hỏi
+lại backend, kể cả khi có nhiều process proxy hoặc có ghi không đi qua proxy.
+
+- UnixSocketChannel: mỗi subscriber bind một Unix datagram socket trong
+  INVALIDATION_DIR; publisher gửi event tới mọi socket trong thư mục đó.
+- LocalChannel: bản thay thế trong cùng process (test, Windows).
+"""
+import atexit
+import glob
+import itertools
+import json
+import os
+import socket
+import tempfile
+import threading
+
+INVALIDATION_DIR = os.environ.get(
+    "INVALIDATION_DIR", os.path.join(tempfile.gettempdir(), "library_v5_invalidation")
+)
+SEND_TIMEOUT = 0.2
+MAX_EVENT_SIZE = 64 * 1024
+
+
+def book_keys(book_key):
+    """Cache keys affected by a borrow/return of book_key."""
+    return ["/api/books", f"/api/books/{book_key}"]
+
+
+class LocalChannel:
+    """In-process pub/sub: publish() calls every subscriber synchronously."""
+
+    def __init__(self):
+        self._subscribers = []
+
+    def publish(self, keys):
+        for callback in list(self._subscribers):
+            callback(list(keys))
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+
+class UnixSocketChannel:
+    """Fan-out pub/sub over Unix datagram sockets, one socket per subscriber."""
+
+    _ids = itertools.count()
+
+    def __init__(self, directory=INVALIDATION_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.settimeout(SEND_TIMEOUT)
+        self._lock = threading.Lock()
+
+    def publish(self, keys):
+        payload = json.dumps({"keys": list(keys)}).encode()
+        for path in glob.glob(os.path.join(self.directory, "*.sock")):
+            try:
+                with self._lock:
+                    self._sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Subscriber đã tắt mà không dọn socket → xóa file thừa
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                print(f"Invalidation: could not notify {path}: {e}")
+
+    def subscribe(self, callback):
+        path = os.path.join(self.directory, f"{os.getpid()}-{next(self._ids)}.sock")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(path)
+        atexit.register(_unlink_quietly, path)
+
+        def listen():
+            while True:
+                data = sock.recv(MAX_EVENT_SIZE)
+                try:
+                    keys = json.loads(data)["keys"]
+                except (ValueError, KeyError):
+                    continue
+                callback(keys)
+
+        threading.Thread(target=listen, name="invalidation-listener", daemon=True).start()
+        return path
+
+
+def _unlink_quietly(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+_local_channel = LocalChannel()
+
+
+def create_channel():
+    """Unix socket channel where available, otherwise the shared in-process stand-in."""
+    kind = os.environ.get("INVALIDATION_CHANNEL")
+    if kind == "local" or (kind is None and not hasattr(socket, "AF_UNIX")):
+        return _local_channel
+    return UnixSocketChannel()
@@ -0,0 +1,153 @@
+"""
+Middleware dùng chung cho backend (server.py) và proxy (proxy.py) của v5:
+
+- Conditional request: If-None-Match / If-Modified-Since → 304 (werkzeug
+  make_conditional), dựa trên ETag và Last-Modified do handler đặt. Handler
+  luôn trả bản đầy đủ, nên 304 giữ nguyên ETag, Cache-Control, Last-Modified.
+- Nén response: chọn br / gzip theo Accept-Encoding (có q-value), chỉ nén
+  body lớn hơn ngưỡng MIN_SIZE.
+- Cache bản đã nén: khóa theo (ETag hoặc hash body, encoding), nên cùng một
+  danh sách sách chỉ bị nén một lần chứ không nén lại mỗi request.
+- ETag của bản nén mang theo encoding ("<hash>-gzip", "<hash>-br"): ETag mạnh
+  phải khác nhau giữa các content-coding, nếu không cache có thể trả nhầm bản
+  nén cho một lần revalidate của bản gốc (và ngược lại).
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+try:
+    import brotli  # tùy chọn: pip install brotli
+except ImportError:
+    brotli = None
+
+MIN_SIZE = 1024           # byte; body nhỏ hơn thì nén không đáng
+CACHE_SIZE = 128          # số bản nén giữ trong cache
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "text/")
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best encoding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressedCache:
+    """Small LRU of compressed bodies keyed by (validator, encoding)."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, key, body, encoding):
+        with self._lock:
+            compressed = self._entries.get((key, encoding))
+            if compressed is not None:
+                self._entries.move_to_end((key, encoding))
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = _compress(body, encoding)
+        with self._lock:
+            self._entries[(key, encoding)] = compressed
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+def coded_etag(etag, encoding):
+    """ETag của biểu diễn theo encoding; bỏ hậu tố encoding cũ (ETag proxy nhận từ backend)."""
+    for known in ("br", "gzip"):
+        if etag.endswith("-" + known):
+            etag = etag[:-len(known) - 1]
+            break
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def _is_compressible(response, min_size):
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    if not response.mimetype.startswith(COMPRESSIBLE_TYPES):
+        return False
+    return response.calculate_content_length() >= min_size
+
+
+class ValidatorResponse(Response):
+    """Response giữ Last-Modified trên 304 (werkzeug bỏ nó như một entity header)."""
+
+    def get_wsgi_headers(self, environ):
+        headers = super().get_wsgi_headers(environ)
+        if self.status_code == 304 and "Last-Modified" in self.headers and "Last-Modified" not in headers:
+            headers["Last-Modified"] = self.headers["Last-Modified"]
+        return headers
+
+
+def init_middleware(app, min_size=MIN_SIZE, cache=None):
+    """Register conditional-request + compression handling on a Flask app."""
+    app.response_class = ValidatorResponse
+    cache = cache or CompressedCache()
+    app.extensions["compression_cache"] = cache
+
+    @app.after_request
+    def conditional_and_compress(response):
+        # 1) Chọn encoding trước, để ETag đã mang encoding khi so với If-None-Match
+        encoding = None
+        if _is_compressible(response, min_size):
+            response.vary.add("Accept-Encoding")
+            encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(coded_etag(etag, encoding), weak)
+
+        # 2) 304 nếu client đã có bản mới nhất (ETag ưu tiên hơn Last-Modified)
+        response.make_conditional(request)
+        if encoding is None or response.status_code != 200:
+            return response
+
+        # 3) Nén theo Accept-Encoding
+        body = response.get_data()
+        key = (request.path, etag or hashlib.sha1(body).hexdigest())
+        response.set_data(cache.get_or_compress(key, body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    return app
@@ -1,13 +1,44 @@
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-import requests, time
+import os, threading, time
 from collections import defaultdict
+from middleware import init_middleware
+from invalidation import create_channel, book_keys
+from upstream import UpstreamPool, NoBackendAvailable, CircuitOpen, WriteNotRetried, OPEN_SECONDS
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
-
-# server.py
-BACKEND_URL = "http://127.0.0.1:5000"
+init_middleware(app)  # nén + 304 cho client, dùng lại bản nén theo ETag
+
+# Danh sách server.py phía sau proxy, ví dụ:
+#   BACKEND_URLS=http://127.0.0.1:5000,http://127.0.0.1:5002 python proxy.py
+BACKEND_URLS = os.environ.get("BACKEND_URLS", "http://127.0.0.1:5000").split(",")
+API_PREFIX = "/api/v5"   # /api/books (proxy) → /api/v5/books (backend)
+upstreams = UpstreamPool(BACKEND_URLS)
+
+# requests đã tự giải nén body từ backend → không được chuyển tiếp các header
+# mô tả body gốc; middleware sẽ tự nén lại cho client.
+EXCLUDED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+CACHED_HEADERS = ("ETag", "Last-Modified", "Cache-Control", "Access-Control-Expose-Headers")
+
+def client_headers(resp):
+    return [(k, v) for k, v in resp.headers.items() if k.lower() not in EXCLUDED_HEADERS]
+
+def client_key():
+    """Định danh client cho sticky routing (token + IP)."""
+    return (request.headers.get("Authorization"), request.remote_addr)
+
+@app.errorhandler(NoBackendAvailable)
+def no_backend(error):
+    if isinstance(error, CircuitOpen):
+        # Mạch mở trên mọi backend → trả lỗi ngay, không chờ timeout
+        resp = jsonify({"status": "error", "message": "Backend temporarily unavailable"})
+        resp.headers["Retry-After"] = str(int(OPEN_SECONDS))
+        return resp, 503
+    if isinstance(error, WriteNotRetried):
+        # Backend có thể đã ghi → không gửi lại, để client kiểm tra rồi tự quyết
+        return jsonify({"status": "error", "message": "Backend did not answer, the write may have been applied"}), 504
+    return jsonify({"status": "error", "message": "No backend available"}), 502
 
 # ----------------------------
 # RATE LIMITING - Ngăn spam mượn sách
@@ -35,81 +66,159 @@ def rate_limit():
 def home():
     return "Proxy Layer (Port 5001) - Cache + Rate Limiting + Forwarding"
 
+@app.route("/upstreams")
+def upstream_status():
+    return jsonify(upstreams.status())
+
+@app.route("/metrics")
+def metrics():
+    with cache_lock:
+        cache_stats = dict(cache_stats_counts, entries=len(cache))
+    return jsonify({
+        "upstreams": upstreams.status(),
+        "retry_budget": upstreams.retry_budget.status(),
+        "cache": cache_stats,
+    })
+
 
 # ----------------------------
-# ETag CACHE
+# CACHE - đánh dấu cũ theo event invalidation từ backend
 # ----------------------------
-etag_cache = None
-data_cache = None
-
-@app.route("/api/books", methods=["GET"])
-def proxy_books_list():
-    global etag_cache, data_cache
+# Khóa: (đường dẫn, Authorization) để không trả dữ liệu cho client chưa
+# được backend xác thực. Entry chưa bị đánh dấu stale là entry còn mới:
+# backend publish event sau mỗi lần mượn/trả (kể cả ghi không đi qua proxy
+# này), nên proxy trả thẳng cache mà không gọi backend.
+# Entry stale không bị xóa ngay: khi backend lỗi / mạch mở, proxy vẫn trả
+# bản cũ (stale-if-error) thay vì lỗi 5xx.
+CACHE_MAX_AGE = 60        # giây, lưới an toàn nếu lỡ mất event
+CACHE_MAX_ENTRIES = 1024
+cache = {}                # (path, auth) -> {"body", "headers", "etag", "stored_at", "stale"}
+cache_lock = threading.Lock()
+cache_generation = 0      # tăng sau mỗi invalidation → bỏ response đang bay về
+cache_stats_counts = {"hits": 0, "misses": 0, "stale_served": 0}
+
+def invalidate(keys):
+    global cache_generation
+    keys = set(keys)
+    with cache_lock:
+        cache_generation += 1
+        for k, entry in cache.items():
+            if k[0] in keys:
+                entry["stale"] = True
+    print(f"Proxy: invalidated {sorted(keys)}")
+
+def serve_stale(entry, reason):
+    print(f"Proxy: {reason}, serving stale cached data")
+    with cache_lock:
+        cache_stats_counts["stale_served"] += 1
+    headers = dict(entry["headers"])
+    headers["Warning"] = '110 - "Response is Stale"'
+    headers["X-Cache"] = "STALE"
+    return Response(entry["body"], 200, headers, mimetype="application/json")
+
+channel = create_channel()
+channel.subscribe(invalidate)
+
+def cached_get(path):
+    auth_header = request.headers.get("Authorization")
+    key = (path, auth_header)
+    with cache_lock:
+        entry = cache.get(key)
+        generation = cache_generation
+
+    if entry and not entry["stale"] and time.time() - entry["stored_at"] < CACHE_MAX_AGE:
+        with cache_lock:
+            cache_stats_counts["hits"] += 1
+        return Response(entry["body"], 200, entry["headers"], mimetype="application/json")
+    with cache_lock:
+        cache_stats_counts["misses"] += 1
 
     headers = {}
-    if etag_cache:
-        headers["If-None-Match"] = etag_cache
-    auth_header = request.headers.get("Authorization")
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]   # hết hạn → hỏi lại bằng ETag
     if auth_header:
         headers["Authorization"] = auth_header
 
-    resp = requests.get(f"{BACKEND_URL}/api/books", headers=headers)
+    try:
+        resp = upstreams.request("GET", API_PREFIX + path[len("/api"):], client_key(), headers=headers)
+    except NoBackendAvailable as e:
+        if entry:
+            return serve_stale(entry, "circuit open" if isinstance(e, CircuitOpen) else "backend down")
+        raise
 
-    if resp.status_code == 304 and data_cache:
+    if resp.status_code >= 500 and entry:
+        return serve_stale(entry, f"backend returned {resp.status_code}")
+    if resp.status_code == 304 and entry:
         print("Proxy: ETag matched, return cached data")
-        return Response(data_cache, status=200, mimetype="application/json")
+        body, cached_headers = entry["body"], entry["headers"]
+    elif resp.status_code == 200:
+        body = resp.content
+        cached_headers = {k: resp.headers[k] for k in CACHED_HEADERS if k in resp.headers}
+    else:
+        # Forward toàn bộ response xuống client
+        return Response(resp.content, resp.status_code, client_headers(resp))
+
+    with cache_lock:
+        if generation == cache_generation:
+            if key not in cache and len(cache) >= CACHE_MAX_ENTRIES:
+                cache.pop(next(iter(cache)))
+            cache[key] = {
+                "body": body,
+                "headers": cached_headers,
+                "etag": cached_headers.get("ETag"),
+                "stored_at": time.time(),
+                "stale": False,
+            }
+    return Response(body, 200, cached_headers, mimetype="application/json")
 
-    if resp.status_code == 200:
-        etag_cache = resp.headers.get("ETag")
-        data_cache = resp.content
-        print(f"Proxy: updated cache with new ETag: {etag_cache}")
+@app.route("/api/books", methods=["GET"])
+def proxy_books_list():
+    return cached_get("/api/books")
 
-    # Forward toàn bộ response xuống client
-    return Response(resp.content, resp.status_code, resp.headers.items())
+@app.route("/api/books/<book_key>", methods=["GET"])
+def proxy_book_detail(book_key):
+    return cached_get(f"/api/books/{book_key}")
 
 # ----------------------------
 # DELETE - Trả sách → Xóa cache
 # ----------------------------
 @app.route("/api/books/<book_key>", methods=["DELETE"])
 def proxy_return_book(book_key):
-    global data_cache, etag_cache
-
     headers = {}
     auth_header = request.headers.get("Authorization")
     if auth_header:
         headers["Authorization"] = auth_header
 
-    resp = requests.delete(f"{BACKEND_URL}/api/books/{book_key}", headers=headers)
+    resp = upstreams.request("DELETE", f"{API_PREFIX}/books/{book_key}", client_key(), headers=headers)
 
     if resp.status_code == 200:
-        data_cache = None
-        etag_cache = None
-        print(f"Cache invalidated after returning book: {book_key}")
+        # Backend cũng publish event; xóa ngay tại đây để chính client này
+        # không đọc lại bản cũ trước khi event tới
+        invalidate(book_keys(book_key))
 
-    return Response(resp.content, resp.status_code, resp.headers.items())
+    return Response(resp.content, resp.status_code, client_headers(resp))
 
 # ----------------------------
 # Forward các route khác (POST borrow, GET /api/books/<id> ...)
 # ----------------------------
 @app.route("/api/<path:path>", methods=["GET", "POST", "PUT", "PATCH"])
 def forward(path):
-    url = f"{BACKEND_URL}/api/{path}"
-    resp = requests.request(
-        method=request.method,
-        url=url,
+    resp = upstreams.request(
+        request.method,
+        f"{API_PREFIX}/{path}",
+        client_key(),
         headers={k: v for k, v in request.headers if k != "Host"},
         data=request.get_data(),
         allow_redirects=False
     )
 
     # Nếu là POST /api/books (mượn sách thành công) → xóa cache
-    global cache_data, cache_time
-    if request.method == "POST" and "/api/books" in request.path and resp.status_code in (200, 201):
-        cache_data = None
-        cache_time = 0
-        print("Cache invalidated after borrowing a new book")
+    if request.method == "POST" and path == "books" and resp.status_code in (200, 201):
+        book_key = (request.get_json(silent=True) or {}).get("book_key", "")
+        invalidate(book_keys(book_key))
     
-    return Response(resp.content, resp.status_code, resp.headers.items())
+    return Response(resp.content, resp.status_code, client_headers(resp))
 
 if __name__ == "__main__":
+    upstreams.start_health_checks()
     app.run(port=5001, debug=True)
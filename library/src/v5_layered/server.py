@@ -1,9 +1,16 @@
 from flask import Flask, request, jsonify, make_response
-import sqlite3, hashlib, json
+import hashlib, json, os, sys, time
 from flask_cors import CORS
+from middleware import init_middleware
+from invalidation import create_channel, book_keys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db  # Tầng truy cập SQLite dùng chung (pool + WAL)
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
+init_middleware(app)  # gzip/br + If-None-Match / If-Modified-Since
+invalidation_channel = create_channel()  # báo proxy xóa cache sau mỗi lần mượn/trả
 
 DB_NAME = "books.db"
 API_TOKEN = "demo123"
@@ -11,22 +18,7 @@ API_TOKEN = "demo123"
 # ---------------------------
 # Hàm tiện ích
 # --------------------------
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS borrowed_books (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            book_key TEXT UNIQUE,
-            title TEXT,
-            author TEXT,
-            cover_url TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-init_db()
+db.init_db(DB_NAME)
 
 def check_auth():
     auth_header = request.headers.get("Authorization")
@@ -35,6 +27,20 @@ def check_auth():
     token = auth_header.split(" ")[1]
     return token == API_TOKEN
 
+def set_validators(response, etag, last_modified):
+    """ETag, Last-Modified và thời gian cache; middleware giữ chúng trên cả 304."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "public, max-age=60"
+    response.headers["Access-Control-Expose-Headers"] = "ETag, Last-Modified"
+    # Last-Modified chỉ chính xác tới giây → bỏ qua nếu vừa có thay đổi trong giây này
+    if time.time() - last_modified >= 1:
+        response.last_modified = int(last_modified)
+    return response
+
+# Body JSON của danh sách, nhớ theo last_modified của database: khi không có
+# ghi mới, GET /books (200 hay 304) không phải đọc và serialize lại cả danh sách
+books_page = (None, None, None)   # (last_modified, etag, body)
+
 @app.before_request
 def require_auth():
     if request.path == "/" or request.method == "OPTIONS":
@@ -60,21 +66,10 @@ def borrow_book():
     if not book_key:
         return jsonify({"status": "error", "message": "Missing book_key"}), 400
 
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT * FROM borrowed_books WHERE book_key = ?", (book_key,))
-    existing = c.fetchone()
-
-    if existing:
-        conn.close()
+    # INSERT OR IGNORE: kiểm tra + thêm trong một câu lệnh, không bị race
+    if not db.borrow_book(book_key, title, author, cover_url, DB_NAME):
         return jsonify({"status": "exists", "message": "Already borrowed"}), 200
-
-    c.execute(
-        "INSERT INTO borrowed_books (book_key, title, author, cover_url) VALUES (?, ?, ?, ?)",
-        (book_key, title, author, cover_url)
-    )
-    conn.commit()
-    conn.close()
+    invalidation_channel.publish(book_keys(book_key))
 
     response = {
         "status": "success",
@@ -95,65 +90,56 @@ def borrow_book():
 # ---------------------------
 @app.route("/api/v5/books", methods=["GET"])
 def get_books():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT book_key, title, author, cover_url FROM borrowed_books")
-    rows = c.fetchall()
-    conn.close()
-
-    books = [
-        {
-            "book_key": r[0],
-            "title": r[1],
-            "author": r[2],
-            "cover_url": r[3],
+    global books_page
+    # If-None-Match / If-Modified-Since → 304 do middleware xử lý (make_conditional)
+    last_modified = db.last_modified(DB_NAME)
+    cached_at, etag, body = books_page
+    if cached_at != last_modified:
+        rows = db.list_books(DB_NAME)
+
+        books = [
+            {
+                "book_key": r[0],
+                "title": r[1],
+                "author": r[2],
+                "cover_url": r[3],
+                "_links": {
+                    "self": {"href": f"/api/books/{r[0]}", "method": "GET"},
+                    "return": {"href": f"/api/books/{r[0]}", "method": "DELETE"}
+                }
+            }
+            for r in rows
+        ]
+
+        etag = hashlib.md5(json.dumps(books, sort_keys=True).encode()).hexdigest()
+        body = jsonify({
+            "status": "success",
+            "message": "Get borrowed books successfully",
+            "data": books,
             "_links": {
-                "self": {"href": f"/api/books/{r[0]}", "method": "GET"},
-                "return": {"href": f"/api/books/{r[0]}", "method": "DELETE"}
+                "self": {"href": "/api/books", "method": "GET"},
+                "borrow": {"href": "/api/books", "method": "POST"}
             }
-        }
-        for r in rows
-    ]
-
-    etag = hashlib.md5(json.dumps(books, sort_keys=True).encode()).hexdigest()
-    client_etag = request.headers.get("If-None-Match")
-    if client_etag == etag:
-        return make_response("", 304)
-    response = make_response(jsonify({
-        "status": "success",
-        "message": "Get borrowed books successfully",
-        "data": books,
-        "_links": {
-            "self": {"href": "/api/books", "method": "GET"},
-            "borrow": {"href": "/api/books", "method": "POST"}
-        }
-    }))
-    response.headers["Cache-Control"] = "public, max-age=60"
-    response.headers["ETag"] = etag
-    response.headers["Access-Control-Expose-Headers"] = "ETag"
+        }).get_data()
+        books_page = (last_modified, etag, body)
 
-    return response, 200
+    response = make_response(body)
+    response.mimetype = "application/json"
+    return set_validators(response, etag, last_modified), 200
 
 # ---------------------------
 # API: Lấy thông tin một cuốn sách
 # ---------------------------
 @app.route("/api/v5/books/<book_key>", methods=["GET"])
 def get_book(book_key):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("SELECT book_key, title, author, cover_url FROM borrowed_books WHERE book_key = ?", (book_key,))
-    book = c.fetchone()
-    conn.close()
+    last_modified = db.last_modified(DB_NAME)
+    book = db.get_book(book_key, DB_NAME)
 
     if not book:
         return jsonify({"status": "error", "message": "Book not found"}), 404
 
     etag = hashlib.md5(json.dumps(book, sort_keys=True).encode()).hexdigest()
 
-    client_etag = request.headers.get("If-None-Match")
-    if client_etag == etag:
-        return "", 304
-    
     payload = {
         "status": "success",
         "message": "Get a borrowed book successfully",
@@ -170,12 +156,7 @@ def get_book(book_key):
         }
     }
 
-    response = make_response(jsonify(payload))
-    response.headers["ETag"] = etag
-    response.headers["Cache-Control"] = "public, max-age=60"
-    response.headers["Access-Control-Expose-Headers"] = "ETag"
-
-    return response
+    return set_validators(make_response(jsonify(payload)), etag, last_modified)
 
 # ---------------------------
 # API: Trả sách
@@ -184,15 +165,9 @@ def get_book(book_key):
 @app.route("/api/v5/books/<book_key>", methods=["DELETE"])
 
 def return_book(book_key):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-    c.execute("DELETE FROM borrowed_books WHERE book_key = ?", (book_key,))
-    deleted = c.rowcount
-    conn.commit()
-    conn.close()
-
-    if deleted == 0:
+    if not db.return_book(book_key, DB_NAME):
         return jsonify({"status": "error", "message": "Book not found"}), 404
+    invalidation_channel.publish(book_keys(book_key))
 
     return jsonify({
         "status": "success",
@@ -207,4 +182,5 @@ def return_book(book_key):
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Nhiều worker sau proxy: PORT=5002 python server.py
+    app.run(port=int(os.environ.get("PORT", 5000)), debug=True)
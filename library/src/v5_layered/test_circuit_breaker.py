@@ -0,0 +1,238 @@
+# Test circuit breaker + timeout + retry budget của proxy v5.
+# Backend giả (Flask, chạy trong process) có thể chuyển giữa "ok", "slow"
+# (ngủ lâu hơn read timeout) và "error" (500). Kiểm tra:
+#   - request tới backend chậm bị cắt bởi timeout, proxy trả bản cache cũ
+#   - đủ MAX_FAILURES lỗi → mạch mở, proxy không gọi backend nữa (fail fast)
+#   - không có cache → 503 + Retry-After
+#   - hết OPEN_SECONDS → request thử (half-open) thành công → mạch đóng
+#   - /metrics báo trạng thái breaker và số lần trip
+#   - write bị read timeout, hay backend đóng kết nối sau khi đọc request,
+#     không được gửi lại sang backend khác (504); backend chết thì vẫn failover
+#
+#   python test_circuit_breaker.py
+
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+
+import requests
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.dirname(HERE))
+
+# proxy tạo kênh invalidation lúc import: dùng kênh in-process, rồi trả lại
+# biến môi trường để các test khác (subprocess của test_invalidation) không bị ảnh hưởng
+_saved_channel = os.environ.get("INVALIDATION_CHANNEL")
+os.environ["INVALIDATION_CHANNEL"] = "local"
+try:
+    import proxy
+finally:
+    if _saved_channel is None:
+        del os.environ["INVALIDATION_CHANNEL"]
+    else:
+        os.environ["INVALIDATION_CHANNEL"] = _saved_channel
+from invalidation import book_keys
+from upstream import RetryBudget, UpstreamPool, WriteNotRetried
+
+TIMEOUT = (0.3, 0.5)
+SLOW_SECONDS = 2.0
+OPEN_SECONDS = 1.0
+MAX_FAILURES = 2
+HEADERS = {"Authorization": "Bearer demo123"}
+
+
+def fake_backend(state):
+    app = Flask("fake_backend")
+
+    @app.route("/")
+    def home():
+        return "ok"
+
+    @app.route("/api/v5/books")
+    def books():
+        state["hits"] += 1
+        if state["mode"] == "slow":
+            time.sleep(SLOW_SECONDS)
+        if state["mode"] == "error":
+            return jsonify({"status": "error"}), 500
+        resp = jsonify({"status": "success", "data": state["books"]})
+        resp.set_etag(str(len(state["books"])))
+        return resp
+
+    @app.route("/api/v5/books/<book_key>")
+    def book(book_key):
+        state["hits"] += 1
+        return jsonify({"status": "error"}), 500
+
+    @app.route("/api/v5/books/<book_key>", methods=["DELETE"])
+    def return_book(book_key):
+        state["hits"] += 1
+        if state["mode"] == "slow":
+            time.sleep(SLOW_SECONDS)
+        return jsonify({"status": "success"})
+
+    return app
+
+
+def serve(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.2, min_retries=0, window=60)
+    for _ in range(10):
+        budget.record_request()
+    assert [budget.try_retry() for _ in range(3)] == [True, True, False]
+    assert budget.status()["rejected"] == 1
+    print("✅ Retry budget capped at 20% of requests")
+
+
+def test_breaker_serves_stale():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    state = {"mode": "ok", "hits": 0, "books": [{"book_key": "CB-1"}]}
+    backend = serve(fake_backend(state))
+    saved_upstreams = proxy.upstreams
+    proxy.upstreams = UpstreamPool(
+        [f"http://127.0.0.1:{backend.server_port}"],
+        max_failures=MAX_FAILURES, open_seconds=OPEN_SECONDS, timeout=TIMEOUT,
+    )
+    proxy.cache.clear()
+    proxy_server = serve(proxy.app)
+    proxy_url = f"http://127.0.0.1:{proxy_server.server_port}"
+
+    def get(path):
+        started = time.perf_counter()
+        resp = requests.get(proxy_url + path, headers=HEADERS, timeout=10)
+        return resp, time.perf_counter() - started
+
+    def breaker():
+        return requests.get(f"{proxy_url}/metrics").json()["upstreams"][0]
+
+    try:
+        # 1) Cache bản đầu tiên, sau đó backend ghi → entry bị đánh dấu stale
+        resp, _ = get("/api/books")
+        assert resp.status_code == 200 and "X-Cache" not in resp.headers
+        proxy.invalidate(book_keys("CB-2"))
+        state["mode"] = "slow"
+
+        # 2) Backend chậm: timeout cắt request, trả bản cũ thay vì treo
+        for _ in range(MAX_FAILURES):
+            resp, elapsed = get("/api/books")
+            assert resp.status_code == 200 and resp.headers["X-Cache"] == "STALE"
+            assert resp.json()["data"] == [{"book_key": "CB-1"}]
+            assert elapsed < SLOW_SECONDS, f"proxy waited {elapsed:.2f}s on a slow backend"
+        assert breaker()["breaker"] == "open" and breaker()["breaker_trips"] == 1
+        print("✅ Slow backend timed out, stale data served, breaker opened")
+
+        # 3) Mạch mở: không gọi backend nữa
+        hits = state["hits"]
+        for _ in range(5):
+            resp, elapsed = get("/api/books")
+            assert resp.headers["X-Cache"] == "STALE" and elapsed < TIMEOUT[1]
+        resp, _ = get("/api/books/CB-9")
+        assert resp.status_code == 503 and resp.headers["Retry-After"]
+        assert state["hits"] == hits, "open circuit should not reach the backend"
+        print("✅ Open circuit fails fast (stale hit or 503) with 0 upstream calls")
+
+        # 4) Hết thời gian mở → half-open → request thử thành công → đóng mạch
+        state["mode"] = "ok"
+        state["books"].append({"book_key": "CB-2"})
+        time.sleep(OPEN_SECONDS)
+        resp, _ = get("/api/books")
+        assert resp.status_code == 200 and "X-Cache" not in resp.headers
+        assert len(resp.json()["data"]) == 2
+        assert breaker()["breaker"] == "closed"
+
+        metrics = requests.get(f"{proxy_url}/metrics").json()
+        assert metrics["cache"]["stale_served"] == MAX_FAILURES + 5
+        print("✅ Half-open trial closed the breaker; metrics:", metrics["cache"])
+    finally:
+        proxy_server.shutdown()
+        backend.shutdown()
+        proxy.upstreams = saved_upstreams
+
+
+def test_write_timeout_not_retried():
+    states = [{"mode": "slow", "hits": 0, "books": []} for _ in range(2)]
+    backends = [serve(fake_backend(state)) for state in states]
+    saved_upstreams = proxy.upstreams
+    proxy.upstreams = UpstreamPool(
+        [f"http://127.0.0.1:{b.server_port}" for b in backends],
+        max_failures=MAX_FAILURES, open_seconds=OPEN_SECONDS, timeout=TIMEOUT,
+    )
+    try:
+        resp = proxy.app.test_client().delete("/api/books/CB-1", headers=HEADERS)
+        assert resp.status_code == 504
+        assert sum(state["hits"] for state in states) == 1, "timed-out DELETE was sent to a second backend"
+        print("✅ Write that timed out after reaching a backend was not retried (504)")
+    finally:
+        for b in backends:
+            b.shutdown()
+        proxy.upstreams = saved_upstreams
+
+
+def closing_backend(received):
+    """Raw socket backend: đọc request rồi đóng kết nối, không trả response."""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+
+    def accept_loop():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            with conn:
+                if conn.recv(65536):
+                    received.append(1)
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return listener
+
+
+def test_write_aborted_connection_not_retried():
+    received = []
+    listeners = [closing_backend(received) for _ in range(2)]
+    pool = UpstreamPool([f"http://127.0.0.1:{l.getsockname()[1]}" for l in listeners], timeout=TIMEOUT)
+    try:
+        try:
+            pool.request("DELETE", "/api/v5/books/CB-1")
+        except WriteNotRetried:
+            pass
+        else:
+            raise AssertionError("aborted DELETE should raise WriteNotRetried")
+        time.sleep(0.1)
+        assert len(received) == 1, "DELETE read by a backend was replayed on another one"
+    finally:
+        for listener in listeners:
+            listener.close()
+
+    # Backend không nhận kết nối (connection refused) → write vẫn được failover
+    state = {"mode": "ok", "hits": 0, "books": []}
+    backend = serve(fake_backend(state))
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        dead_port = s.getsockname()[1]
+    pool = UpstreamPool([f"http://127.0.0.1:{dead_port}", f"http://127.0.0.1:{backend.server_port}"], timeout=TIMEOUT)
+    try:
+        for _ in range(4):
+            assert pool.request("DELETE", "/api/v5/books/CB-1").status_code == 200
+    finally:
+        backend.shutdown()
+    print("✅ Aborted write not replayed (WriteNotRetried), refused connection still fails over")
+
+
+if __name__ == "__main__":
+    test_retry_budget()
+    test_breaker_serves_stale()
+    test_write_timeout_not_retried()
+    test_write_aborted_connection_not_retried()
@@ -0,0 +1,124 @@
+# Test kênh invalidation backend → proxy (Unix socket pub/sub).
+# Start 1 backend và 2 process proxy; kiểm tra:
+#   - GET lặp lại được trả từ cache, không gọi backend
+#   - ghi qua proxy B, hoặc ghi thẳng vào backend, làm cả 2 proxy xóa đúng key
+#
+#   python test_invalidation.py
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.dirname(HERE)
+HEADERS = {"Authorization": "Bearer demo123"}
+
+BACKEND_CMD = (
+    "import sys, server; "
+    "server.app.run(port=int(sys.argv[1]), threaded=True, use_reloader=False)"
+)
+PROXY_CMD = (
+    "import sys, proxy; "
+    "proxy.app.run(port=int(sys.argv[1]), threaded=True, use_reloader=False)"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(cmd, port, workdir, env):
+    return subprocess.Popen(
+        [sys.executable, "-c", cmd, str(port)], cwd=workdir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_up(url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=0.5)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not start")
+
+
+def upstream_calls(proxy_url):
+    return sum(b["total_requests"] for b in requests.get(f"{proxy_url}/upstreams").json())
+
+
+def book_keys(proxy_url):
+    body = requests.get(f"{proxy_url}/api/books", headers=HEADERS).json()
+    return {b["book_key"] for b in body["data"]}
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_invalidation_across_proxies():
+    if not hasattr(socket, "AF_UNIX"):
+        print("AF_UNIX not available; skipping")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend_port, port_a, port_b = free_port(), free_port(), free_port()
+        backend_url = f"http://127.0.0.1:{backend_port}"
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join([HERE, SRC_DIR]),
+            INVALIDATION_CHANNEL="unix",
+            INVALIDATION_DIR=os.path.join(tmp, "channel"),
+            BACKEND_URLS=backend_url,
+        )
+        procs = [start(BACKEND_CMD, backend_port, tmp, env)]
+        wait_until_up(backend_url)
+        procs += [start(PROXY_CMD, port, tmp, env) for port in (port_a, port_b)]
+        proxy_a, proxy_b = f"http://127.0.0.1:{port_a}", f"http://127.0.0.1:{port_b}"
+        try:
+            wait_until_up(proxy_a)
+            wait_until_up(proxy_b)
+
+            # 1) Cache hit: lần GET thứ 2 không gọi backend
+            assert book_keys(proxy_a) == set()
+            calls = upstream_calls(proxy_a)
+            for _ in range(10):
+                assert book_keys(proxy_a) == set()
+            assert upstream_calls(proxy_a) == calls, "cached GETs should not reach the backend"
+            print("✅ 10 cached GETs served with 0 upstream calls")
+
+            # 2) Mượn sách qua proxy B → proxy A nhận event và xóa cache
+            resp = requests.post(f"{proxy_b}/api/books", headers=HEADERS,
+                                 json={"book_key": "INV-1", "title": "Invalidation"})
+            assert resp.status_code == 201
+            assert wait_for(lambda: book_keys(proxy_a) == {"INV-1"}), "proxy A served stale data"
+            print("✅ Write through proxy B invalidated proxy A")
+
+            # 3) Trả sách thẳng vào backend (không qua proxy nào)
+            book_keys(proxy_b)
+            resp = requests.delete(f"{backend_url}/api/v5/books/INV-1", headers=HEADERS)
+            assert resp.status_code == 200
+            assert wait_for(lambda: book_keys(proxy_a) == set() and book_keys(proxy_b) == set())
+            print("✅ Direct backend write invalidated both proxies")
+        finally:
+            for p in procs:
+                p.terminate()
+                p.wait()
+
+
+if __name__ == "__main__":
+    test_invalidation_across_proxies()
@@ -0,0 +1,150 @@
+# Test cân bằng tải của proxy v5 với nhiều backend.
+# Start 3 process server.py (dùng chung một books.db tạm, WAL), đặt proxy phía
+# trước, bắn tải đọc liên tục rồi kill một backend giữa chừng. Tỉ lệ lỗi phía
+# client phải gần bằng 0 nhờ failover + passive ejection + health check.
+# Cache của proxy bị tắt (CACHE_MAX_AGE = 0) để mọi request thật sự đi tới
+# pool; nếu không, cache trả gần hết và pool không hề thấy backend chết.
+#
+#   python test_load_balancing.py
+
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+sys.path.insert(0, SRC_DIR)
+
+N_BACKENDS = 3
+CLIENT_THREADS = 20
+LOAD_SECONDS = 6.0
+KILL_AFTER = 2.0
+MAX_ERROR_RATE = 0.01
+HEADERS = {"Authorization": "Bearer demo123"}
+
+# Chạy server.py không qua debug reloader để kill được đúng process
+BACKEND_CMD = (
+    "import sys, server; "
+    "server.app.run(port=int(sys.argv[1]), threaded=True, use_reloader=False)"
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_backend(port, workdir):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([HERE, SRC_DIR]))
+    return subprocess.Popen(
+        [sys.executable, "-c", BACKEND_CMD, str(port)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_up(url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=0.5).status_code == 200:
+                return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"Backend {url} did not start")
+
+
+def run_load(proxy_url, stop):
+    results = {"ok": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def client(n):
+        session = requests.Session()
+        while not stop.is_set():
+            path = "/api/books" if n % 2 else "/api/books/LB-1"
+            try:
+                ok = session.get(proxy_url + path, headers=HEADERS, timeout=5).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                results["ok" if ok else "errors"] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(CLIENT_THREADS)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def test_kill_backend_under_load():
+    import database as db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ports = [free_port() for _ in range(N_BACKENDS)]
+        procs = [start_backend(port, tmp) for port in ports]
+        urls = [f"http://127.0.0.1:{port}" for port in ports]
+        proxy_server = None
+        try:
+            for url in urls:
+                wait_until_up(url)
+            db.borrow_book("LB-1", "Load balanced book", "Tester", "", os.path.join(tmp, "books.db"))
+
+            import proxy
+            from upstream import UpstreamPool
+            saved = proxy.upstreams, proxy.CACHE_MAX_AGE
+            proxy.CACHE_MAX_AGE = 0
+            proxy.cache.clear()
+            proxy.upstreams = UpstreamPool(urls, probe_interval=0.5)
+            proxy.upstreams.start_health_checks()
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+            proxy_server = make_server("127.0.0.1", 0, proxy.app, threaded=True)
+            threading.Thread(target=proxy_server.serve_forever, daemon=True).start()
+            proxy_url = f"http://127.0.0.1:{proxy_server.server_port}"
+
+            stop = threading.Event()
+            threads, results = run_load(proxy_url, stop)
+            time.sleep(KILL_AFTER)
+            procs[0].kill()
+            before_kill = {b["url"]: b["total_requests"] for b in proxy.upstreams.status()}
+            print(f"Killed backend {urls[0]}")
+            time.sleep(LOAD_SECONDS - KILL_AFTER)
+            stop.set()
+            for t in threads:
+                t.join()
+
+            status = {b["url"]: b for b in proxy.upstreams.status()}
+        finally:
+            if proxy_server:
+                proxy_server.shutdown()
+                proxy.upstreams, proxy.CACHE_MAX_AGE = saved
+            for p in procs:
+                p.kill()
+                p.wait()
+            db.close_all_pools()
+
+    total = results["ok"] + results["errors"]
+    error_rate = results["errors"] / total
+    print(f"{total} requests, {results['errors']} errors ({error_rate:.3%})")
+    after_kill = {url: info["total_requests"] - before_kill[url] for url, info in status.items()}
+    for url, info in status.items():
+        print(f"   {url}: healthy={info['healthy']} breaker={info['breaker']} trips={info['breaker_trips']} "
+              f"requests after kill={after_kill[url]}")
+
+    assert error_rate <= MAX_ERROR_RATE, f"error rate {error_rate:.2%} > {MAX_ERROR_RATE:.0%}"
+    assert not status[urls[0]]["healthy"], "killed backend should be marked unhealthy"
+    assert all(status[url]["healthy"] for url in urls[1:])
+    # Mọi request sau khi kill đều đi qua pool (không cache) và do 2 backend còn lại phục vụ
+    assert all(after_kill[url] > 0 for url in urls[1:]), "surviving backends did not serve traffic"
+    assert after_kill[urls[0]] <= 0.05 * sum(after_kill.values()), "killed backend kept receiving traffic"
+
+if __name__ == "__main__":
+    test_kill_backend_under_load()
+    print("✅ Proxy kept serving after a backend was killed")
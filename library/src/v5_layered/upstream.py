@@ -0,0 +1,312 @@
+"""
+Upstream pool cho proxy v5: nhiều backend server.py phía sau một proxy.
+
+- Active health check: thread nền gọi GET / trên từng backend theo chu kỳ.
+- Circuit breaker cho từng backend (closed → open → half-open): lỗi kết nối,
+  timeout hoặc 5xx liên tiếp → mở mạch, không gửi request nào tới backend đó
+  trong OPEN_SECONDS; sau đó cho đúng một request thử, thành công thì đóng lại.
+- Timeout rõ ràng (connect, read) cho mọi request tới backend.
+- Retry budget: số lần thử lại sang backend khác bị giới hạn theo phần trăm
+  lưu lượng, để khi backend chậm/chết proxy không nhân tải lên nhiều lần.
+  Write (POST/PUT/PATCH/DELETE) chỉ được thử lại khi chưa kết nối được
+  (connect timeout, connection refused); read timeout hay kết nối bị đóng
+  giữa chừng trả thẳng về client (504).
+- Least-outstanding-requests: chọn backend đang xử lý ít request nhất.
+- Sticky routing: sau khi một client ghi (mượn/trả), các request tiếp theo
+  của client đó đi về cùng backend trong STICKY_SECONDS (đọc được ngay
+  dữ liệu mình vừa ghi).
+"""
+import collections
+import random
+import threading
+import time
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+HEALTH_PATH = "/"
+PROBE_INTERVAL = 2.0      # giây giữa 2 lần health check
+PROBE_TIMEOUT = 1.0
+CONNECT_TIMEOUT = 1.0     # giây để mở kết nối tới backend
+READ_TIMEOUT = 5.0        # giây chờ backend trả response
+MAX_FAILURES = 3          # số lỗi liên tiếp trước khi mở mạch
+OPEN_SECONDS = 10.0       # thời gian mạch mở trước khi cho request thử (half-open)
+RETRY_RATIO = 0.2         # retry tối đa 20% số request ...
+MIN_RETRIES = 10          # ... cộng thêm 10 retry trong mỗi cửa sổ (lúc ít traffic)
+RETRY_WINDOW = 10.0       # giây
+STICKY_SECONDS = 5.0
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def never_sent(error):
+    """True if a requests error happened before the backend could read the request:
+    connect timeout, or a connection that was never established (refused, DNS, ...)."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    # requests bọc lỗi urllib3: ConnectionError(MaxRetryError(reason=NewConnectionError))
+    reason = getattr(error.args[0], "reason", error.args[0])
+    return isinstance(reason, NewConnectionError)
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend failed for a request."""
+
+
+class CircuitOpen(NoBackendAvailable):
+    """Raised without contacting any backend because every circuit is open."""
+
+
+class WriteNotRetried(NoBackendAvailable):
+    """Raised when a write failed after reaching a backend (e.g. read timeout):
+    it may have been applied, so it is not sent to another backend."""
+
+
+class CircuitBreaker:
+    """Per-backend breaker. Not locked on its own: UpstreamPool holds its lock."""
+
+    def __init__(self, max_failures=MAX_FAILURES, open_seconds=OPEN_SECONDS):
+        self.max_failures = max_failures
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trips = 0
+
+    def allows(self, now):
+        """True if a request may be sent right now (does not change state)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now - self.opened_at >= self.open_seconds
+        return not self.trial_in_flight
+
+    def on_send(self):
+        if self.state == OPEN:
+            # Hết thời gian mở → half-open, request này là request thử
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            self.trial_in_flight = True
+
+    def record(self, ok, now):
+        if self.state == HALF_OPEN:
+            self.trial_in_flight = False
+            if ok:
+                self.state, self.failures = CLOSED, 0
+            else:
+                self._trip(now)
+            return
+        if ok:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == CLOSED and self.failures >= self.max_failures:
+            self._trip(now)
+
+    def _trip(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+
+
+class RetryBudget:
+    """Allow retries up to ratio * requests + min_retries over a sliding window."""
+
+    def __init__(self, ratio=RETRY_RATIO, min_retries=MIN_RETRIES, window=RETRY_WINDOW):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = collections.deque()
+        self._retries = collections.deque()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _trim(self, now):
+        for q in (self._requests, self._retries):
+            while q and now - q[0] > self.window:
+                q.popleft()
+
+    def record_request(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_retry(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+                self.rejected += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def status(self):
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "requests": len(self._requests),
+                "retries": len(self._retries),
+                "rejected": self.rejected,
+            }
+
+
+class Backend:
+    def __init__(self, url, breaker):
+        self.url = url.rstrip("/")
+        self.breaker = breaker
+        self.outstanding = 0
+        self.total_requests = 0
+        self.healthy = True
+
+    def __repr__(self):
+        return (f"<Backend {self.url} outstanding={self.outstanding} "
+                f"healthy={self.healthy} breaker={self.breaker.state}>")
+
+
+class UpstreamPool:
+    def __init__(self, urls, probe_interval=PROBE_INTERVAL, max_failures=MAX_FAILURES,
+                 open_seconds=OPEN_SECONDS, sticky_seconds=STICKY_SECONDS,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retry_budget=None):
+        self.backends = [Backend(url, CircuitBreaker(max_failures, open_seconds)) for url in urls]
+        self.probe_interval = probe_interval
+        self.sticky_seconds = sticky_seconds
+        self.timeout = timeout
+        self.retry_budget = retry_budget or RetryBudget()
+        self._sticky = {}          # client_key -> (backend, hết hạn lúc)
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=len(urls), pool_maxsize=64)
+        self._session.mount("http://", adapter)
+        self._probe_thread = None
+
+    # ----------------------------
+    # Health check
+    # ----------------------------
+    def probe(self, backend):
+        try:
+            ok = requests.get(backend.url + HEALTH_PATH, timeout=PROBE_TIMEOUT).status_code < 500
+        except requests.RequestException:
+            ok = False
+        with self._lock:
+            # Chỉ cập nhật healthy; đóng/mở mạch do breaker quyết định theo
+            # request thật (GET / trả nhanh chưa chắc /books cũng nhanh)
+            backend.healthy = ok
+
+    def start_health_checks(self):
+        if self._probe_thread is not None:
+            return
+
+        def loop():
+            while True:
+                for backend in self.backends:
+                    self.probe(backend)
+                time.sleep(self.probe_interval)
+
+        self._probe_thread = threading.Thread(target=loop, name="upstream-health", daemon=True)
+        self._probe_thread.start()
+
+    # ----------------------------
+    # Chọn backend
+    # ----------------------------
+    def pick(self, client_key=None, exclude=()):
+        now = time.monotonic()
+        with self._lock:
+            allowed = [b for b in self.backends if b not in exclude and b.breaker.allows(now)]
+            candidates = [b for b in allowed if b.healthy]
+            if not candidates:
+                # Health check báo tất cả đều lỗi → vẫn thử backend có mạch cho phép;
+                # backend đang mở mạch thì không bao giờ được gửi (fail fast)
+                candidates = allowed
+            if not candidates:
+                return None
+
+            sticky = self._sticky.get(client_key)
+            if sticky and sticky[1] > now and sticky[0] in candidates:
+                backend = sticky[0]
+            else:
+                fewest = min(b.outstanding for b in candidates)
+                backend = random.choice([b for b in candidates if b.outstanding == fewest])
+            backend.breaker.on_send()
+            backend.outstanding += 1
+            backend.total_requests += 1
+            return backend
+
+    def release(self, backend, ok):
+        with self._lock:
+            backend.outstanding -= 1
+            backend.breaker.record(ok, time.monotonic())
+
+    def pin(self, client_key, backend):
+        if client_key is None:
+            return
+        with self._lock:
+            self._sticky[client_key] = (backend, time.monotonic() + self.sticky_seconds)
+            if len(self._sticky) > 10000:
+                now = time.monotonic()
+                self._sticky = {k: v for k, v in self._sticky.items() if v[1] > now}
+
+    # ----------------------------
+    # Gửi request
+    # ----------------------------
+    def request(self, method, path, client_key=None, **kwargs):
+        """Send a request to the best backend, failing over to the others on errors.
+
+        Raises CircuitOpen when every breaker is open, NoBackendAvailable when
+        all attempts failed (or the retry budget ran out) without a response.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        self.retry_budget.record_request()
+        tried = []
+        last_error = last_resp = None
+        while len(tried) < len(self.backends):
+            if tried and not self.retry_budget.try_retry():
+                break
+            backend = self.pick(client_key, exclude=tried)
+            if backend is None:
+                if not tried:
+                    raise CircuitOpen(f"Circuit open on every backend for {method} {path}")
+                break
+            tried.append(backend)
+            try:
+                resp = self._session.request(method, backend.url + path, **kwargs)
+            except requests.RequestException as e:
+                # Backend chết / timeout / đứt kết nối giữa chừng → thử backend khác.
+                self.release(backend, ok=False)
+                last_error = e
+                # Write chỉ được gửi lại khi chưa kết nối được (backend chắc chắn
+                # chưa nhận). Sau read timeout hay "Connection aborted", backend có
+                # thể đã commit: gửi lại DELETE sẽ trả 404 cho một lần trả sách thành công.
+                if method in WRITE_METHODS and not never_sent(e):
+                    raise WriteNotRetried(f"{method} {path} failed on {backend.url}: {e}") from e
+                continue
+            self.release(backend, ok=resp.status_code < 500)
+            if resp.status_code >= 500 and method == "GET":
+                last_resp = resp
+                continue
+            if method in WRITE_METHODS:
+                self.pin(client_key, backend)
+            return resp
+        if last_resp is not None:
+            return last_resp
+        raise NoBackendAvailable(f"All backends failed for {method} {path}: {last_error}")
+
+    def status(self):
+        with self._lock:
+            return [
+                {
+                    "url": b.url,
+                    "healthy": b.healthy,
+                    "breaker": b.breaker.state,
+                    "breaker_trips": b.breaker.trips,
+                    "failures": b.breaker.failures,
+                    "outstanding": b.outstanding,
+                    "total_requests": b.total_requests,
+                }
+                for b in self.backends
+            ]
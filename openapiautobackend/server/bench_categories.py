@@ -0,0 +1,76 @@
+"""
+Benchmark GET /api/categories with 500 categories.
+
+Fills a scratch database (product_bench, dropped afterwards) on the server of
+swagger_server.db, with the category index, then times:
+  - distinct + count: the previous implementation, 1 + N round trips
+  - $group:           one aggregation (CATEGORY_COUNTS_PIPELINE)
+  - cached:           category_counts() within its TTL
+
+Requires a running MongoDB.
+
+Usage:
+    python bench_categories.py [product_count] [category_count]    (default: 100000 500)
+"""
+import statistics
+import sys
+import time
+
+from swagger_server.db import client
+from swagger_server import categories
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+CATEGORIES = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+INSERT_BATCH = 10_000
+REPEAT = 20
+
+
+def distinct_and_count(collection):
+    """The previous implementation: N+1 round trips."""
+    return [
+        {"category": c, "count": collection.count_documents({"category": c})}
+        for c in collection.distinct("category")
+    ]
+
+
+def group(collection):
+    return list(collection.aggregate(categories.CATEGORY_COUNTS_PIPELINE))
+
+
+def median_ms(func, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    db = client["product_bench"]
+    try:
+        collection = db["products"]
+        collection.create_index("category")
+        for start in range(0, PRODUCTS, INSERT_BATCH):
+            collection.insert_many([
+                {"sku": f"BENCH-{i:08d}", "name": f"Bench Product {i}", "category": f"Category {i % CATEGORIES:03d}",
+                 "price": 10.0, "quantity": 1, "status": "active"}
+                for i in range(start, min(start + INSERT_BATCH, PRODUCTS))
+            ], ordered=False)
+        assert len(group(collection)) == len(distinct_and_count(collection)) == CATEGORIES
+
+        # category_counts() reads the module's collection: point it at the scratch one
+        categories.products_collection = collection
+        categories.invalidate_category_counts()
+        categories.category_counts()
+
+        print(f"{PRODUCTS} products, {CATEGORIES} categories")
+        print(f"{'distinct + count ms':>20}{'$group ms':>11}{'cached ms':>11}")
+        print(f"{median_ms(lambda: distinct_and_count(collection), 3):>20.1f}{median_ms(lambda: group(collection)):>11.1f}"
+              f"{median_ms(categories.category_counts):>11.4f}")
+    finally:
+        client.drop_database("product_bench")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark product search at 1M products: $regex vs text index vs prefix.
+
+Fills a scratch database (product_bench, dropped afterwards) on the server of
+swagger_server.db, applies the declared indexes, then times one page of
+GET /api/products?search=... (find + sort + limit 20, plus the count) for:
+  - regex:            the previous unanchored, case-insensitive $regex over
+                      name and description
+  - text:             search_mode=text, $text ranked by relevance
+  - prefix:           search_mode=prefix, anchored $regex on name_prefix
+  - short (fallback): a 2-character pattern, which still uses $regex
+
+Requires a running MongoDB.
+
+Usage:
+    python bench_search.py [product_count]    (default: 1000000)
+"""
+import random
+import re
+import statistics
+import sys
+import time
+
+from swagger_server.db import client
+from swagger_server.indexes import apply_indexes
+from swagger_server.queries import count_products, normalize_name, product_query, product_sort
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+INSERT_BATCH = 10_000
+REPEAT = 5
+BRANDS = ["Samsung", "Apple", "Sony", "Xiaomi", "Dell", "Lenovo", "Asus", "Logitech", "Canon", "Philips"]
+NOUNS = ["Phone", "Laptop", "Headphones", "Speaker", "Monitor", "Keyboard", "Mouse", "Camera", "Tablet", "Charger",
+         "Router", "Watch", "Printer", "Projector", "Microphone", "Drone", "Console", "Blender", "Vacuum", "Lamp"]
+ADJECTIVES = ["Pro", "Max", "Ultra", "Mini", "Lite", "Plus", "Air", "Neo", "Prime", "Edge"]
+SEARCHES = [
+    ("regex", "wireless headphones", None),
+    ("text", "wireless headphones", "text"),
+    ("prefix", "Samsung Ph", "prefix"),
+    ("short (fallback)", "tv", "text"),
+]
+
+
+def make_product(i, rng):
+    name = f"{rng.choice(BRANDS)} {rng.choice(NOUNS)} {rng.choice(ADJECTIVES)} {i}"
+    return {
+        "sku": f"BENCH-{i:08d}",
+        "name": name,
+        "name_prefix": normalize_name(name),
+        "category": rng.choice(NOUNS),
+        "price": round(rng.uniform(1, 2000), 2),
+        "quantity": rng.randint(0, 500),
+        "status": "active",
+        "description": f"{rng.choice(['Wireless', 'Compact', 'Portable', 'Smart'])} {name.lower()} "
+                       + " ".join(rng.choice(NOUNS).lower() for _ in range(12)),
+        "created_at": f"2024-01-01T00:00:{i % 60:02d}+00:00",
+    }
+
+
+def legacy_query(search):
+    return {"$or": [
+        {"name": {"$regex": search, "$options": "i"}},
+        {"description": {"$regex": search, "$options": "i"}},
+    ]}
+
+
+def page(collection, query, sort):
+    list(collection.find(query).sort(sort).limit(20))
+    return count_products(collection, query)
+
+
+def median_ms(func, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    db = client["product_bench"]
+    try:
+        collection = db["products"]
+        rng = random.Random(1)
+        for start in range(0, PRODUCTS, INSERT_BATCH):
+            collection.insert_many(
+                [make_product(i, rng) for i in range(start, min(start + INSERT_BATCH, PRODUCTS))], ordered=False
+            )
+        apply_indexes(database=db)
+
+        print(f"{PRODUCTS} products")
+        print(f"{'mode':<18}{'search':<22}{'page + count ms':>16}{'matches':>10}")
+        for mode, search, search_mode in SEARCHES:
+            if search_mode is None:
+                query, sort = legacy_query(re.escape(search)), product_sort()
+            else:
+                query = product_query(search=search, search_mode=search_mode)
+                sort = product_sort(None, query)
+            matches = page(collection, query, sort)
+            print(f"{mode:<18}{search:<22}{median_ms(lambda: page(collection, query, sort)):>16.1f}{matches:>10}")
+    finally:
+        client.drop_database("product_bench")
+
+
+if __name__ == '__main__':
+    main()
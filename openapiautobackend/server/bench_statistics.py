@@ -0,0 +1,104 @@
+"""
+Benchmark GET /api/statistics: $facet aggregation vs loading every product.
+
+For each product count, fills a scratch database (product_bench, dropped
+afterwards) on the server of swagger_server.db, then times:
+  - find + python: the previous implementation, list(find()) and six passes
+                   in Python
+  - $facet:        compute_statistics(), one aggregation computed by Mongo
+
+Both must agree on the inventory figures. Requires a running MongoDB.
+
+Usage:
+    python bench_statistics.py [product_count ...]    (default: 10000 100000 1000000)
+"""
+import random
+import statistics
+import sys
+import time
+
+from swagger_server.db import client
+from swagger_server.controllers.admin_statistics_controller import compute_statistics
+
+PRODUCT_COUNTS = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+INSERT_BATCH = 10_000
+CATEGORIES = [f"Category {i}" for i in range(50)]
+STATUSES = ["active", "active", "active", "inactive", "discontinued"]
+
+
+def make_product(i, rng):
+    return {
+        "sku": f"BENCH-{i:08d}",
+        "name": f"Bench Product {i}",
+        "category": rng.choice(CATEGORIES),
+        "brand": f"Brand {i % 200}",
+        "price": round(rng.uniform(1, 2000), 2),
+        "quantity": rng.choice([0, rng.randint(1, 9), rng.randint(10, 500)]),
+        "status": rng.choice(STATUSES),
+        "description": f"Benchmark product number {i} " + "lorem ipsum " * 20,
+        "image_url": f"https://example.com/bench/{i}.jpg",
+    }
+
+
+def seed(collection, count):
+    rng = random.Random(1)
+    for start in range(0, count, INSERT_BATCH):
+        collection.insert_many(
+            [make_product(i, rng) for i in range(start, min(start + INSERT_BATCH, count))],
+            ordered=False
+        )
+
+
+def find_and_sum(collection):
+    """The previous implementation: every document is loaded into Python."""
+    all_products = list(collection.find())
+    categories = {}
+    for product in all_products:
+        entry = categories.setdefault(product.get("category", "Unknown"), {"count": 0, "total_value": 0})
+        entry["count"] += 1
+        entry["total_value"] += product.get("price", 0) * product.get("quantity", 0)
+    top = sorted(all_products, key=lambda p: p.get("price", 0) * p.get("quantity", 0), reverse=True)[:10]
+    return {
+        "total_products": len(all_products),
+        "total_quantity": sum(p.get("quantity", 0) for p in all_products),
+        "out_of_stock": sum(1 for p in all_products if p.get("quantity", 0) == 0),
+        "categories": categories,
+        "top": top,
+    }
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    db = client["product_bench"]
+    print(f"{'products':>10}{'find + python ms':>18}{'$facet ms':>12}{'speedup':>9}")
+    try:
+        for count in PRODUCT_COUNTS:
+            db.drop_collection("products")
+            collection = db["products"]
+            seed(collection, count)
+
+            legacy = find_and_sum(collection)
+            stats = compute_statistics(collection)
+            inventory = stats["inventory"]
+            assert (inventory["total_products"], inventory["total_quantity"], inventory["out_of_stock"]) == \
+                (legacy["total_products"], legacy["total_quantity"], legacy["out_of_stock"])
+            assert stats["categories"]["total_categories"] == len(legacy["categories"])
+
+            repeat = 3 if count >= 1_000_000 else 5
+            old = median_ms(lambda: find_and_sum(collection), repeat)
+            new = median_ms(lambda: compute_statistics(collection), repeat)
+            print(f"{count:>10}{old:>18.0f}{new:>12.0f}{old / new:>8.1f}x")
+    finally:
+        client.drop_database("product_bench")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,12 @@ import collections.abc
 collections.Callable = collections.abc.Callable
 
 from swagger_server import encoder
+from swagger_server.indexes import apply_indexes, backfill_name_prefix
 
 
 def main():
+    apply_indexes()
+    backfill_name_prefix()
     app = connexion.App(__name__, specification_dir='./swagger/')
     app.app.json_encoder = encoder.JSONEncoder
     app.add_api('swagger.yaml', arguments={'title': 'Product Management System API'}, pythonic_params=True)
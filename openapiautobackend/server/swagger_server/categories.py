@@ -0,0 +1,50 @@
+import threading
+import time
+
+from swagger_server.db import products_collection
+
+# Product count per category, shared by GET /api/categories (public) and the
+# admin controller. One $group replaces distinct() + one count_documents() per
+# category. Sorting on category first lets Mongo answer from an index that
+# starts with category, without fetching documents.
+CATEGORY_COUNTS_PIPELINE = [
+    {"$sort": {"category": 1}},
+    {"$project": {"_id": 0, "category": 1}},
+    {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+    {"$sort": {"_id": 1}},
+]
+
+# Counts are cached in-process for a few seconds; admin create, update and
+# delete invalidate them, so only other processes' writes can be this stale.
+CATEGORY_CACHE_TTL = 10  # seconds
+
+_lock = threading.Lock()
+_cached = None       # (expires_at, counts)
+_generation = 0      # bumped by every invalidation
+
+
+def category_counts():
+    """[{"category": ..., "count": ...}] sorted by category. Shared: do not modify."""
+    global _cached
+    with _lock:
+        cached, generation = _cached, _generation
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    counts = [
+        {"category": row["_id"], "count": row["count"]}
+        for row in products_collection.aggregate(CATEGORY_COUNTS_PIPELINE)
+    ]
+    with _lock:
+        # A write that happened while we were counting may not be in `counts`
+        if generation == _generation:
+            _cached = (time.monotonic() + CATEGORY_CACHE_TTL, counts)
+    return counts
+
+
+def invalidate_category_counts():
+    """Drop the cached counts (called after product create, update and delete)."""
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
@@ -14,6 +14,11 @@ from swagger_server.models.create_product_request import CreateProductRequest
 from swagger_server import util
 
 from swagger_server.db import products_collection
+from swagger_server.categories import category_counts, invalidate_category_counts
+from swagger_server.queries import (
+    DEFAULT_SEARCH_MODE, HIDDEN_FIELDS, count_products, normalize_name, product_query, product_sort
+)
+from pymongo.errors import DuplicateKeyError
 from swagger_server.models.product import Product
 from datetime import datetime, timezone
 from math import ceil
@@ -34,8 +39,7 @@ def admin_required(f):
 def api_categories_get():  # noqa: E501
     """Get all product categories"""
     try:
-        categories = products_collection.distinct("category")
-        result = [{"category": c, "count": products_collection.count_documents({"category": c})} for c in categories]
+        result = category_counts()
 
         return {
             "status": "success",
@@ -46,7 +50,7 @@ def api_categories_get():  # noqa: E501
                 "products": {"href": "/api/products", "method": "GET"}
             },
             "meta": {
-                "total_categories": len(categories),
+                "total_categories": len(result),
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
         }, 200
@@ -54,46 +58,18 @@ def api_categories_get():  # noqa: E501
         return {"status": "error", "message": f"Internal server error: {str(e)}"}, 500
 
 # GET /api/products
-def api_products_get(page=None, limit=None, category=None, brand=None, sku=None, status=None, min_price=None, max_price=None, search=None, sort=None):  # noqa: E501
+def api_products_get(page=None, limit=None, category=None, brand=None, sku=None, status=None, min_price=None, max_price=None, search=None, sort=None, search_mode=None):  # noqa: E501
     """Get all products with pagination and filtering"""
     try:
         page = page or 1
         per_page = limit or 20
-        query = {}
-
-        if category:
-            query["category"] = category
-        if brand:
-            query["brand"] = brand
-        if sku:
-            query["sku"] = sku
-        if status:
-            query["status"] = status
-        if min_price is not None or max_price is not None:
-            query["price"] = {}
-            if min_price is not None:
-                query["price"]["$gte"] = float(min_price)
-            if max_price is not None:
-                query["price"]["$lte"] = float(max_price)
-        if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-            ]
-
-        sort_spec = [("created_at", -1)]
-        if sort == "name":
-            sort_spec = [("name", 1)]
-        elif sort == "price_asc":
-            sort_spec = [("price", 1)]
-        elif sort == "price_desc":
-            sort_spec = [("price", -1)]
-        elif sort == "updated_at":
-            sort_spec = [("updated_at", -1)]
+        query = product_query(category, brand, sku, status, min_price, max_price, search,
+                              search_mode or DEFAULT_SEARCH_MODE)
+        sort_spec = product_sort(sort, query)
 
         skip = (page - 1) * per_page
-        cursor = products_collection.find(query).sort(sort_spec).skip(skip).limit(per_page)
-        total_count = products_collection.count_documents(query)
+        cursor = products_collection.find(query, HIDDEN_FIELDS).sort(sort_spec).skip(skip).limit(per_page)
+        total_count = count_products(products_collection, query)
         total_pages = ceil(total_count / per_page)
 
         items = []
@@ -163,20 +139,23 @@ def api_products_post(body):  # noqa: E501
         if data.get("quantity", 0) < 0:
             return {"status": "error", "message": "Quantity must be greater than or equal to 0"}, 400
 
-        # Validate SKU uniqueness
-        if products_collection.find_one({"sku": data.get("sku")}):
-            return {"status": "error", "message": "Product with this SKU already exists"}, 409
-
         now = datetime.now(timezone.utc).isoformat()
         data["created_at"] = now
         data["updated_at"] = now
         data["status"] = data.get("status", "active")
         data["currency"] = data.get("currency", "USD")
         data["quantity"] = data.get("quantity", 0)
+        data["name_prefix"] = normalize_name(data["name"])
 
-        result = products_collection.insert_one(data)
+        # SKU uniqueness is enforced by the unique sku index (swagger_server/indexes.py)
+        try:
+            result = products_collection.insert_one(data)
+        except DuplicateKeyError:
+            return {"status": "error", "message": "Product with this SKU already exists"}, 409
+        invalidate_category_counts()
         data["id"] = str(result.inserted_id)
         data.pop("_id", None)
+        data.pop("name_prefix", None)
 
         return {
             "status": "success",
@@ -219,6 +198,7 @@ def api_products_product_id_delete(product_id):  # noqa: E501
 
         now = datetime.now(timezone.utc).isoformat()
         result = products_collection.delete_one({"_id": obj_id})
+        invalidate_category_counts()
         
         if result.deleted_count == 0:
             return {"status": "error", "message": "Failed to delete product"}, 500
@@ -247,7 +227,7 @@ def api_products_product_id_get(product_id):  # noqa: E501
         except Exception:
             return {"status": "error", "message": "Invalid product ID format"}, 400
 
-        product = products_collection.find_one({"_id": obj_id})
+        product = products_collection.find_one({"_id": obj_id}, HIDDEN_FIELDS)
         
         if not product:
             return {"status": "error", "message": "Product not found"}, 404
@@ -308,13 +288,19 @@ def api_products_product_id_put(body, product_id):  # noqa: E501
         
         now = datetime.now(timezone.utc).isoformat()
         data["updated_at"] = now
+        if "name" in data:
+            data["name_prefix"] = normalize_name(data["name"])
 
-        result = products_collection.update_one({"_id": obj_id}, {"$set": data})
+        try:
+            result = products_collection.update_one({"_id": obj_id}, {"$set": data})
+        except DuplicateKeyError:
+            return {"status": "error", "message": "Product with this SKU already exists"}, 409
+        invalidate_category_counts()
 
         if result.matched_count == 0:
             return {"status": "error", "message": "Product not found"}, 404
 
-        updated = products_collection.find_one({"_id": obj_id})
+        updated = products_collection.find_one({"_id": obj_id}, HIDDEN_FIELDS)
         updated["id"] = str(updated["_id"])
         updated.pop("_id", None)
 
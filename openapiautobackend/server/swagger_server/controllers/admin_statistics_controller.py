@@ -22,76 +22,104 @@ def admin_required(f):
     return decorated_function
 
 
+# One aggregation computes the inventory figures, the category breakdown and the
+# top 10 by value (price * quantity) server-side. Only the fields below are read,
+# and no product document is sent back whole.
+STATUS_COUNTERS = {
+    "active_products": "active",
+    "inactive_products": "inactive",
+    "discontinued_products": "discontinued",
+}
+
+STATISTICS_PIPELINE = [
+    {"$project": {
+        "sku": 1,
+        "name": 1,
+        "status": 1,
+        "category": {"$ifNull": ["$category", "Unknown"]},
+        "price": {"$ifNull": ["$price", 0]},
+        "quantity": {"$ifNull": ["$quantity", 0]},
+    }},
+    {"$addFields": {"total_value": {"$multiply": ["$price", "$quantity"]}}},
+    {"$facet": {
+        "inventory": [
+            {"$group": {
+                "_id": None,
+                "total_products": {"$sum": 1},
+                "total_quantity": {"$sum": "$quantity"},
+                "total_value": {"$sum": "$total_value"},
+                **{
+                    field: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+                    for field, status in STATUS_COUNTERS.items()
+                },
+                "out_of_stock": {"$sum": {"$cond": [{"$eq": ["$quantity", 0]}, 1, 0]}},
+                "low_stock": {"$sum": {"$cond": [
+                    {"$and": [{"$gt": ["$quantity", 0]}, {"$lt": ["$quantity", 10]}]}, 1, 0
+                ]}},
+            }},
+        ],
+        "categories": [
+            {"$group": {"_id": "$category", "count": {"$sum": 1}, "total_value": {"$sum": "$total_value"}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+        # $sort followed by $limit is a top-k sort: only 10 documents are kept in memory
+        "top_products": [
+            {"$sort": {"total_value": -1}},
+            {"$limit": 10},
+        ],
+    }},
+]
+
+EMPTY_INVENTORY = {
+    "total_products": 0,
+    "total_quantity": 0,
+    "total_value": 0,
+    **{field: 0 for field in STATUS_COUNTERS},
+    "out_of_stock": 0,
+    "low_stock": 0,
+}
+
+
+def compute_statistics(collection):
+    """Inventory, category and top-value statistics of a product collection (one round trip)."""
+    facets = next(collection.aggregate(STATISTICS_PIPELINE, allowDiskUse=True))
+
+    inventory = dict(facets["inventory"][0]) if facets["inventory"] else dict(EMPTY_INVENTORY)
+    inventory.pop("_id", None)
+    inventory["total_value"] = round(inventory["total_value"], 2)
+
+    category_breakdown = [
+        {"category": row["_id"], "count": row["count"], "total_value": round(row["total_value"], 2)}
+        for row in facets["categories"]
+    ]
+
+    top_products = [
+        {
+            "id": str(product["_id"]),
+            "sku": product.get("sku", ""),
+            "name": product.get("name", ""),
+            "price": product["price"],
+            "quantity": product["quantity"],
+            "total_value": round(product["total_value"], 2)
+        }
+        for product in facets["top_products"]
+    ]
+
+    return {
+        "inventory": inventory,
+        "categories": {
+            "total_categories": len(category_breakdown),
+            "category_breakdown": category_breakdown
+        },
+        "top_products": top_products
+    }
+
+
 # GET /api/statistics
 @admin_required
 def api_statistics_get():  # noqa: E501
     try:
-        # Get all products from database
-        all_products = list(products_collection.find())
-        total_products = len(all_products)
-        total_quantity = sum(p.get("quantity", 0) for p in all_products)
-        total_value = sum(p.get("price", 0) * p.get("quantity", 0) for p in all_products)
-        
-        active_products = sum(1 for p in all_products if p.get("status") == "active")
-        inactive_products = sum(1 for p in all_products if p.get("status") == "inactive")
-        discontinued_products = sum(1 for p in all_products if p.get("status") == "discontinued")
-        
-        out_of_stock = sum(1 for p in all_products if p.get("quantity", 0) == 0)
-        low_stock = sum(1 for p in all_products if 0 < p.get("quantity", 0) < 10)
-        
-        inventory_stats = {
-            "total_products": total_products,
-            "total_quantity": total_quantity,
-            "total_value": round(total_value, 2),
-            "active_products": active_products,
-            "inactive_products": inactive_products,
-            "discontinued_products": discontinued_products,
-            "out_of_stock": out_of_stock,
-            "low_stock": low_stock
-        }
-        
-        categories_dict = {}
-        for product in all_products:
-            category = product.get("category", "Unknown")
-            if category not in categories_dict:
-                categories_dict[category] = {
-                    "count": 0,
-                    "total_value": 0
-                }
-            categories_dict[category]["count"] += 1
-            categories_dict[category]["total_value"] += product.get("price", 0) * product.get("quantity", 0)
-        
-        category_breakdown = []
-        for category, stats in categories_dict.items():
-            category_breakdown.append({
-                "category": category,
-                "count": stats["count"],
-                "total_value": round(stats["total_value"], 2)
-            })
-        
-        category_breakdown.sort(key=lambda x: x["count"], reverse=True)
-        
-        categories_stats = {
-            "total_categories": len(categories_dict),
-            "category_breakdown": category_breakdown
-        }
-        
-        # Top 10 highest value products (price * quantity)
-        products_with_value = []
-        for product in all_products:
-            product_value = product.get("price", 0) * product.get("quantity", 0)
-            products_with_value.append({
-                "id": str(product.get("_id")),
-                "sku": product.get("sku", ""),
-                "name": product.get("name", ""),
-                "price": product.get("price", 0),
-                "quantity": product.get("quantity", 0),
-                "total_value": round(product_value, 2)
-            })
-        
-        # Sort by total_value descending and take top 10
-        products_with_value.sort(key=lambda x: x["total_value"], reverse=True)
-        top_products = products_with_value[:10]
+        stats = compute_statistics(products_collection)
         
         # Get user info from token
         token_info = connexion.context.get('token_info', {})
@@ -101,9 +129,9 @@ def api_statistics_get():  # noqa: E501
             "status": "success",
             "message": "Statistics retrieved successfully",
             "data": {
-                "inventory": inventory_stats,
-                "categories": categories_stats,
-                "top_products": top_products
+                "inventory": stats["inventory"],
+                "categories": stats["categories"],
+                "top_products": stats["top_products"]
             },
             "links": {
                 "self": {"href": "/api/statistics", "method": "GET"},
@@ -121,7 +121,9 @@ def api_sessions_delete(body=None):  # noqa: E501
                 "jti": jti,
                 "token": access_token,
                 "blacklisted_at": datetime.now(timezone.utc).isoformat(),
-                "expires_at": datetime.fromtimestamp(exp, tz=timezone.utc).isoformat()
+                "expires_at": datetime.fromtimestamp(exp, tz=timezone.utc).isoformat(),
+                # Date copy of expires_at for the TTL index: Mongo purges the entry once the token is dead
+                "purge_at": datetime.fromtimestamp(exp, tz=timezone.utc)
             })
         
         # Revoke refresh token if provided in body
@@ -8,6 +8,10 @@ from swagger_server.models.products_list_response import ProductsListResponse  #
 from swagger_server import util
 
 from swagger_server.db import products_collection
+from swagger_server.categories import category_counts
+from swagger_server.queries import (
+    DEFAULT_SEARCH_MODE, HIDDEN_FIELDS, SEARCH_MODES, count_products, product_query, product_sort
+)
 from swagger_server.models.product import Product
 from datetime import datetime, timezone
 from math import ceil
@@ -17,15 +21,7 @@ from bson import ObjectId
 # GET /api/products/categories
 def api_categories_get():  # noqa: E501
     try:
-        categories = products_collection.distinct("category")
-        result = []
-        
-        for category in categories:
-            count = products_collection.count_documents({"category": category})
-            result.append({
-                "category": category,
-                "count": count
-            })
+        result = category_counts()
 
         return {
             "status": "success",
@@ -36,7 +32,7 @@ def api_categories_get():  # noqa: E501
                 "products": {"href": "/api/products", "method": "GET"}
             },
             "meta": {
-                "total_categories": len(categories),
+                "total_categories": len(result),
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
         }, 200
@@ -45,7 +41,7 @@ def api_categories_get():  # noqa: E501
 
 
 # GET /api/products
-def api_products_get(page=None, limit=None, category=None, brand=None, sku=None, status=None, min_price=None, max_price=None, search=None, sort=None):  # noqa: E501
+def api_products_get(page=None, limit=None, category=None, brand=None, sku=None, status=None, min_price=None, max_price=None, search=None, sort=None, search_mode=None):  # noqa: E501
     try:
         page = page or 1
         per_page = limit or 20
@@ -55,50 +51,23 @@ def api_products_get(page=None, limit=None, category=None, brand=None, sku=None,
         if per_page < 1 or per_page > 100:
             return {"status": "error", "message": "Items per page must be between 1 and 100"}, 400
         
-        query = {}
-
-        if category:
-            query["category"] = category
-        if brand:
-            query["brand"] = brand
-        if sku:
-            query["sku"] = sku
-        if status:
-            if status not in ["active", "inactive", "discontinued"]:
-                return {"status": "error", "message": "Invalid status. Must be: active, inactive, or discontinued"}, 400
-            query["status"] = status
-        if min_price is not None or max_price is not None:
-            query["price"] = {}
-            if min_price is not None:
-                if min_price < 0:
-                    return {"status": "error", "message": "min_price must be >= 0"}, 400
-                query["price"]["$gte"] = float(min_price)
-            if max_price is not None:
-                if max_price < 0:
-                    return {"status": "error", "message": "max_price must be >= 0"}, 400
-                query["price"]["$lte"] = float(max_price)
-        if search:
-            query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-            ]
-
-        sort_spec = [("created_at", -1)]  # Default sort by created date descending
-        if sort == "name":
-            sort_spec = [("name", 1)]
-        elif sort == "price_asc":
-            sort_spec = [("price", 1)]
-        elif sort == "price_desc":
-            sort_spec = [("price", -1)]
-        elif sort == "updated_at":
-            sort_spec = [("updated_at", -1)]
-        elif sort == "created_at":
-            sort_spec = [("created_at", -1)]
+        if status and status not in ["active", "inactive", "discontinued"]:
+            return {"status": "error", "message": "Invalid status. Must be: active, inactive, or discontinued"}, 400
+        if min_price is not None and min_price < 0:
+            return {"status": "error", "message": "min_price must be >= 0"}, 400
+        if max_price is not None and max_price < 0:
+            return {"status": "error", "message": "max_price must be >= 0"}, 400
+        search_mode = search_mode or DEFAULT_SEARCH_MODE
+        if search_mode not in SEARCH_MODES:
+            return {"status": "error", "message": "Invalid search_mode. Must be: text or prefix"}, 400
+
+        query = product_query(category, brand, sku, status, min_price, max_price, search, search_mode)
+        sort_spec = product_sort(sort, query)  # Relevance for a text search, else newest first
 
         # Execute query with pagination
         skip = (page - 1) * per_page
-        cursor = products_collection.find(query).sort(sort_spec).skip(skip).limit(per_page)
-        total_count = products_collection.count_documents(query)
+        cursor = products_collection.find(query, HIDDEN_FIELDS).sort(sort_spec).skip(skip).limit(per_page)
+        total_count = count_products(products_collection, query)
         total_pages = ceil(total_count / per_page) if total_count > 0 else 1
 
         items = []
@@ -145,7 +114,7 @@ def api_products_product_id_get(product_id):  # noqa: E501
         except Exception:
             return {"status": "error", "message": "Invalid product ID format"}, 400
 
-        product = products_collection.find_one({"_id": obj_id})
+        product = products_collection.find_one({"_id": obj_id}, HIDDEN_FIELDS)
         
         if not product:
             return {"status": "error", "message": "Product not found"}, 404
@@ -177,7 +146,7 @@ def api_products_sku_sku_get(sku):  # noqa: E501
         if not sku or not sku.strip():
             return {"status": "error", "message": "SKU is required"}, 400
 
-        product = products_collection.find_one({"sku": sku})
+        product = products_collection.find_one({"sku": sku}, HIDDEN_FIELDS)
         
         if not product:
             return {"status": "error", "message": "Product not found"}, 404
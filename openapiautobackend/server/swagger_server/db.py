@@ -8,4 +8,4 @@ db = client["product_db"]
 products_collection = db["products"]
 users_collection = db["users"]
 refresh_tokens_collection = db["refresh_tokens"]
-blacklist_collection = db["blacklist"]
\ No newline at end of file
+blacklist_collection = db["blacklist"]
@@ -0,0 +1,219 @@
+"""
+Index bootstrap and query plan checks.
+
+INDEXES declares every index the controllers rely on. apply_indexes() creates
+them idempotently (create_index is a no-op for an existing identical index)
+and runs at server startup. A failing unique index (e.g. sku over duplicate
+SKUs) is fatal: it is the only check of its constraint. Any other failing
+index is reported and skipped, so the server still starts.
+
+backfill_name_prefix() fills name_prefix (the prefix-search key) on products
+written before it existed; it also runs at startup.
+
+Run as a module, it also explains every query shape the controllers produce
+and flags the ones that scan the whole collection:
+
+    python -m swagger_server.indexes                # apply + explain, exit 1 on COLLSCAN
+    python -m swagger_server.indexes --skip-apply   # explain only
+"""
+import argparse
+import sys
+
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from swagger_server.db import db
+from swagger_server.queries import PRODUCT_SORTS, normalize_name, product_query, product_sort
+from swagger_server.categories import CATEGORY_COUNTS_PIPELINE
+from swagger_server.controllers.admin_statistics_controller import STATISTICS_PIPELINE
+
+# Compound indexes follow equality -> sort -> range: every equality filter of
+# GET /api/products comes first, followed by the sort it is most often used with.
+# The price indexes also serve price ranges.
+INDEXES = {
+    "products": [
+        ([("sku", 1)], {"unique": True}),
+        ([("created_at", -1)], {}),
+        ([("updated_at", -1)], {}),
+        ([("name", 1)], {}),
+        ([("price", 1)], {}),
+        ([("category", 1), ("created_at", -1)], {}),
+        ([("category", 1), ("price", 1)], {}),
+        ([("category", 1), ("name", 1)], {}),
+        ([("brand", 1), ("created_at", -1)], {}),
+        ([("status", 1), ("created_at", -1)], {}),
+        # search_mode=text; a name match ranks above a description match
+        ([("name", "text"), ("description", "text")], {"name": "search_text", "weights": {"name": 10, "description": 2}}),
+        # search_mode=prefix
+        ([("name_prefix", 1)], {}),
+    ],
+    "blacklist": [
+        ([("jti", 1)], {"unique": True}),
+        # Entries are useless once the token expires (purge_at = token exp)
+        ([("purge_at", 1)], {"expireAfterSeconds": 0}),
+    ],
+    "refresh_tokens": [
+        ([("jti", 1)], {"unique": True}),
+    ],
+}
+
+def index_name(keys):
+    """Mongo's default name of an index: field_direction pairs joined by '_'."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def apply_indexes(database=db, verbose=False):
+    """
+    Create the declared indexes.
+
+    Returns:
+        [(collection, index name, "created" | "exists" | "failed: ...")]
+
+    Raises:
+        OperationFailure: a unique index could not be built (duplicate values)
+    """
+    report = []
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        existing = set(collection.index_information())
+        for keys, options in indexes:
+            name = options.get("name", index_name(keys))
+            try:
+                collection.create_index(keys, **options)
+                status = "exists" if name in existing else "created"
+            except OperationFailure as e:
+                if options.get("unique"):
+                    # Nothing else enforces the constraint (api_products_post relies on
+                    # sku_1 for its 409), so do not start without it
+                    print(f"❌ index {collection_name}.{name}: {e}")
+                    raise
+                status = f"failed: {e}"
+            report.append((collection_name, name, status))
+
+    for collection_name, name, status in report:
+        if verbose or status.startswith("failed"):
+            print(f"{'⚠️ ' if status.startswith('failed') else '✅'} index {collection_name}.{name}: {status}")
+    return report
+
+
+BACKFILL_BATCH = 1000
+
+
+def backfill_name_prefix(database=db):
+    """Set name_prefix on products that lack it; returns the number updated."""
+    collection = database["products"]
+    updated = 0
+    batch = []
+    for product in collection.find({"name_prefix": {"$exists": False}}, {"name": 1}):
+        batch.append(UpdateOne({"_id": product["_id"]}, {"$set": {"name_prefix": normalize_name(product.get("name"))}}))
+        if len(batch) == BACKFILL_BATCH:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
+
+# --- Query plan checks ---
+
+LIST_FILTERS = {
+    "no filter": {},
+    "category": {"category": "Electronics"},
+    "brand": {"brand": "Apple"},
+    "status": {"status": "active"},
+    "sku": {"sku": "APP-PHN-001"},
+    "price range": {"min_price": 10, "max_price": 500},
+    "category + price range": {"category": "Electronics", "min_price": 10, "max_price": 500},
+    "search": {"search": "phone"},
+    "search (short pattern)": {"search": "tv"},
+    "search prefix": {"search": "Sam", "search_mode": "prefix"},
+}
+# Substring regex fallback of patterns too short for the text index
+SCANNING_FILTERS = {"search (short pattern)"}
+
+
+def query_shapes():
+    """
+    (label, explain command, COLLSCAN expected) of every query the
+    controllers run.
+    """
+    for label, params in LIST_FILTERS.items():
+        query = product_query(**params)
+        scans = label in SCANNING_FILTERS
+        sorts = ["relevance", *PRODUCT_SORTS] if "$text" in query else PRODUCT_SORTS
+        for sort in sorts:
+            yield (f"GET /api/products {label}, sort={sort}",
+                   {"find": "products", "filter": query, "sort": dict(product_sort(sort, query)), "limit": 20}, scans)
+        if query:
+            yield (f"count {label}",
+                   {"aggregate": "products", "cursor": {},
+                    "pipeline": [{"$match": query}, {"$group": {"_id": 1, "n": {"$sum": 1}}}]}, scans)
+    yield ("GET /api/products/sku/{sku}", {"find": "products", "filter": {"sku": "APP-PHN-001"}}, False)
+    yield ("GET /api/categories",
+           {"aggregate": "products", "pipeline": CATEGORY_COUNTS_PIPELINE, "cursor": {}}, False)
+    # Statistics aggregate every product by design
+    yield ("GET /api/statistics",
+           {"aggregate": "products", "pipeline": STATISTICS_PIPELINE, "cursor": {}}, True)
+    yield ("token blacklist lookup", {"find": "blacklist", "filter": {"jti": "x"}}, False)
+    yield ("refresh token lookup", {"find": "refresh_tokens", "filter": {"jti": "x"}}, False)
+
+
+def winning_stages(explain):
+    """Stages of the winning plan(s) of an explain document, root first: [(stage, index name)]."""
+    stages = []
+
+    def walk(node, in_winning_plan):
+        if isinstance(node, dict):
+            if in_winning_plan and "stage" in node:
+                stages.append((node["stage"], node.get("indexName")))
+            for key, value in node.items():
+                if key != "rejectedPlans":
+                    walk(value, in_winning_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_winning_plan)
+
+    walk(explain, False)
+    return stages
+
+
+def explain_all(database=db):
+    """Explain every query shape; returns the labels of unexpected COLLSCANs."""
+    collscans = []
+    for label, command, collscan_expected in query_shapes():
+        explain = database.command("explain", command, verbosity="queryPlanner")
+        stages = winning_stages(explain)
+        plan = " → ".join(f"{stage}({index})" if index else stage for stage, index in reversed(stages))
+        collscan = any(stage == "COLLSCAN" for stage, _ in stages)
+        if collscan and not collscan_expected:
+            collscans.append(label)
+            mark = "❌"
+        elif any(stage == "SORT" for stage, _ in stages):
+            mark = "⚠️ "     # indexed filter, blocking in-memory sort
+        else:
+            mark = "✅"
+        print(f"{mark} {label}: {plan}")
+    return collscans
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply product/token indexes and check query plans")
+    parser.add_argument("--skip-apply", action="store_true", help="only explain, do not create indexes")
+    parser.add_argument("--skip-explain", action="store_true", help="only create indexes")
+    args = parser.parse_args()
+
+    if not args.skip_apply:
+        apply_indexes(verbose=True)
+        print(f"✅ name_prefix set on {backfill_name_prefix()} product(s)")
+    if not args.skip_explain:
+        collscans = explain_all()
+        if collscans:
+            print(f"\n❌ {len(collscans)} query shape(s) scan the whole collection:")
+            for label in collscans:
+                print(f"   {label}")
+            sys.exit(1)
+        print("\n✅ Every query shape uses an index")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Query shapes of GET /api/products, shared by the controllers and the index
+# checker (python -m swagger_server.indexes), so the plans checked there are the
+# plans the API runs.
+import re
+import unicodedata
+
+# search_mode=text: $text over the weighted text index, ranked by relevance.
+# Patterns too short to be words ("tv", "4") fall back to a substring $regex,
+# which scans but only runs for these.
+# search_mode=prefix: autocomplete, an anchored $regex on name_prefix (the
+# normalized name), answered by a bounded scan of the name_prefix index.
+SEARCH_MODES = ("text", "prefix")
+DEFAULT_SEARCH_MODE = "text"
+MIN_TEXT_SEARCH_LENGTH = 3
+TEXT_SCORE = {"$meta": "textScore"}
+
+# Internal fields left out of API responses
+HIDDEN_FIELDS = {"name_prefix": 0}
+
+PRODUCT_SORTS = {
+    "created_at": [("created_at", -1)],
+    "name": [("name", 1)],
+    "price_asc": [("price", 1)],
+    "price_desc": [("price", -1)],
+    "updated_at": [("updated_at", -1)],
+}
+DEFAULT_SORT = "created_at"
+
+
+def normalize_name(name):
+    """name_prefix of a product name: lowercase, accents stripped, whitespace collapsed."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    # đ is a letter of its own, not d + a combining mark
+    return " ".join(stripped.lower().replace("đ", "d").split())
+
+
+def product_query(category=None, brand=None, sku=None, status=None, min_price=None, max_price=None, search=None,
+                  search_mode=DEFAULT_SEARCH_MODE):
+    """Mongo filter of a product listing (parameters already validated)."""
+    query = {}
+
+    if category:
+        query["category"] = category
+    if brand:
+        query["brand"] = brand
+    if sku:
+        query["sku"] = sku
+    if status:
+        query["status"] = status
+    if min_price is not None or max_price is not None:
+        query["price"] = {}
+        if min_price is not None:
+            query["price"]["$gte"] = float(min_price)
+        if max_price is not None:
+            query["price"]["$lte"] = float(max_price)
+    # A search with nothing left to match (blank, or only accents in prefix mode)
+    # is ignored rather than turned into a match-everything "^" or "" regex
+    if search_mode == "prefix":
+        prefix = normalize_name(search)
+        if prefix:
+            query["name_prefix"] = {"$regex": "^" + re.escape(prefix)}
+    elif search and search.strip():
+        if len(search.strip()) < MIN_TEXT_SEARCH_LENGTH:
+            pattern = re.escape(search.strip())
+            query["$or"] = [
+                {"name": {"$regex": pattern, "$options": "i"}},
+                {"description": {"$regex": pattern, "$options": "i"}},
+            ]
+        else:
+            query["$text"] = {"$search": search}
+
+    return query
+
+
+def count_products(collection, query):
+    """Total for pagination; an unfiltered listing reads the collection's metadata count instead of scanning."""
+    if not query:
+        return collection.estimated_document_count()
+    return collection.count_documents(query)
+
+
+def product_sort(sort=None, query=None):
+    """
+    Sort spec of a product listing. A text search is ranked by relevance unless
+    another sort is asked for; otherwise (and for unknown values) newest first.
+    """
+    if query and "$text" in query and sort in (None, "relevance"):
+        return [("score", TEXT_SCORE)]
+    return PRODUCT_SORTS.get(sort, PRODUCT_SORTS[DEFAULT_SORT])
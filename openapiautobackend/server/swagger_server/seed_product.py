@@ -1,4 +1,5 @@
 from swagger_server.db import products_collection
+from swagger_server.queries import normalize_name
 from datetime import datetime, timezone
 
 # 20 sản phẩm mẫu đa dạng danh mục
@@ -237,6 +238,7 @@ now = datetime.now(timezone.utc).isoformat()
 for product in sample_products:
     product["created_at"] = now
     product["updated_at"] = now
+    product["name_prefix"] = normalize_name(product["name"])
 
 # Ghi vào MongoDB
 result = products_collection.insert_many(sample_products)
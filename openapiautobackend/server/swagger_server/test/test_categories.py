@@ -0,0 +1,64 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+from unittest import mock
+
+from swagger_server import categories
+
+ROWS = [{"_id": "Books", "count": 2}, {"_id": "Electronics", "count": 5}]
+
+
+class TestCategoryCounts(unittest.TestCase):
+    """category_counts() cache, with products_collection.aggregate stubbed"""
+
+    def setUp(self):
+        categories.invalidate_category_counts()
+        self.now = 1000.0
+        clock = mock.patch.object(categories.time, "monotonic", lambda: self.now)
+        collection = mock.patch.object(categories, "products_collection")
+        clock.start()
+        self.collection = collection.start()
+        self.collection.aggregate.side_effect = lambda pipeline: iter(ROWS)
+        self.addCleanup(clock.stop)
+        self.addCleanup(collection.stop)
+        self.addCleanup(categories.invalidate_category_counts)
+
+    def test_counts_come_from_one_aggregation(self):
+        self.assertEqual(categories.category_counts(), [
+            {"category": "Books", "count": 2},
+            {"category": "Electronics", "count": 5},
+        ])
+        self.collection.aggregate.assert_called_once_with(categories.CATEGORY_COUNTS_PIPELINE)
+
+    def test_cached_until_ttl(self):
+        categories.category_counts()
+        self.now += categories.CATEGORY_CACHE_TTL - 1
+        categories.category_counts()
+        self.assertEqual(self.collection.aggregate.call_count, 1)
+
+        self.now += 1
+        categories.category_counts()
+        self.assertEqual(self.collection.aggregate.call_count, 2)
+
+    def test_write_invalidates(self):
+        categories.category_counts()
+        categories.invalidate_category_counts()
+        categories.category_counts()
+        self.assertEqual(self.collection.aggregate.call_count, 2)
+
+    def test_count_racing_a_write_is_not_cached(self):
+        def aggregate_during_write(pipeline):
+            categories.invalidate_category_counts()     # admin write while counting
+            return iter(ROWS)
+
+        self.collection.aggregate.side_effect = aggregate_during_write
+        categories.category_counts()
+        self.collection.aggregate.side_effect = lambda pipeline: iter(ROWS)
+        categories.category_counts()
+        self.assertEqual(self.collection.aggregate.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
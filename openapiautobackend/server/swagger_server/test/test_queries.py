@@ -0,0 +1,68 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+
+from swagger_server.queries import PRODUCT_SORTS, TEXT_SCORE, normalize_name, product_query, product_sort
+
+
+class TestNormalizeName(unittest.TestCase):
+    """name_prefix normalization"""
+
+    def test_accents_and_case(self):
+        self.assertEqual(normalize_name("Điện Thoại Sám"), "dien thoai sam")
+        self.assertEqual(normalize_name("đồng hồ"), "dong ho")
+
+    def test_whitespace_and_none(self):
+        self.assertEqual(normalize_name("  iPhone \t 15  "), "iphone 15")
+        self.assertEqual(normalize_name(None), "")
+
+
+class TestProductQuery(unittest.TestCase):
+    """Mongo filter of GET /api/products"""
+
+    def test_filters(self):
+        self.assertEqual(product_query(), {})
+        self.assertEqual(product_query(category="Electronics", min_price=10, max_price="500"), {
+            "category": "Electronics",
+            "price": {"$gte": 10.0, "$lte": 500.0},
+        })
+
+    def test_text_search(self):
+        self.assertEqual(product_query(search="phone case"), {"$text": {"$search": "phone case"}})
+
+    def test_short_pattern_falls_back_to_escaped_regex(self):
+        self.assertEqual(product_query(search=" a+ "), {"$or": [
+            {"name": {"$regex": r"a\+", "$options": "i"}},
+            {"description": {"$regex": r"a\+", "$options": "i"}},
+        ]})
+
+    def test_prefix_search(self):
+        self.assertEqual(product_query(search="Điện th", search_mode="prefix"),
+                         {"name_prefix": {"$regex": r"^dien\ th"}})
+
+    def test_empty_search_is_ignored(self):
+        for search in ("", "   ", "\u0301"):  # a lone combining accent
+            self.assertEqual(product_query(search=search, search_mode="prefix"), {}, repr(search))
+        self.assertEqual(product_query(search="   "), {})
+
+
+class TestProductSort(unittest.TestCase):
+    """Sort spec of GET /api/products"""
+
+    def test_text_search_defaults_to_relevance(self):
+        query = product_query(search="phone")
+        self.assertEqual(product_sort(None, query), [("score", TEXT_SCORE)])
+        self.assertEqual(product_sort("relevance", query), [("score", TEXT_SCORE)])
+        self.assertEqual(product_sort("price_asc", query), PRODUCT_SORTS["price_asc"])
+
+    def test_newest_first_otherwise(self):
+        for sort in (None, "relevance", "unknown"):
+            self.assertEqual(product_sort(sort, product_query(search="Sam", search_mode="prefix")),
+                             PRODUCT_SORTS["created_at"], sort)
+        self.assertEqual(product_sort("name", {}), PRODUCT_SORTS["name"])
+
+
+if __name__ == '__main__':
+    unittest.main()
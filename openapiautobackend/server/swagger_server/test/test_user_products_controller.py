@@ -40,6 +40,7 @@ class TestUserProductsController(BaseTestCase):
                         ('min_price', 0),
                         ('max_price', 3.4),
                         ('search', 'search_example'),
+                        ('search_mode', 'text'),
                         ('sort', 'created_at')]
         response = self.client.open(
             '/api/products',